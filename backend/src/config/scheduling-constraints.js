@@ -39,7 +39,30 @@ module.exports = {
         MAX_TIME_SECONDS: 240,
         ENABLE_OVERTIME: false,
         ENABLE_WEEKEND_WORK: true,
-        STRICT_REST_REQUIREMENTS: true
+        STRICT_REST_REQUIREMENTS: true,
+        // Persistent cp_sat_optimizer.py server (see cp-sat-worker-pool.service.js)
+        WORKER_POOL_ENABLED: process.env.CP_SAT_WORKER_POOL !== 'false',
+        WORKER_POOL_SIZE: parseInt(process.env.CP_SAT_WORKERS, 10) || 2,
+        // Process pool size for cp_sat_optimizer.py --batch (unset = all CPU cores)
+        BATCH_WORKERS: parseInt(process.env.CP_SAT_BATCH_WORKERS, 10) || null,
+        // Encoding of optimizer frames on stdin/stdout: 'json' or 'pack' (binary)
+        IO_FORMAT: process.env.CP_SAT_IO_FORMAT || 'json',
+        // Send the columnar optimizer input (format_version 2) instead of the legacy dicts
+        COLUMNAR_INPUT: process.env.CP_SAT_COLUMNAR_INPUT !== 'false',
+        // Longest multi-week horizon accepted by generateOptimalSchedule (horizonWeeks option)
+        MAX_HORIZON_WEEKS: 6,
+        // Seed CP-SAT with the optimizer's greedy schedule when there is no prior schedule
+        HEURISTIC_HINTS: process.env.CP_SAT_HEURISTIC_HINTS !== 'false',
+        // On-disk cache of optimizer results keyed by a problem fingerprint
+        // (unset directory = cp-sat-result-cache in the OS temp directory)
+        RESULT_CACHE_ENABLED: process.env.CP_SAT_RESULT_CACHE !== 'false',
+        RESULT_CACHE_DIR: process.env.CP_SAT_RESULT_CACHE_DIR || null,
+        RESULT_CACHE_MAX_MB: parseInt(process.env.CP_SAT_RESULT_CACHE_MAX_MB, 10) || 256,
+        RESULT_CACHE_MAX_AGE_HOURS: parseInt(process.env.CP_SAT_RESULT_CACHE_MAX_AGE_HOURS, 10) || 168,
+        // Memory-lean model build (anonymous variables, build indexes released before the search)
+        LEAN_BUILD: process.env.CP_SAT_LEAN_BUILD === 'true',
+        // Resident memory ceiling (MB) of one optimizer process (unset = no ceiling)
+        MEMORY_LIMIT_MB: parseInt(process.env.CP_SAT_MEMORY_LIMIT_MB, 10) || null
     }
 };
 // module.exports = SCHEDULING_CONSTRAINTS;
\ No newline at end of file
@@ -30,26 +30,30 @@ const checkPythonAvailability = async () => {
         }, 2000);
     });
 };
+const assertNoPublishedSchedule = async (siteId, weekStart, transaction = null) => {
+    const weekEnd = dayjs(weekStart).add(6, 'days').format('YYYY-MM-DD');
+
+    const publishedSchedule = await Schedule.findOne({
+        where: {
+            site_id: siteId,
+            start_date: {
+                [db.Sequelize.Op.between]: [weekStart, weekEnd],
+            },
+            status: 'published',
+        },
+        transaction,
+    });
+
+    if (publishedSchedule) {
+        throw new Error('PUBLISHED_SCHEDULE_EXISTS');
+    }
+};
 const deleteExistingSchedule = async (siteId, weekStart, transaction = null) => {
     try {
         const weekEnd = dayjs(weekStart).add(6, 'days').format('YYYY-MM-DD');
 
         // First check if there's a published schedule
-        const publishedSchedule = await Schedule.findOne({
-            where: {
-                site_id: siteId,
-                start_date: {
-                    [db.Sequelize.Op.between]: [weekStart, weekEnd],
-                },
-                status: 'published',
-            },
-            transaction,
-        });
-
-        if (publishedSchedule) {
-            // noinspection ExceptionCaughtLocallyJS
-            throw new Error('PUBLISHED_SCHEDULE_EXISTS');
-        }
+        await assertNoPublishedSchedule(siteId, weekStart, transaction);
 
         const deletedAssignments = await ScheduleAssignment.destroy({
             where: {
@@ -112,7 +116,11 @@ const generateNextWeekSchedule = async (req, res) => {
         const algorithm = req.body.algorithm || 'auto';
         const optimizationMode = req.body.optimizationMode || 'balanced';
         const fairnessWeight = req.body.fairnessWeight || 50;
+        const searchProfile = req.body.searchProfile;
+        const generationId = req.body.generationId;
         const positionIds = req.body.position_ids || [];
+        const horizonWeeks = cpSatBridge.normalizeHorizonWeeks(req.body.horizonWeeks);
+        const coverageReport = req.body.coverageReport === true;
 
         let weekStart;
         if (req.body.weekStart) {
@@ -131,6 +139,16 @@ const generateNextWeekSchedule = async (req, res) => {
 
         await deleteExistingSchedule(siteId, weekStart, transaction);
 
+        // A multi-week CP-SAT horizon replaces the drafts of the following weeks as well. They are
+        // deleted by the bridge only once the optimizer succeeded (the fallbacks regenerate week 1 only)
+        if (algorithm !== 'simple') {
+            for (let week = 1; week < horizonWeeks; week++) {
+                const nextWeekStart = dayjs(weekStart).add(week, 'week').format('YYYY-MM-DD');
+                await assertNoPublishedSchedule(siteId, nextWeekStart, transaction);
+            }
+        }
+        const clearWeek = nextWeekStart => deleteExistingSchedule(siteId, nextWeekStart, transaction);
+
 
         console.log(`[ScheduleController] Generating schedule for site ${siteId}, week starting ${weekStart}, algorithm: ${algorithm}`);
 
@@ -160,7 +178,12 @@ const generateNextWeekSchedule = async (req, res) => {
                     result = await cpSatBridge.generateOptimalSchedule(siteId, weekStart, transaction, {
                         optimizationMode,
                         fairnessWeight,
+                        searchProfile,
+                        generationId,
                         positionIds,
+                        horizonWeeks,
+                        clearWeek,
+                        coverageReport,
                     });
 
 
@@ -176,8 +199,12 @@ const generateNextWeekSchedule = async (req, res) => {
 
                     if (!result.success) {
                         console.warn(`[ScheduleController] CP-SAT failed, falling back to simple`);
+                        const cpSatFailure = result;
                         result = await ScheduleGeneratorService.generateWeeklySchedule(db, siteId, weekStart, transaction, positionIds);
                         result.fallback = 'cp-sat-to-simple';
+                        result.originalError = cpSatFailure.error;
+                        // Why CP-SAT found no schedule (conflicting requirements and constraints)
+                        result.diagnosis = cpSatFailure.diagnosis;
                     }
                 } catch (error) {
                     console.warn(`[ScheduleController] CP-SAT error, falling back to simple: ${error.message}`);
@@ -187,6 +214,33 @@ const generateNextWeekSchedule = async (req, res) => {
                 }
                 break;
 
+            case 'heuristic':
+                // Greedy schedule of the Python optimizer, an instant preview without CP-SAT
+                result = await cpSatBridge.generateOptimalSchedule(siteId, weekStart, transaction, {
+                    fairnessWeight,
+                    generationId,
+                    positionIds,
+                    horizonWeeks,
+                    clearWeek,
+                    coverageReport,
+                    algorithm: 'heuristic',
+                });
+
+                if (result.success && result.schedule) {
+                    result.statistics = await cpSatBridge.calculateDetailedStats(
+                        result.schedule.schedule_id,
+                        siteId,
+                        weekStart,
+                        [], // assignments
+                        transaction,
+                    );
+                } else {
+                    console.warn(`[ScheduleController] Heuristic failed, falling back to simple`);
+                    result = await ScheduleGeneratorService.generateWeeklySchedule(db, siteId, weekStart, transaction, positionIds);
+                    result.fallback = 'heuristic-to-simple';
+                }
+                break;
+
             case 'simple':
                 result = await ScheduleGeneratorService.generateWeeklySchedule(db, siteId, weekStart, transaction);
                 break;
@@ -225,6 +279,10 @@ const generateNextWeekSchedule = async (req, res) => {
                 stats: result.stats || {},
                 algorithm: result.algorithm || selectedAlgorithm,
                 requested_algorithm: algorithm,
+                // Per-slot coverage rows, when requested with coverageReport
+                ...(result.coverage_report && {coverage_report: result.coverage_report}),
+                // Per-stage objective and bound of the lexicographic objective mode
+                ...(result.stages && {stages: result.stages}),
             };
 
             if (result.fallback) {
@@ -232,6 +290,9 @@ const generateNextWeekSchedule = async (req, res) => {
                 if (result.originalError) {
                     responseData.original_error = result.originalError;
                 }
+                if (result.diagnosis) {
+                    responseData.diagnosis = result.diagnosis;
+                }
             }
 
             res.json(responseData);
@@ -240,6 +301,7 @@ const generateNextWeekSchedule = async (req, res) => {
                 success: false,
                 message: result?.error || 'Failed to generate schedule',
                 error: result?.error || 'Unknown error',
+                ...(result?.diagnosis && {diagnosis: result.diagnosis}),
                 algorithm: selectedAlgorithm,
             });
         }
@@ -264,6 +326,131 @@ const generateNextWeekSchedule = async (req, res) => {
     }
 };
 
+/**
+ * Progress of a running CP-SAT generation (pass generationId when starting it)
+ */
+const getGenerationProgress = async (req, res) => {
+    const progress = cpSatBridge.getGenerationProgress(req.params.generationId);
+
+    if (!progress) {
+        return res.status(404).json({
+            success: false,
+            message: 'Generation is not running',
+        });
+    }
+
+    res.json({
+        success: true,
+        data: progress,
+    });
+};
+
+/**
+ * Stop a running generation early and keep the best schedule found so far
+ */
+const stopGeneration = async (req, res) => {
+    const stopped = cpSatBridge.stopGeneration(req.params.generationId);
+
+    if (!stopped) {
+        return res.status(404).json({
+            success: false,
+            message: 'Generation is not running',
+        });
+    }
+
+    res.json({
+        success: true,
+        message: 'Stop requested, the best schedule found so far will be saved',
+    });
+};
+
+/**
+ * Incrementally repair a schedule after a constraint or requirement change
+ */
+const repairSchedule = async (req, res) => {
+    const transaction = await db.sequelize.transaction();
+
+    try {
+        const { scheduleId } = req.params;
+        const delta = req.body.delta || {};
+
+        const result = await cpSatBridge.repairSchedule(scheduleId, delta, transaction);
+
+        if (!result.success) {
+            await transaction.rollback();
+            return res.status(500).json({
+                success: false,
+                message: result.error || 'Failed to repair schedule',
+                attempts: result.attempts,
+            });
+        }
+
+        await transaction.commit();
+
+        res.json({
+            success: true,
+            message: 'Schedule repaired successfully',
+            data: result,
+        });
+
+    } catch (error) {
+        await transaction.rollback();
+        console.error('[ScheduleController] Error repairing schedule:', error);
+        res.status(500).json({
+            success: false,
+            message: 'Error repairing schedule',
+            error: process.env.NODE_ENV === 'development' ? error.message : 'Internal server error',
+        });
+    }
+};
+
+/**
+ * What-if comparison of optimization weight scenarios for one site and week (nothing is saved)
+ */
+const compareWeightScenarios = async (req, res) => {
+    try {
+        const siteId = req.body.site_id || 1;
+        const weekStart = dayjs(req.body.weekStart || dayjs().add(1, 'week')).startOf('week').format('YYYY-MM-DD');
+        const scenarios = req.body.scenarios || [];
+        const fairnessWeights = req.body.fairnessWeights || [];
+
+        if (!scenarios.length && !fairnessWeights.length) {
+            return res.status(400).json({
+                success: false,
+                message: 'scenarios or fairnessWeights is required',
+            });
+        }
+
+        const result = await cpSatBridge.compareWeightScenarios(siteId, weekStart, scenarios, {
+            fairnessWeights,
+            scenarioParallel: req.body.scenarioParallel,
+            positionIds: req.body.position_ids || [],
+            horizonWeeks: req.body.horizonWeeks,
+            generationId: req.body.generationId,
+        });
+
+        if (!result.success) {
+            return res.status(500).json({
+                success: false,
+                message: result.error || 'Failed to compare scenarios',
+            });
+        }
+
+        res.json({
+            success: true,
+            data: result,
+        });
+
+    } catch (error) {
+        console.error('[ScheduleController] Error comparing weight scenarios:', error);
+        res.status(500).json({
+            success: false,
+            message: 'Error comparing weight scenarios',
+            error: process.env.NODE_ENV === 'development' ? error.message : 'Internal server error',
+        });
+    }
+};
+
 /**
  * Compare all available algorithms
  */
@@ -373,6 +560,10 @@ const selectBestResult = (comparison) => {
 
 module.exports = {
     generateNextWeekSchedule,
+    getGenerationProgress,
+    stopGeneration,
+    repairSchedule,
+    compareWeightScenarios,
     compareAllAlgorithms,
     checkPythonAvailability,
     selectBestResult,
@@ -135,6 +135,19 @@ const updateSystemSettings = async (req, res) => {
             maxConsecutiveDays: 'number',
             optimizationMode: 'string',
             fairnessWeight: 'number',
+            searchProfile: 'string',
+            autoGenerateSearchProfile: 'string',
+            solverSearchWorkers: 'number',
+            solverRelativeGapLimit: 'number',
+            solverAbsoluteGapLimit: 'number',
+            solverRandomSeed: 'number',
+            optimizerLogLevel: 'string',
+            optimizerDecomposition: 'string',
+            fairnessModel: 'string',
+            fairnessHistoryWeeks: 'number',
+            optimizerSymmetryBreaking: 'string',
+            optimizerInfeasibilityDiagnosis: 'string',
+            optimizerObjectiveMode: 'string',
             maxCannotWorkDays: 'number',
             maxPreferWorkDays: 'number',
             strictLegalCompliance: 'boolean',
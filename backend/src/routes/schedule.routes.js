@@ -25,8 +25,12 @@ router.get('/:scheduleId/export', ...[verifyToken, isAdmin, getAccessibleSites],
 router.get('/schedules/:scheduleId/statistics', ...[verifyToken, isAdmin, getAccessibleSites], scheduleController.handleGetScheduleStatistics);
 
 router.post('/generate', ...[verifyToken, isAdmin, getAccessibleSites], generationController.generateNextWeekSchedule);
+router.get('/generation/:generationId/progress', ...[verifyToken, isAdmin, getAccessibleSites], generationController.getGenerationProgress);
+router.post('/generation/:generationId/stop', ...[verifyToken, isAdmin, getAccessibleSites], generationController.stopGeneration);
 router.post('/compare-algorithms', ...[verifyToken, isAdmin, getAccessibleSites], generationController.compareAllAlgorithms);
+router.post('/compare-scenarios', ...[verifyToken, isAdmin, getAccessibleSites], generationController.compareWeightScenarios);
 router.get('/', ...[verifyToken, isAdmin, getAccessibleSites], scheduleController.getAllSchedules);
+router.post('/:scheduleId/repair', ...[verifyToken, isAdmin, getAccessibleSites], generationController.repairSchedule);
 router.post('/:scheduleId/validate', ...[verifyToken, isAdmin, getAccessibleSites], ScheduleValidationController.validateChanges);
 router.get('/:scheduleId', ...[verifyToken, isAdmin, getAccessibleSites], scheduleController.getScheduleDetails);
 router.put('/:scheduleId/status', ...[verifyToken, isAdmin, getAccessibleSites], scheduleController.updateScheduleStatus);
@@ -74,16 +74,20 @@ class AutoGenerationService {
                 attributes: ['site_id'],
             });
 
-            let generatedCount = 0;
+            // Get optimization settings
+            const settings = await this.getOptimizationSettings();
+
+            // Calculate next week's start date
+            const today = new Date();
+            const daysUntilNextWeek = 7 - today.getDay();
+            const nextWeekStart = new Date(today);
+            nextWeekStart.setDate(today.getDate() + daysUntilNextWeek);
+            const weekStart = nextWeekStart.toISOString().split('T')[0];
+
+            const pendingSites = [];
 
             for (const site of workSites) {
                 try {
-                    // Calculate next week's start date
-                    const today = new Date();
-                    const daysUntilNextWeek = 7 - today.getDay();
-                    const nextWeekStart = new Date(today);
-                    nextWeekStart.setDate(today.getDate() + daysUntilNextWeek);
-
                     // Check if schedule already exists for next week
                     const existingSchedule = await Schedule.findOne({
                         where: {
@@ -100,22 +104,29 @@ class AutoGenerationService {
                         continue;
                     }
 
-                    // Get optimization settings
-                    const settings = await this.getOptimizationSettings();
-
-                    // Generate schedule using CP-SAT bridge
-                    const result = await cpSatBridge.generateOptimalSchedule(site.site_id, nextWeekStart.toISOString().split('T')[0]);
-
-                    if (result.success) {
-                        generatedCount++;
-                        console.log(`Auto-generated schedule for site ${site.site_id}`);
-                    }
+                    pendingSites.push(site.site_id);
 
                 } catch (error) {
-                    console.error(`Failed to auto-generate schedule for site ${site.site_id}:`, error);
+                    console.error(`Failed to check schedule for site ${site.site_id}:`, error);
                 }
             }
 
+            // Solve all pending sites in one parallel optimizer batch
+            const results = await cpSatBridge.generateOptimalSchedulesBatch(
+                pendingSites.map(siteId => ({siteId, weekStart, options: settings})),
+            );
+
+            let generatedCount = 0;
+
+            results.forEach((result, index) => {
+                if (result && result.success) {
+                    generatedCount++;
+                    console.log(`Auto-generated schedule for site ${pendingSites[index]}`);
+                } else {
+                    console.error(`Failed to auto-generate schedule for site ${pendingSites[index]}:`, result?.error);
+                }
+            });
+
             console.log(`Auto-generation completed. Generated ${generatedCount} schedules.`);
 
         } catch (error) {
@@ -125,18 +136,21 @@ class AutoGenerationService {
 
     async getOptimizationSettings() {
         try {
-            const [modeSetting, fairnessSetting] = await Promise.all([
+            const [modeSetting, fairnessSetting, profileSetting] = await Promise.all([
                 SystemSettings.findOne({where: {setting_key: 'optimizationMode'}}),
                 SystemSettings.findOne({where: {setting_key: 'fairnessWeight'}}),
+                SystemSettings.findOne({where: {setting_key: 'autoGenerateSearchProfile'}}),
             ]);
 
             return {
                 optimizationMode: modeSetting ? modeSetting.setting_value : 'balanced',
                 fairnessWeight: fairnessSetting ? parseInt(fairnessSetting.setting_value) : 50,
+                // The nightly run has time to prove optimality
+                searchProfile: profileSetting ? profileSetting.setting_value : 'prove-optimal',
             };
         } catch (error) {
             console.error('Error fetching optimization settings:', error);
-            return {optimizationMode: 'balanced', fairnessWeight: 50};
+            return {optimizationMode: 'balanced', fairnessWeight: 50, searchProfile: 'prove-optimal'};
         }
     }
 
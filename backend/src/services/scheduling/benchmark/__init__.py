@@ -0,0 +1,29 @@
+# backend/src/services/scheduling/benchmark/__init__.py
+"""Benchmarks of the CP-SAT schedule optimizer (UniversalShiftSchedulerCP).
+
+Problems come from a seeded generator (generator.generate_problem) or from the
+`SQL Dumps/` exports of a real site (sql_dumps.load_sql_dump_problem). The runner
+solves each case in a fresh process and records model-build time, model size, time to
+the first feasible and to the optimal solution, the objective and peak RSS, then
+compares them with a stored baseline.
+
+Run from backend/src/services/scheduling:
+
+    python -m benchmark                       # default suite, compared to baseline.json
+    python -m benchmark --cases small large   # selected cases
+    python -m benchmark --employees 300 --positions 12 --days 14   # sizing run
+    python -m benchmark --set symmetry_breaking=lex   # with an optimizer setting changed
+    python -m benchmark --update-baseline     # store this run as the new baseline
+"""
+from .generator import generate_problem
+from .sql_dumps import load_sql_dump_problem
+from .runner import DEFAULT_SUITE, compare_to_baseline, run_case, run_suite
+
+__all__ = [
+    'DEFAULT_SUITE',
+    'compare_to_baseline',
+    'generate_problem',
+    'load_sql_dump_problem',
+    'run_case',
+    'run_suite',
+]
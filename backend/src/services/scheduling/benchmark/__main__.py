@@ -0,0 +1,77 @@
+# backend/src/services/scheduling/benchmark/__main__.py
+import argparse
+import json
+import sys
+
+from .runner import (DEFAULT_BASELINE, DEFAULT_SUITE, DEFAULT_TIME_LIMIT, DEFAULT_TOLERANCE, compare_to_baseline,
+                     environment, load_baseline, print_case, print_comparison, run_suite, save_baseline)
+
+
+def _setting(item):
+    key, _, value = item.partition('=')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmark', description='CP-SAT optimizer benchmarks')
+    parser.add_argument('--cases', nargs='+', choices=sorted(DEFAULT_SUITE), help='Cases of the suite to run')
+    parser.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT, help='max_solve_time per case')
+    parser.add_argument('--workers', type=int, help='CP-SAT search workers (default: solver default)')
+    parser.add_argument('--seed', type=int, default=1, help='Generator and solver seed')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative change that counts as a regression')
+    parser.add_argument('--output', help='Write the raw results as JSON')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='Override an optimizer setting, e.g. --set symmetry_breaking=lex (JSON values)')
+    # A single generated case instead of the suite, for sizing hardware
+    parser.add_argument('--employees', type=int, help='Run one generated case with this many employees')
+    parser.add_argument('--positions', type=int, default=4)
+    parser.add_argument('--shifts', type=int, default=3, help='Shifts per position')
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--density', type=float, default=0.2, help='Constraint density')
+    args = parser.parse_args()
+
+    if args.employees:
+        cases = {'custom': ('generated', {'employees': args.employees, 'positions': args.positions,
+                                          'shifts_per_position': args.shifts, 'days': args.days,
+                                          'constraint_density': args.density})}
+    else:
+        cases = {name: DEFAULT_SUITE[name] for name in (args.cases or DEFAULT_SUITE)}
+
+    settings = dict(_setting(item) for item in args.set)
+    print(f"Environment: {environment()}")
+    results = run_suite(cases, args.time_limit, args.workers, args.seed, on_case=print_case, settings=settings)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'environment': environment(), 'cases': results}, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results, args.time_limit, args.workers, args.seed, settings)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create one")
+        return 0
+    if baseline.get('environment') != environment():
+        print(f"Baseline measured on {baseline.get('environment')}, timings may not be comparable")
+    if (baseline.get('time_limit'), baseline.get('workers'), baseline.get('seed'), baseline.get('settings', {})) != (
+            args.time_limit, args.workers, args.seed, settings):
+        print('Baseline used a different time limit, worker count, seed or settings')
+
+    rows = compare_to_baseline(results, baseline, args.tolerance)
+    print_comparison(rows)
+    regressions = [row for row in rows if row['regression']]
+    print(f"\n{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
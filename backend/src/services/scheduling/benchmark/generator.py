@@ -0,0 +1,174 @@
+# backend/src/services/scheduling/benchmark/generator.py
+"""Seeded synthetic optimizer inputs (legacy dict format, as built by the bridge)"""
+import random
+from datetime import date, timedelta
+
+# Defaults of backend/src/config/scheduling-constraints.js
+HARD_CONSTRAINTS = {
+    'MAX_HOURS_PER_DAY': 12,
+    'MAX_HOURS_PER_WEEK': 48,
+    'MIN_REST_BETWEEN_SHIFTS': 8,
+    'MIN_REST_AFTER_NIGHT_SHIFT': 12,
+    'MIN_REST_AFTER_REGULAR_SHIFT': 8,
+    'MAX_CONSECUTIVE_DAYS': 6,
+    'MAX_NIGHT_SHIFTS_PER_WEEK': 7
+}
+SOFT_CONSTRAINTS = {
+    'MAX_SHIFTS_PER_DAY': 1,
+    'MAX_CONSECUTIVE_WORK_DAYS': 6,
+    'MAX_HOURS_PER_WEEK': 48,
+    'MAX_CANNOT_WORK_DAYS_PER_WEEK': 3,
+    'MAX_PREFER_WORK_DAYS_PER_WEEK': 5
+}
+OPTIMIZATION_WEIGHTS = {
+    'SHORTAGE_PENALTY': 1000,
+    'PREFER_WORK_BONUS': 10,
+    'WORKLOAD_BALANCE': 5,
+    'POSITION_MATCH_BONUS': 20,
+    'SITE_MATCH_BONUS': 10
+}
+
+# First shift of the day starts at this hour, the others follow back to back
+FIRST_SHIFT_HOUR = 7
+# A Sunday, the first day of a week in the bridge
+DEFAULT_START_DATE = '2025-01-05'
+
+
+def benchmark_settings(time_limit=30, workers=None, seed=0):
+    """Optimizer settings of the bridge, quiet and without the result cache"""
+    settings = {
+        'hard_constraints': dict(HARD_CONSTRAINTS),
+        'soft_constraints': dict(SOFT_CONSTRAINTS),
+        'optimization_weights': dict(OPTIMIZATION_WEIGHTS),
+        'max_solve_time': time_limit,
+        'optimization_mode': 'balanced',
+        'fairness_weight': 50,
+        'strict_rest_requirements': True,
+        'log_level': 'off',
+        'decomposition': 'never',
+        'heuristic_hints': False,
+        'result_cache': None,
+        'random_seed': seed
+    }
+    if workers:
+        settings['num_search_workers'] = workers
+    return settings
+
+
+def horizon_days(day_count, start_date=DEFAULT_START_DATE):
+    """days array of the bridge for day_count days from start_date (weekday 0 = Sunday)"""
+    start = date.fromisoformat(start_date)
+    days = []
+    for day_idx in range(day_count):
+        current = start + timedelta(days=day_idx)
+        days.append({
+            'date': current.isoformat(),
+            'day_name': current.strftime('%A'),
+            'day_index': day_idx,
+            'week_index': day_idx // 7,
+            'weekday': (current.weekday() + 1) % 7
+        })
+    return days
+
+
+def _position_shifts(pos_id, shift_count, first_shift_id):
+    """shift_count shifts covering the day, night shifts being the ones that cross midnight"""
+    length = 24 // shift_count
+    duration = min(length, HARD_CONSTRAINTS['MAX_HOURS_PER_DAY'])
+    shifts = []
+    for index in range(shift_count):
+        start_hour = (FIRST_SHIFT_HOUR + index * length) % 24
+        shifts.append({
+            'shift_id': first_shift_id + index,
+            'shift_name': f'Shift {index + 1}',
+            'start_time': f'{start_hour:02d}:00:00',
+            'duration': duration,
+            'duration_minutes': duration * 60,
+            'is_night_shift': start_hour + duration > 24 or start_hour < 5,
+            'position_id': pos_id
+        })
+    return shifts
+
+
+def generate_problem(employees=40, positions=4, shifts_per_position=3, days=7, constraint_density=0.2,
+                     requirement_density=0.9, max_staff=1, seed=1, start_date=DEFAULT_START_DATE,
+                     time_limit=30, workers=None):
+    """Random site with the given dimensions; the same arguments always give the same problem.
+
+    employees are spread round-robin over the positions. Every position-shift-day slot needs
+    1..max_staff employees with probability requirement_density. constraint_density is the
+    share of employee-days with a constraint: 30% temporary cannot-work, 20% permanent
+    cannot-work and 50% prefer-work, each for a whole day or one shift.
+    """
+    rng = random.Random(seed)
+    day_list = horizon_days(days, start_date)
+
+    position_list = []
+    shift_list = []
+    position_shifts_map = {}
+    shift_requirements = {}
+    for pos_id in range(1, positions + 1):
+        pos_shifts = _position_shifts(pos_id, shifts_per_position, len(shift_list) + 1)
+        shift_list.extend(pos_shifts)
+        position_shifts_map[str(pos_id)] = [shift['shift_id'] for shift in pos_shifts]
+
+        total_required = 0
+        for shift in pos_shifts:
+            for day in day_list:
+                if rng.random() >= requirement_density:
+                    continue
+                required = rng.randint(1, max_staff)
+                total_required += required
+                shift_requirements[f"{pos_id}-{shift['shift_id']}-{day['date']}"] = {
+                    'position_id': pos_id,
+                    'shift_id': shift['shift_id'],
+                    'date': day['date'],
+                    'day_index': day['day_index'],
+                    'required_staff': required,
+                    'is_working_day': True
+                }
+        position_list.append({
+            'pos_id': pos_id,
+            'pos_name': f'Position {pos_id}',
+            'profession': 'Benchmark',
+            'num_of_emp': 1,
+            'total_required': total_required
+        })
+
+    employee_list = [{
+        'emp_id': emp_id,
+        'name': f'Employee {emp_id}',
+        'default_position_id': (emp_id - 1) % positions + 1,
+        'status': 'active'
+    } for emp_id in range(1, employees + 1)]
+
+    constraints = {'cannot_work': [], 'prefer_work': [], 'permanent_cannot_work': [], 'legal_constraints': []}
+    for employee in employee_list:
+        own_shifts = position_shifts_map[str(employee['default_position_id'])]
+        for day in day_list:
+            draw = rng.random()
+            if draw >= constraint_density:
+                continue
+            share = draw / constraint_density
+            constraint_type = ('cannot_work' if share < 0.3 else
+                               'permanent_cannot_work' if share < 0.5 else 'prefer_work')
+            constraints[constraint_type].append({
+                'emp_id': employee['emp_id'],
+                'day_index': day['day_index'],
+                'shift_id': rng.choice(own_shifts) if rng.random() < 0.5 else None,
+                'constraint_type': 'prefer_work' if constraint_type == 'prefer_work' else 'cannot_work'
+            })
+
+    return {
+        'employees': employee_list,
+        'shifts': shift_list,
+        'positions': position_list,
+        'position_shifts_map': position_shifts_map,
+        'days': day_list,
+        'constraints': constraints,
+        'existing_assignments': [],
+        'prior_schedule': [],
+        'carry_over': [],
+        'shift_requirements': shift_requirements,
+        'settings': benchmark_settings(time_limit, workers, seed)
+    }
@@ -0,0 +1,238 @@
+# backend/src/services/scheduling/benchmark/runner.py
+"""Benchmark runner: solves every case in a fresh process and compares with a baseline.
+
+Recorded per case:
+    build_time       model building in ms (profile timings up to the solver call)
+    variables, constraints, assignment_variables
+    first_feasible   solver seconds until the first solution (None without one)
+    time_to_optimal  solver seconds until optimality was proven (None when not proven)
+    objective, status, shortage
+    peak_rss_mb      peak resident memory of the case process, model_rss_mb the part
+                     above the process right after importing OR-Tools
+"""
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+from .generator import generate_problem
+from .sql_dumps import load_sql_dump_problem
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_TIME_LIMIT = 30
+# Relative change above which a metric counts as a regression
+DEFAULT_TOLERANCE = 0.2
+# Timing differences below this many seconds are noise, never regressions
+TIME_NOISE_SECONDS = 0.05
+
+# Case name -> (fixture, arguments)
+DEFAULT_SUITE = {
+    'small': ('generated', {'employees': 12, 'positions': 2, 'shifts_per_position': 3, 'days': 7}),
+    'medium': ('generated', {'employees': 40, 'positions': 4, 'shifts_per_position': 3, 'days': 7}),
+    'large': ('generated', {'employees': 120, 'positions': 8, 'shifts_per_position': 3, 'days': 7}),
+    'dense-constraints': ('generated', {'employees': 40, 'positions': 4, 'shifts_per_position': 3, 'days': 7,
+                                        'constraint_density': 0.5}),
+    'horizon-4w': ('generated', {'employees': 40, 'positions': 4, 'shifts_per_position': 3, 'days': 28}),
+    'sql-dumps': ('sql-dumps', {'employees_per_position': 10, 'days': 7}),
+    'sql-dumps-x5': ('sql-dumps', {'employees_per_position': 10, 'days': 7, 'copies': 5}),
+}
+
+# Metric -> (kind, higher is better)
+METRICS = {
+    'build_time': ('time_ms', False),
+    'first_feasible': ('time_s', False),
+    'time_to_optimal': ('time_s', False),
+    'variables': ('count', False),
+    'constraints': ('count', False),
+    'peak_rss_mb': ('memory', False),
+    'objective': ('objective', True),
+}
+
+# Profile timings that are not model building
+SOLVE_PHASES = ('presolve', 'search', 'extraction', 'json_load')
+
+
+def build_problem(fixture, arguments, time_limit=DEFAULT_TIME_LIMIT, workers=None, seed=1, settings=None):
+    """Optimizer input of one case; settings override the optimizer settings of the fixture"""
+    if fixture == 'generated':
+        problem = generate_problem(**{'seed': seed, **arguments}, time_limit=time_limit, workers=workers)
+    elif fixture == 'sql-dumps':
+        problem = load_sql_dump_problem(**arguments, time_limit=time_limit, workers=workers, seed=seed)
+    else:
+        raise ValueError(f'Unknown benchmark fixture: {fixture}')
+    problem['settings'].update(settings or {})
+    return problem
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_case(problem):
+    """Solve one problem in this process and return its metrics"""
+    from cp_sat_optimizer import UniversalShiftSchedulerCP
+
+    rss_before = _peak_rss_mb()
+    first_feasible = []
+
+    def on_progress(progress):
+        if not first_feasible:
+            first_feasible.append(progress['elapsed'])
+
+    started = time.perf_counter()
+    result = UniversalShiftSchedulerCP(on_progress=on_progress).optimize_schedule(problem)
+    wall_time = time.perf_counter() - started
+
+    profile = result.get('profile', {})
+    model = profile.get('model', {})
+    solver = profile.get('solver', {})
+    timings = profile.get('timings', {})
+    peak_rss = _peak_rss_mb()
+    return {
+        'status': result.get('status'),
+        'employees': len(problem['employees']),
+        'positions': len(problem['positions']),
+        'days': len(problem['days']),
+        'build_time': round(sum(value for phase, value in timings.items() if phase not in SOLVE_PHASES), 3),
+        'variables': model.get('variables'),
+        'assignment_variables': model.get('assignment_variables'),
+        'constraints': model.get('constraints'),
+        'first_feasible': round(first_feasible[0], 3) if first_feasible else None,
+        'time_to_optimal': round(solver['wall_time'], 3) if result.get('status') == 'optimal' else None,
+        'objective': solver.get('objective', result.get('stats', {}).get('objective_value')),
+        'bound': solver.get('bound'),
+        'shortage': result.get('shortage_count'),
+        'wall_time': round(wall_time, 3),
+        'peak_rss_mb': peak_rss,
+        'model_rss_mb': round(peak_rss - rss_before, 1) if peak_rss is not None else None,
+        'timings': timings,
+    }
+
+
+def _import_and_run(problem):
+    import cp_sat_optimizer  # noqa: F401 - imported before the memory baseline of the case
+    return run_case(problem)
+
+
+def run_suite(cases, time_limit=DEFAULT_TIME_LIMIT, workers=None, seed=1, on_case=None, settings=None):
+    """Run {name: (fixture, arguments)} cases, each in a fresh process; returns {name: metrics}"""
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for name, (fixture, arguments) in cases.items():
+        problem = build_problem(fixture, arguments, time_limit, workers, seed, settings)
+        # A new process per case keeps the peak RSS of one case from hiding the next one
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                results[name] = executor.submit(_import_and_run, problem).result()
+            except Exception as e:
+                results[name] = {'status': 'error', 'error': str(e)}
+        if on_case:
+            on_case(name, results[name])
+    return results
+
+
+def environment():
+    """Machine and solver the numbers were measured on"""
+    try:
+        from ortools import __version__ as ortools_version
+    except ImportError:
+        ortools_version = None
+    return {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'ortools': ortools_version,
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def _regressed(metric, current, baseline, tolerance):
+    kind, higher_is_better = METRICS[metric]
+    if current is None or baseline is None:
+        # Losing a first solution or an optimality proof is a regression, gaining one is not
+        return kind == 'time_s' and current is None and baseline is not None
+    if kind == 'count':
+        return current > baseline * (1 + tolerance)
+    if kind == 'objective':
+        return current < baseline - abs(baseline) * tolerance
+    noise = {'time_ms': TIME_NOISE_SECONDS * 1000, 'time_s': TIME_NOISE_SECONDS}.get(kind, 0)
+    return current > baseline * (1 + tolerance) and current - baseline > noise
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """[{case, metric, baseline, current, regression}] for every metric of cases in the baseline"""
+    rows = []
+    for name, metrics in results.items():
+        reference = baseline.get('cases', {}).get(name)
+        if reference is None:
+            continue
+        for metric in METRICS:
+            rows.append({
+                'case': name,
+                'metric': metric,
+                'baseline': reference.get(metric),
+                'current': metrics.get(metric),
+                'regression': _regressed(metric, metrics.get(metric), reference.get(metric), tolerance)
+            })
+    return rows
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results, time_limit, workers, seed, settings=None):
+    baseline = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'time_limit': time_limit,
+        'workers': workers,
+        'seed': seed,
+        'settings': settings or {},
+        'cases': {name: {key: value for key, value in metrics.items() if key != 'timings'}
+                  for name, metrics in results.items()},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+
+
+def _format(value):
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.3f}'.rstrip('0').rstrip('.')
+    return str(value)
+
+
+def print_case(name, metrics):
+    if metrics.get('status') == 'error':
+        print(f"{name:<20} error: {metrics['error']}")
+        return
+    print(f"{name:<20} {metrics['status']:<9} emp {metrics['employees']:>4}  vars {metrics['variables']:>7}  "
+          f"cons {metrics['constraints']:>7}  build {_format(metrics['build_time']):>8} ms  "
+          f"first {_format(metrics['first_feasible']):>7} s  optimal {_format(metrics['time_to_optimal']):>7} s  "
+          f"obj {_format(metrics['objective']):>10}  rss {_format(metrics['peak_rss_mb'])} MB")
+
+
+def print_comparison(rows):
+    print(f"\n{'case':<20} {'metric':<16} {'baseline':>12} {'current':>12}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(f"{row['case']:<20} {row['metric']:<16} {_format(row['baseline']):>12} "
+              f"{_format(row['current']):>12}{flag}")
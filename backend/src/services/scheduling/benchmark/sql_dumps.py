@@ -0,0 +1,137 @@
+# backend/src/services/scheduling/benchmark/sql_dumps.py
+"""Optimizer input built from the `SQL Dumps/` JSON exports of a real site.
+
+The exports hold positions, position_shifts, shift_requirements and
+permanent_constraints but no employees, so employees_per_position employees are
+created for every position; employees named by a permanent constraint keep their id
+and get the position of the constrained shift. copies > 1 repeats the site with fresh
+ids, which scales the realistic structure up for sizing runs.
+"""
+import json
+import os
+
+from .generator import DEFAULT_START_DATE, benchmark_settings, horizon_days
+
+DEFAULT_DUMP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..', '..', 'SQL Dumps'))
+
+# First id of the employees created for the fixture, above the ids used in the exports
+SYNTHETIC_EMPLOYEE_ID = 10000
+
+
+def _load(dump_dir, name):
+    with open(os.path.join(dump_dir, f'{name}.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _required_staff(requirements, day):
+    """Requirement lookup of prepareScheduleData(): specific date, weekday, then every day"""
+    for requirement in requirements:
+        if requirement['is_recurring']:
+            if requirement['day_of_week'] == day['weekday']:
+                return requirement['required_staff_count'] or 0
+        elif requirement['specific_date'] and str(requirement['specific_date'])[:10] == day['date']:
+            return requirement['required_staff_count'] or 0
+    for requirement in requirements:
+        if requirement['is_recurring'] and requirement['day_of_week'] is None:
+            return requirement['required_staff_count'] or 0
+    return 0
+
+
+def load_sql_dump_problem(dump_dir=DEFAULT_DUMP_DIR, site_id=None, employees_per_position=10, days=7,
+                          copies=1, start_date=DEFAULT_START_DATE, time_limit=30, workers=None, seed=0):
+    """Optimizer input of the active positions in the exports (of one site when site_id is given)"""
+    positions = [position for position in _load(dump_dir, 'positions')
+                 if position['is_active'] and (site_id is None or position['site_id'] == site_id)]
+    position_ids = {position['pos_id'] for position in positions}
+    position_shifts = [shift for shift in _load(dump_dir, 'position_shifts')
+                       if shift['is_active'] and shift['position_id'] in position_ids]
+    shift_positions = {shift['id']: shift['position_id'] for shift in position_shifts}
+    requirements_by_shift = {}
+    for requirement in _load(dump_dir, 'shift_requirements'):
+        requirements_by_shift.setdefault(requirement['position_shift_id'], []).append(requirement)
+    permanent_constraints = [constraint for constraint in _load(dump_dir, 'permanent_constraints')
+                             if constraint['is_active'] and constraint['constraint_type'] == 'cannot_work'
+                             and constraint['shift_id'] in shift_positions]
+
+    day_list = horizon_days(days, start_date)
+    pos_offset = max(position_ids, default=0)
+    shift_offset = max(shift_positions, default=0)
+    employee_offset = SYNTHETIC_EMPLOYEE_ID + employees_per_position * len(positions)
+
+    position_list, shift_list, employee_list = [], [], []
+    position_shifts_map, shift_requirements = {}, {}
+    constraints = {'cannot_work': [], 'prefer_work': [], 'permanent_cannot_work': [], 'legal_constraints': []}
+    for copy in range(copies):
+        constrained_employees = {}
+        for constraint in permanent_constraints:
+            emp_id = constraint['emp_id'] + copy * employee_offset
+            constrained_employees.setdefault(emp_id, shift_positions[constraint['shift_id']] + copy * pos_offset)
+            for day in day_list:
+                if day['day_name'].lower() == constraint['day_of_week']:
+                    constraints['permanent_cannot_work'].append({
+                        'emp_id': emp_id,
+                        'day_index': day['day_index'],
+                        'shift_id': constraint['shift_id'] + copy * shift_offset,
+                        'constraint_type': 'cannot_work',
+                        'is_permanent': True
+                    })
+        for emp_id, pos_id in constrained_employees.items():
+            employee_list.append({'emp_id': emp_id, 'name': f'Employee {emp_id}',
+                                  'default_position_id': pos_id, 'status': 'active'})
+
+        for position_index, position in enumerate(positions):
+            pos_id = position['pos_id'] + copy * pos_offset
+            own_shifts = [shift for shift in position_shifts if shift['position_id'] == position['pos_id']]
+            position_shifts_map[str(pos_id)] = []
+            total_required = 0
+            for shift in own_shifts:
+                shift_id = shift['id'] + copy * shift_offset
+                hours = float(shift['duration_hours'] or 8)
+                shift_list.append({
+                    'shift_id': shift_id,
+                    'shift_name': shift['shift_name'],
+                    'start_time': shift['start_time'],
+                    'duration': hours,
+                    'duration_minutes': round(hours * 60),
+                    'is_night_shift': bool(shift['is_night_shift']),
+                    'position_id': pos_id
+                })
+                position_shifts_map[str(pos_id)].append(shift_id)
+                for day in day_list:
+                    required = _required_staff(requirements_by_shift.get(shift['id'], []), day)
+                    if required > 0:
+                        total_required += required
+                        shift_requirements[f"{pos_id}-{shift_id}-{day['date']}"] = {
+                            'position_id': pos_id,
+                            'shift_id': shift_id,
+                            'date': day['date'],
+                            'day_index': day['day_index'],
+                            'required_staff': required,
+                            'is_working_day': True
+                        }
+            position_list.append({
+                'pos_id': pos_id,
+                'pos_name': position['pos_name'],
+                'profession': position['profession'],
+                'num_of_emp': position['num_of_emp'] or 1,
+                'total_required': total_required
+            })
+
+            first_id = SYNTHETIC_EMPLOYEE_ID + copy * employee_offset + employees_per_position * position_index
+            for emp_id in range(first_id, first_id + employees_per_position):
+                employee_list.append({'emp_id': emp_id, 'name': f'Employee {emp_id}',
+                                      'default_position_id': pos_id, 'status': 'active'})
+
+    return {
+        'employees': employee_list,
+        'shifts': shift_list,
+        'positions': position_list,
+        'position_shifts_map': position_shifts_map,
+        'days': day_list,
+        'constraints': constraints,
+        'existing_assignments': [],
+        'prior_schedule': [],
+        'carry_over': [],
+        'shift_requirements': shift_requirements,
+        'settings': benchmark_settings(time_limit, workers, seed)
+    }
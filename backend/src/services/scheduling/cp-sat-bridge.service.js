@@ -1,65 +1,340 @@
 // backend/src/services/cp-sat-bridge.service.js
 const {spawn} = require('child_process');
+const os = require('os');
 const path = require('path');
-const fs = require('fs').promises;
+const readline = require('readline');
 const dayjs = require('dayjs');
 const db = require('../../models');
-const {v4: uuidv4} = require('uuid');
 const CONSTRAINTS = require('../../config/scheduling-constraints');
+const cpSatWorkerPool = require('./cp-sat-worker-pool.service');
+const {encodeFrame, FrameReader, toColumnarInput} = require('./optimizer-codec');
 
 class CPSATBridge {
     constructor(database) {
         this.db = database || db;
+        // generationId -> {progress, stop()} for generations that stream progress
+        this.activeGenerations = new Map();
     }
 
+    /**
+     * Generate and save a schedule starting at weekStart.
+     * options.horizonWeeks (1-6) optimizes several consecutive weeks in one model;
+     * every week is saved as its own schedule. options.clearWeek(weekStart) removes the drafts
+     * of a following week; it runs only after the optimizer succeeded, right before saving.
+     */
     async generateOptimalSchedule(siteId, weekStart, transaction = null, options = {}) {
 
         try {
-            console.log(`[CP-SAT Bridge] Starting optimization for site ${siteId}, week ${weekStart}`);
+            const horizonWeeks = this.normalizeHorizonWeeks(options.horizonWeeks);
+            console.log(`[CP-SAT Bridge] Starting optimization for site ${siteId}, week ${weekStart}` +
+                (horizonWeeks > 1 ? ` (${horizonWeeks} weeks)` : ''));
 
-            const data = await this.prepareScheduleData(siteId, weekStart, transaction, options.positionIds);
+            const data = await this.prepareScheduleData(siteId, weekStart, transaction, options.positionIds, horizonWeeks);
 
             // Add optimization settings to data
             data.settings = {
                 ...data.settings,
                 optimizationMode: options.optimizationMode || 'balanced',
                 fairness_weight: options.fairnessWeight || 50,
+                ...(options.searchProfile && {search_profile: options.searchProfile}),
+                // 'heuristic' returns the optimizer's greedy schedule without running CP-SAT
+                ...(options.algorithm && {algorithm: options.algorithm}),
+                // useCache: false forces a new solve of unchanged data
+                ...(options.useCache === false && {result_cache: null}),
+                // coverageReport: true adds per-slot requirement/assigned/shortage rows to the result
+                ...(options.coverageReport && {coverage_report: true}),
             };
 
-            const pythonResult = await this.callPythonOptimizer(data);
+            const pythonResult = await this.callPythonOptimizer(data, {generationId: options.generationId});
 
             if (!pythonResult.success) {
                 return {
                     success: false,
                     error: pythonResult.error,
+                    // Conflicting requirements/constraints of an infeasible request
+                    diagnosis: pythonResult.diagnosis || null,
                     algorithm: 'CP-SAT-Python',
                 };
             }
 
+            if (horizonWeeks > 1) {
+                if (options.clearWeek) {
+                    for (let week = 1; week < horizonWeeks; week++) {
+                        await options.clearWeek(dayjs(weekStart).add(week, 'week').format('YYYY-MM-DD'));
+                    }
+                }
+                const savedSchedules = await this.saveHorizonSchedules(
+                    siteId, weekStart, horizonWeeks, pythonResult.schedule, transaction);
+
+                return {
+                    ...this.buildGenerationResult(pythonResult, savedSchedules[0]),
+                    horizon_weeks: horizonWeeks,
+                    schedules: savedSchedules.map(savedSchedule => ({
+                        schedule_id: savedSchedule.schedule_id,
+                        assignments_count: savedSchedule.assignments_count,
+                        week_start: savedSchedule.week_start,
+                        week_end: savedSchedule.week_end,
+                    })),
+                };
+            }
+
             const savedSchedule = await this.saveSchedule(siteId, weekStart, pythonResult.schedule, transaction);
 
+            return this.buildGenerationResult(pythonResult, savedSchedule);
+
+        } catch (error) {
+            console.error('[CP-SAT Bridge] Error:', error);
+            return {
+                success: false,
+                error: error.message,
+                algorithm: 'CP-SAT-Python',
+            };
+        }
+    }
+
+    normalizeHorizonWeeks(horizonWeeks) {
+        const weeks = parseInt(horizonWeeks, 10) || 1;
+        return Math.min(Math.max(weeks, 1), CONSTRAINTS.SOLVER_SETTINGS.MAX_HORIZON_WEEKS);
+    }
+
+    /**
+     * Shape an optimizer result and its saved schedule for API responses
+     */
+    buildGenerationResult(pythonResult, savedSchedule) {
+        return {
+            success: true,
+            schedule: {
+                schedule_id: savedSchedule.schedule_id,
+                assignments_count: savedSchedule.assignments_count,
+                week_start: savedSchedule.week_start,
+                week_end: savedSchedule.week_end,
+            },
+            stats: {
+                basic: this.calculateScheduleStats(pythonResult.schedule),
+                detailed: savedSchedule.statistics,
+            },
+            algorithm: pythonResult.algorithm === 'heuristic' ? 'Heuristic-Python' : 'CP-SAT-Python',
+            solve_time: pythonResult.solve_time,
+            status: pythonResult.status,
+            warm_start: pythonResult.warm_start,
+            search_profile: pythonResult.search_profile,
+            stopped_early: pythonResult.stopped_early || false,
+            profile: pythonResult.profile,
+            decomposition: pythonResult.decomposition || null,
+            cache: pythonResult.cache || null,
+            coverage_rate: pythonResult.coverage_rate || 100,
+            shortage_count: pythonResult.shortage_count || 0,
+            coverage_report: pythonResult.coverage_report || null,
+            stages: pythonResult.stages || null,
+            issues: savedSchedule.statistics?.issues || [],
+        };
+    }
+
+    /**
+     * Generate schedules for many site/week pairs in one parallel optimizer batch.
+     * Each schedule is saved as soon as its problem finishes.
+     * @param {Array<{siteId, weekStart, options}>} requests
+     * @returns {Promise<Array>} results in request order, same shape as generateOptimalSchedule()
+     */
+    async generateOptimalSchedulesBatch(requests) {
+        const problems = [];
+        const results = new Array(requests.length);
+
+        for (const [index, request] of requests.entries()) {
+            const {siteId, weekStart, options = {}} = request;
+            try {
+                const data = await this.prepareScheduleData(siteId, weekStart, null, options.positionIds);
+                data.settings = {
+                    ...data.settings,
+                    optimizationMode: options.optimizationMode || 'balanced',
+                    fairness_weight: options.fairnessWeight || 50,
+                    ...(options.searchProfile && {search_profile: options.searchProfile}),
+                };
+                problems.push({id: String(index), data, time_limit: data.settings.max_solve_time});
+            } catch (error) {
+                results[index] = {success: false, error: error.message, algorithm: 'CP-SAT-Python'};
+            }
+        }
+
+        if (problems.length === 0) {
+            return results;
+        }
+
+        const saves = [];
+        await this.runPythonBatch(problems, (id, pythonResult, error) => {
+            const {siteId, weekStart} = requests[Number(id)];
+
+            if (error || !pythonResult.success) {
+                results[Number(id)] = {
+                    success: false,
+                    error: error ? error.message : pythonResult.error,
+                    algorithm: 'CP-SAT-Python',
+                };
+                return;
+            }
+
+            saves.push(
+                this.saveSchedule(siteId, weekStart, pythonResult.schedule)
+                    .then(savedSchedule => {
+                        results[Number(id)] = this.buildGenerationResult(pythonResult, savedSchedule);
+                    })
+                    .catch(saveError => {
+                        results[Number(id)] = {success: false, error: saveError.message, algorithm: 'CP-SAT-Python'};
+                    }),
+            );
+        });
+
+        await Promise.all(saves);
+        return results;
+    }
+
+    /**
+     * Incrementally repair an existing schedule after a constraint/requirement change.
+     * Only a neighborhood of the affected employees and days is re-optimized and
+     * the resulting diff is applied to the stored assignments.
+     */
+    async repairSchedule(scheduleId, delta = {}, transaction = null) {
+        const {Schedule, ScheduleAssignment} = this.db;
+
+        try {
+            const schedule = await Schedule.findByPk(scheduleId, {transaction});
+            if (!schedule) {
+                // noinspection ExceptionCaughtLocallyJS
+                throw new Error('Schedule not found');
+            }
+
+            const weekStart = dayjs(schedule.start_date).format('YYYY-MM-DD');
+            console.log(`[CP-SAT Bridge] Repairing schedule ${scheduleId} for site ${schedule.site_id}, week ${weekStart}`);
+
+            const data = await this.prepareScheduleData(schedule.site_id, weekStart, transaction);
+            const currentAssignments = await ScheduleAssignment.findAll({
+                where: {schedule_id: scheduleId},
+                attributes: ['emp_id', 'work_date', 'shift_id', 'position_id'],
+                raw: true,
+                transaction,
+            });
+
+            data.mode = 'incremental';
+            data.delta = delta;
+            data.current_schedule = currentAssignments.map(a => ({
+                emp_id: a.emp_id,
+                date: a.work_date,
+                shift_id: a.shift_id,
+                position_id: a.position_id,
+            }));
+
+            const pythonResult = await this.callPythonOptimizer(data);
+
+            if (!pythonResult.success) {
+                return {
+                    success: false,
+                    error: pythonResult.error,
+                    attempts: pythonResult.attempts,
+                    diagnosis: pythonResult.diagnosis || null,
+                    algorithm: 'CP-SAT-Python',
+                };
+            }
+
+            const {added, removed} = pythonResult.diff;
+
+            for (const assignment of removed) {
+                await ScheduleAssignment.destroy({
+                    where: {
+                        schedule_id: scheduleId,
+                        emp_id: assignment.emp_id,
+                        work_date: assignment.date,
+                        shift_id: assignment.shift_id,
+                        position_id: assignment.position_id,
+                    },
+                    transaction,
+                });
+            }
+
+            if (added.length > 0) {
+                await ScheduleAssignment.bulkCreate(added.map(assignment => ({
+                    schedule_id: scheduleId,
+                    emp_id: assignment.emp_id,
+                    shift_id: assignment.shift_id,
+                    position_id: assignment.position_id,
+                    work_date: assignment.date,
+                    status: 'scheduled',
+                    notes: 'Repaired by CP-SAT optimizer',
+                })), {transaction});
+            }
+
+            console.log(`[CP-SAT Bridge] Repaired schedule ${scheduleId}: +${added.length} / -${removed.length}`);
+
             return {
                 success: true,
-                schedule: {
-                    schedule_id: savedSchedule.schedule_id,
-                    assignments_count: savedSchedule.assignments_count,
-                    week_start: savedSchedule.week_start,
-                    week_end: savedSchedule.week_end,
-                },
-                stats: {
-                    basic: this.calculateScheduleStats(pythonResult.schedule),
-                    detailed: savedSchedule.statistics,
-                },
+                schedule_id: scheduleId,
+                diff: pythonResult.diff,
+                attempts: pythonResult.attempts,
                 algorithm: 'CP-SAT-Python',
                 solve_time: pythonResult.solve_time,
                 status: pythonResult.status,
-                coverage_rate: pythonResult.coverage_rate || 100,
                 shortage_count: pythonResult.shortage_count || 0,
-                issues: savedSchedule.statistics?.issues || [],
             };
 
         } catch (error) {
-            console.error('[CP-SAT Bridge] Error:', error);
+            console.error('[CP-SAT Bridge] Repair error:', error);
+            return {
+                success: false,
+                error: error.message,
+                algorithm: 'CP-SAT-Python',
+            };
+        }
+    }
+
+    /**
+     * What-if sweep over the optimization weights: the optimizer builds the model once and
+     * re-solves it for every weight vector. Nothing is saved.
+     * @param {Array<{name, optimization_weights, fairness_weight}>} scenarios - overrides of the site's weights
+     * @param {Object} options - fairnessWeights (a fairness_weight sweep), scenarioParallel, positionIds, horizonWeeks
+     * @returns {Promise<Object>} {success, comparison, scenarios} with one comparison row and one schedule per scenario
+     */
+    async compareWeightScenarios(siteId, weekStart, scenarios = [], options = {}) {
+        try {
+            const horizonWeeks = this.normalizeHorizonWeeks(options.horizonWeeks);
+            console.log(`[CP-SAT Bridge] Scenario sweep for site ${siteId}, week ${weekStart}`);
+
+            const data = await this.prepareScheduleData(siteId, weekStart, null, options.positionIds, horizonWeeks);
+            data.mode = 'scenarios';
+            data.scenarios = scenarios;
+            data.fairness_weight_sweep = options.fairnessWeights || [];
+            if (options.scenarioParallel) {
+                data.settings.scenario_parallel = options.scenarioParallel;
+            }
+
+            const pythonResult = await this.callPythonOptimizer(data, {generationId: options.generationId});
+
+            if (!pythonResult.success) {
+                return {
+                    success: false,
+                    error: pythonResult.error,
+                    algorithm: 'CP-SAT-Python',
+                };
+            }
+
+            return {
+                success: true,
+                algorithm: 'CP-SAT-Python',
+                solve_time: pythonResult.solve_time,
+                status: pythonResult.status,
+                comparison: pythonResult.comparison,
+                scenarios: pythonResult.scenarios.map(scenario => ({
+                    name: scenario.name,
+                    optimization_weights: scenario.optimization_weights,
+                    fairness_weight: scenario.fairness_weight,
+                    status: scenario.status,
+                    hinted_by: scenario.hinted_by,
+                    stats: scenario.stats || null,
+                    schedule: scenario.schedule || [],
+                })),
+                profile: pythonResult.profile,
+            };
+
+        } catch (error) {
+            console.error('[CP-SAT Bridge] Scenario sweep error:', error);
             return {
                 success: false,
                 error: error.message,
@@ -68,8 +343,9 @@ class CPSATBridge {
         }
     }
 
-    async prepareScheduleData(siteId, weekStart, transaction = null, positionIds = []) {
+    async prepareScheduleData(siteId, weekStart, transaction = null, positionIds = [], horizonWeeks = 1) {
         console.log(`[CP-SAT Bridge] Preparing data for site ${siteId}, week ${weekStart}`);
+        const dayCount = 7 * horizonWeeks;
 
         const {
             Employee,
@@ -187,7 +463,7 @@ class CPSATBridge {
                     positionShiftsMap[position.pos_id].push(posShift.id);
 
                     // Process shift requirements for each day
-                    for (let dayOffset = 0; dayOffset < 7; dayOffset++) {
+                    for (let dayOffset = 0; dayOffset < dayCount; dayOffset++) {
                         const date = new Date(weekStart);
                         date.setDate(date.getDate() + dayOffset);
                         const dayOfWeek = date.getDay();
@@ -272,7 +548,7 @@ class CPSATBridge {
             const days = [];
             const startDate = new Date(weekStart);
 
-            for (let i = 0; i < 7; i++) {
+            for (let i = 0; i < dayCount; i++) {
                 const currentDate = new Date(startDate);
                 currentDate.setDate(startDate.getDate() + i);
 
@@ -280,6 +556,7 @@ class CPSATBridge {
                     date: currentDate.toISOString().split('T')[0],
                     day_name: currentDate.toLocaleDateString('en-US', {weekday: 'long'}),
                     day_index: i,
+                    week_index: Math.floor(i / 7),
                     weekday: currentDate.getDay(),
                 });
             }
@@ -291,8 +568,12 @@ class CPSATBridge {
                 employees.map(e => e.emp_id),
                 weekStart,
                 transaction,
+                dayCount,
             );
 
+            const priorSchedule = await this.getPriorSchedule(siteId, weekStart, transaction);
+            const carryOver = await this.getCarryOver(siteId, weekStart, transaction);
+
             // Get system settings
             const systemSettingsData = await SystemSettings.findAll({transaction});
             const systemSettings = {};
@@ -316,8 +597,16 @@ class CPSATBridge {
                 systemSettings[setting.setting_key] = value;
             });
 
+            // Workload of earlier weeks, only read by the target fairness models
+            const fairnessModel = systemSettings.fairnessModel || 'spread';
+            const historyWeeks = systemSettings.fairnessHistoryWeeks || 0;
+            const workloadHistory = historyWeeks > 0 && fairnessModel !== 'spread'
+                ? await this.getWorkloadHistory(siteId, weekStart, historyWeeks, transaction)
+                : [];
+
             const settings = {
                 week_start: weekStart,
+                horizon_weeks: horizonWeeks,
                 site_id: siteId,
                 hard_constraints: CONSTRAINTS.HARD_CONSTRAINTS,
                 soft_constraints: CONSTRAINTS.SOFT_CONSTRAINTS,
@@ -330,6 +619,28 @@ class CPSATBridge {
                 enable_overtime: CONSTRAINTS.SOLVER_SETTINGS.enable_overtime,
                 enable_weekend_work: CONSTRAINTS.SOLVER_SETTINGS.enable_weekend_work,
                 strict_rest_requirements: systemSettings.strictLegalCompliance !== false,
+                // CP-SAT search parameters (unset values fall back to the search profile)
+                search_profile: systemSettings.searchProfile,
+                num_search_workers: systemSettings.solverSearchWorkers,
+                relative_gap_limit: systemSettings.solverRelativeGapLimit,
+                absolute_gap_limit: systemSettings.solverAbsoluteGapLimit,
+                random_seed: systemSettings.solverRandomSeed,
+                // Optimizer output: 'off' | 'summary' | 'verbose'
+                log_level: systemSettings.optimizerLogLevel || 'summary',
+                // Independent positions solved as separate models: 'auto' | 'always' | 'never'
+                decomposition: systemSettings.optimizerDecomposition || 'auto',
+                // Workload fairness: 'spread' | 'target' | 'piecewise' (see FAIRNESS_MODELS)
+                fairness_model: fairnessModel,
+                // Ordering of interchangeable employees: 'off' | 'workload' | 'lex'
+                symmetry_breaking: systemSettings.optimizerSymmetryBreaking || 'off',
+                // Explanation of infeasible requests: 'auto' | 'assumptions' | 'off'
+                infeasibility_diagnosis: systemSettings.optimizerInfeasibilityDiagnosis || 'auto',
+                // Objective: 'weighted' sum or 'lexicographic' stages (shortage, stability, preferences, fairness)
+                objective_mode: systemSettings.optimizerObjectiveMode || 'weighted',
+                heuristic_hints: CONSTRAINTS.SOLVER_SETTINGS.HEURISTIC_HINTS,
+                lean_build: CONSTRAINTS.SOLVER_SETTINGS.LEAN_BUILD,
+                memory_limit_mb: CONSTRAINTS.SOLVER_SETTINGS.MEMORY_LIMIT_MB,
+                result_cache: this.getResultCacheSettings(),
             };
 
             const preparedData = {
@@ -340,6 +651,9 @@ class CPSATBridge {
                 days: days,
                 constraints: constraintsData,
                 existing_assignments: existingAssignments,
+                prior_schedule: priorSchedule,
+                carry_over: carryOver,
+                workload_history: workloadHistory,
                 shift_requirements: shiftRequirementsMap,
                 settings: settings,
             };
@@ -393,11 +707,12 @@ class CPSATBridge {
                             constraintDays.push(dayIndex);
                         }
                     } else if (constraint.day_of_week !== null) {
-                        // day_of_week is 0-6 (Sunday-Saturday)
-                        const dayIndex = days.findIndex(d => d.weekday === constraint.day_of_week);
-                        if (dayIndex !== -1) {
-                            constraintDays.push(dayIndex);
-                        }
+                        // day_of_week is 0-6 (Sunday-Saturday), recurring in every week of the horizon
+                        days.forEach((day, index) => {
+                            if (day.weekday === constraint.day_of_week) {
+                                constraintDays.push(index);
+                            }
+                        });
                     }
 
                     for (const dayIndex of constraintDays) {
@@ -485,12 +800,12 @@ class CPSATBridge {
     }
 
     /**
-     * Get existing assignments for the week
+     * Get existing assignments for the week (or the dayCount days of a multi-week horizon)
      */
-    async getExistingAssignments(employeeIds, weekStart, transaction = null) {
+    async getExistingAssignments(employeeIds, weekStart, transaction = null, dayCount = 7) {
         const {ScheduleAssignment, PositionShift, Position} = this.db;
 
-        const weekEnd = dayjs(weekStart).add(6, 'days').format('YYYY-MM-DD');
+        const weekEnd = dayjs(weekStart).add(dayCount - 1, 'days').format('YYYY-MM-DD');
 
         const assignments = await ScheduleAssignment.findAll({
             where: {
@@ -522,128 +837,443 @@ class CPSATBridge {
     }
 
     /**
-     * Call Python optimizer
+     * Get the latest schedule of the site up to this week, used as a solver warm start.
+     * The optimizer maps entries from an earlier week onto the same weekdays.
      */
-    async callPythonOptimizer(data) {
-        return new Promise(async (resolve, reject) => {
-            try {
-                // Use backend/temp directory, not src/temp
-                const tempDir = path.join(__dirname, '..', '..', 'temp');
-                await fs.mkdir(tempDir, {recursive: true});
+    async getPriorSchedule(siteId, weekStart, transaction = null) {
+        const {Schedule, ScheduleAssignment} = this.db;
 
-                const tempFileName = `schedule_data_${uuidv4()}.json`;
-                const tempFilePath = path.join(tempDir, tempFileName);
-                const resultFilePath = tempFilePath.replace('.json', '_result.json');
+        const latestSchedule = await Schedule.findOne({
+            where: {
+                site_id: siteId,
+                start_date: {
+                    [db.Sequelize.Op.lte]: weekStart,
+                },
+            },
+            order: [['start_date', 'DESC'], ['id', 'DESC']],
+            transaction,
+        });
 
-                console.log(`[CP-SAT Bridge] Temp directory: ${tempDir}`);
-                console.log(`[CP-SAT Bridge] Temp file: ${tempFilePath}`);
+        if (!latestSchedule) {
+            return [];
+        }
 
-                // Write data to file
-                await fs.writeFile(tempFilePath, JSON.stringify(data, null, 2), 'utf8');
+        const assignments = await ScheduleAssignment.findAll({
+            where: {schedule_id: latestSchedule.id},
+            attributes: ['emp_id', 'work_date', 'shift_id', 'position_id'],
+            raw: true,
+            transaction,
+        });
 
-                // Verify file exists
-                try {
-                    await fs.access(tempFilePath);
-                    console.log(`[CP-SAT Bridge] File created successfully`);
-                } catch (err) {
-                    // noinspection ExceptionCaughtLocallyJS
-                    throw new Error(`Failed to create temp file: ${err.message}`);
-                }
+        console.log(`[CP-SAT Bridge] Warm start from schedule ${latestSchedule.id} with ${assignments.length} assignments`);
 
-                // Path to Python script
-                const pythonScriptPath = path.join(__dirname, 'cp_sat_optimizer.py');
+        return assignments.map(a => ({
+            emp_id: a.emp_id,
+            date: a.work_date,
+            shift_id: a.shift_id,
+            position_id: a.position_id,
+        }));
+    }
 
-                // Spawn Python process
-                const pythonProcess = spawn('python', [pythonScriptPath, tempFilePath]);
+    /**
+     * Boundary carry-over from the last published schedule before weekStart, per employee:
+     * worked days in a row up to weekStart and the end of the last shift in minutes
+     * relative to weekStart, so rest and consecutive-day rules hold across the boundary.
+     */
+    async getCarryOver(siteId, weekStart, transaction = null) {
+        const {Schedule, ScheduleAssignment, PositionShift} = this.db;
 
-                let outputData = '';
-                let errorData = '';
-                let processCompleted = false;
+        const previousSchedule = await Schedule.findOne({
+            where: {
+                site_id: siteId,
+                status: 'published',
+                start_date: {
+                    [db.Sequelize.Op.lt]: weekStart,
+                },
+            },
+            order: [['start_date', 'DESC'], ['id', 'DESC']],
+            transaction,
+        });
 
-                pythonProcess.stdout.on('data', (data) => {
-                    const chunk = data.toString();
-                    console.log('[Python stdout]:', chunk);
-                    outputData += chunk;
-                });
+        if (!previousSchedule) {
+            return [];
+        }
 
-                pythonProcess.stderr.on('data', (data) => {
-                    const chunk = data.toString();
-                    console.error('[Python stderr]:', chunk);
-                    errorData += chunk;
-                });
+        const assignments = await ScheduleAssignment.findAll({
+            where: {schedule_id: previousSchedule.id},
+            include: [{
+                model: PositionShift,
+                as: 'shift',
+                attributes: ['id', 'start_time', 'end_time'],
+            }],
+            transaction,
+        });
 
-                pythonProcess.on('error', (error) => {
-                    console.error('[Python process error]:', error);
-                    if (!processCompleted) {
-                        processCompleted = true;
-                        reject(new Error(`Failed to start Python process: ${error.message}`));
-                    }
-                });
+        const horizonStart = dayjs(weekStart);
+        const byEmployee = new Map();
+        for (const assignment of assignments) {
+            const dayOffset = dayjs(assignment.work_date).diff(horizonStart, 'day');
+            if (dayOffset >= 0 || !assignment.shift) {
+                continue;
+            }
 
-                pythonProcess.on('close', async (code) => {
-                    if (processCompleted) return;
-                    processCompleted = true;
+            const [hours, minutes] = assignment.shift.start_time.split(':').map(Number);
+            const shiftEnd = dayOffset * 24 * 60 + hours * 60 + minutes +
+                Math.round(assignment.shift.duration_hours * 60);
 
-                    console.log(`[Python process] Exit code: ${code}`);
+            const entry = byEmployee.get(assignment.emp_id) ||
+                {workedDays: new Set(), lastShiftEnd: null, lastShiftIsNight: false};
+            entry.workedDays.add(dayOffset);
+            if (entry.lastShiftEnd === null || shiftEnd > entry.lastShiftEnd) {
+                entry.lastShiftEnd = shiftEnd;
+                entry.lastShiftIsNight = Boolean(assignment.shift.is_night_shift);
+            }
+            byEmployee.set(assignment.emp_id, entry);
+        }
 
-                    try {
-                        if (code !== 0) {
-                            // noinspection ExceptionCaughtLocallyJS
-                            throw new Error(`Python process exited with code ${code}: ${errorData}`);
-                        }
+        const carryOver = [...byEmployee.entries()].map(([empId, entry]) => {
+            let trailingWorkDays = 0;
+            while (entry.workedDays.has(-(trailingWorkDays + 1))) {
+                trailingWorkDays++;
+            }
 
-                        // Find JSON in Python output
-                        const jsonMatch = outputData.match(/\{[^{}]*"success"[^{}]*\}/);
-                        if (!jsonMatch) {
-                            // noinspection ExceptionCaughtLocallyJS
-                            throw new Error('No JSON found in Python output');
-                        }
+            return {
+                emp_id: empId,
+                trailing_work_days: trailingWorkDays,
+                last_shift_end: entry.lastShiftEnd,
+                last_shift_is_night: entry.lastShiftIsNight,
+            };
+        });
 
-                        const statusResult = JSON.parse(jsonMatch[0]);
-                        console.log('[CP-SAT Bridge] Status result:', statusResult);
+        console.log(`[CP-SAT Bridge] Carry-over from published schedule ${previousSchedule.id} for ${carryOver.length} employees`);
+        return carryOver;
+    }
 
-                        if (statusResult.success && statusResult.result_file) {
-                            // Read the actual result from file
-                            try {
-                                const resultData = await fs.readFile(resultFilePath, 'utf8');
-                                const result = JSON.parse(resultData);
+    /**
+     * Minutes worked per employee in the published schedules of the `weeks` weeks before
+     * weekStart, used by the target fairness models to even out workload across weeks.
+     */
+    async getWorkloadHistory(siteId, weekStart, weeks, transaction = null) {
+        const {Schedule, ScheduleAssignment, PositionShift} = this.db;
 
-                                console.log(`[CP-SAT Bridge] Successfully read result with ${result.schedule?.length || 0} assignments`);
+        const assignments = await ScheduleAssignment.findAll({
+            where: {
+                work_date: {
+                    [db.Sequelize.Op.between]: [
+                        dayjs(weekStart).subtract(weeks * 7, 'days').format('YYYY-MM-DD'),
+                        dayjs(weekStart).subtract(1, 'days').format('YYYY-MM-DD'),
+                    ],
+                },
+            },
+            include: [
+                {
+                    model: Schedule,
+                    as: 'schedule',
+                    attributes: [],
+                    where: {site_id: siteId, status: 'published'},
+                },
+                {
+                    model: PositionShift,
+                    as: 'shift',
+                    // duration_hours is a virtual getter over start_time/end_time
+                    attributes: ['id', 'start_time', 'end_time'],
+                },
+            ],
+            transaction,
+        });
 
-                                resolve(result);
-                            } catch (fileError) {
-                                console.error('[CP-SAT Bridge] Error reading result file:', fileError);
-                                // noinspection ExceptionCaughtLocallyJS
-                                throw new Error(`Could not read result file: ${fileError.message}`);
-                            }
-                        } else {
-                            // noinspection ExceptionCaughtLocallyJS
-                            throw new Error('Python optimizer reported failure');
-                        }
-                    } catch (error) {
-                        console.error('[CP-SAT Bridge] Error processing result:', error);
-                        reject(error);
-                    } finally {
-                        // Clean up temp files
-                        try {
-                            await fs.unlink(tempFilePath).catch(() => {
-                            });
-                            await fs.unlink(resultFilePath).catch(() => {
-                            });
-                        } catch (err) {
-                            console.error('Error cleaning temp files:', err);
-                        }
-                    }
-                });
+        const workedMinutes = new Map();
+        for (const assignment of assignments) {
+            const minutes = Math.round((parseFloat(assignment.shift?.duration_hours) || 8) * 60);
+            workedMinutes.set(assignment.emp_id, (workedMinutes.get(assignment.emp_id) || 0) + minutes);
+        }
+
+        console.log(`[CP-SAT Bridge] Workload history of ${weeks} week(s) for ${workedMinutes.size} employees`);
+        return [...workedMinutes.entries()].map(([empId, minutes]) => ({
+            emp_id: empId,
+            worked_minutes: minutes,
+        }));
+    }
+
+    /**
+     * Call Python optimizer.
+     * Uses the persistent worker pool when enabled, falls back to a one-shot process.
+     * With options.generationId the run streams its progress (see getGenerationProgress)
+     * and can be stopped early with stopGeneration().
+     */
+    async callPythonOptimizer(data, options = {}) {
+        const {generationId} = options;
+        const runOptions = {};
+
+        if (generationId) {
+            const generation = {progress: null, solutions: 0, stop: () => {}, stopRequested: false};
+            this.activeGenerations.set(generationId, generation);
+            runOptions.requestId = generationId;
+            runOptions.onProgress = (progress) => {
+                generation.progress = progress;
+                generation.solutions++;
+            };
+            runOptions.onStart = (stop) => {
+                generation.stop = stop;
+                if (generation.stopRequested) {
+                    stop();
+                }
+            };
+        }
+
+        try {
+            if (CONSTRAINTS.SOLVER_SETTINGS.WORKER_POOL_ENABLED) {
+                try {
+                    runOptions.onStart?.(() => cpSatWorkerPool.stopRequest(generationId));
+                    return await cpSatWorkerPool.solve(this.toOptimizerInput(data), runOptions);
+                } catch (error) {
+                    console.warn(`[CP-SAT Bridge] Worker pool failed, using one-shot process: ${error.message}`);
+                }
+            }
+
+            return await this.runPythonProcess(data, runOptions);
+        } finally {
+            if (generationId) {
+                this.activeGenerations.delete(generationId);
+            }
+        }
+    }
 
+    /**
+     * settings.result_cache for the optimizer, null when the result cache is disabled
+     */
+    getResultCacheSettings() {
+        const settings = CONSTRAINTS.SOLVER_SETTINGS;
+        if (!settings.RESULT_CACHE_ENABLED) {
+            return null;
+        }
+
+        return {
+            dir: settings.RESULT_CACHE_DIR || path.join(os.tmpdir(), 'cp-sat-result-cache'),
+            max_bytes: settings.RESULT_CACHE_MAX_MB * 1024 * 1024,
+            max_age: settings.RESULT_CACHE_MAX_AGE_HOURS * 3600,
+        };
+    }
+
+    /**
+     * Look prepared data up in the optimizer result cache without solving.
+     * Resolves with {hit, fingerprint, status, age, result}; result is the cached
+     * optimizer result when hit is true.
+     */
+    async lookupCachedResult(data) {
+        if (CONSTRAINTS.SOLVER_SETTINGS.WORKER_POOL_ENABLED) {
+            try {
+                return await cpSatWorkerPool.lookupCache(this.toOptimizerInput(data));
             } catch (error) {
-                console.error('[CP-SAT Bridge] Setup error:', error);
+                console.warn(`[CP-SAT Bridge] Worker pool cache lookup failed, using one-shot process: ${error.message}`);
+            }
+        }
+
+        return this.runPythonProcess(data, {cacheLookup: true});
+    }
+
+    /**
+     * Optimizer payload for prepared data: the columnar input unless CP_SAT_COLUMNAR_INPUT=false
+     * @param {boolean} typedArrays - Int32Array columns, for the 'pack' frame format
+     */
+    toOptimizerInput(data, typedArrays = false) {
+        if (!CONSTRAINTS.SOLVER_SETTINGS.COLUMNAR_INPUT) {
+            return data;
+        }
+        return toColumnarInput(data, typedArrays);
+    }
+
+    /**
+     * Latest improving solution of a running generation, or null when it is not running
+     */
+    getGenerationProgress(generationId) {
+        const generation = this.activeGenerations.get(generationId);
+        if (!generation) {
+            return null;
+        }
+
+        return {
+            generation_id: generationId,
+            solutions: generation.solutions,
+            progress: generation.progress,
+            stop_requested: generation.stopRequested,
+        };
+    }
+
+    /**
+     * Stop a running generation; it completes with the best schedule found so far
+     */
+    stopGeneration(generationId) {
+        const generation = this.activeGenerations.get(generationId);
+        if (!generation) {
+            return false;
+        }
+
+        generation.stopRequested = true;
+        generation.stop();
+        return true;
+    }
+
+    /**
+     * Run cp_sat_optimizer.py once, passing the input as a frame on stdin and
+     * reading progress and result frames back from stdout (no temp files).
+     * @param {Object} options - {onProgress, onStart(stop)} to stream progress and stop early
+     */
+    runPythonProcess(data, options = {}) {
+        return new Promise((resolve, reject) => {
+            const format = CONSTRAINTS.SOLVER_SETTINGS.IO_FORMAT;
+            const pythonScriptPath = path.join(__dirname, 'cp_sat_optimizer.py');
+            const args = [pythonScriptPath, '-', '--format', format];
+            if (options.onProgress) {
+                args.push('--progress');
+            }
+            if (options.cacheLookup) {
+                args.push('--cache-lookup');
+            }
+
+            const pythonProcess = spawn('python', args);
+            let result = null;
+            let errorData = '';
+            let processCompleted = false;
+
+            const fail = (error) => {
+                if (processCompleted) return;
+                processCompleted = true;
+                console.error('[CP-SAT Bridge] Optimizer process failed:', error.message);
+                pythonProcess.kill();
                 reject(error);
+            };
+
+            const frames = new FrameReader((message) => {
+                if (message.event === 'progress') {
+                    options.onProgress?.(message);
+                } else if (message.event === 'result') {
+                    result = message.result;
+                }
+            });
+
+            pythonProcess.stdout.on('data', (chunk) => {
+                try {
+                    frames.push(chunk);
+                } catch (error) {
+                    fail(error);
+                }
+            });
+
+            pythonProcess.stderr.on('data', (data) => {
+                const chunk = data.toString();
+                console.error('[Python stderr]:', chunk);
+                errorData += chunk;
+            });
+
+            pythonProcess.on('error', (error) => {
+                fail(new Error(`Failed to start Python process: ${error.message}`));
+            });
+
+            pythonProcess.on('close', (code) => {
+                if (processCompleted) return;
+                processCompleted = true;
+
+                console.log(`[Python process] Exit code: ${code}`);
+                if (code !== 0) {
+                    reject(new Error(`Python process exited with code ${code}: ${errorData}`));
+                } else if (!result) {
+                    reject(new Error('Python optimizer returned no result'));
+                } else {
+                    console.log(`[CP-SAT Bridge] Received result with ${result.schedule?.length || 0} assignments`);
+                    resolve(result);
+                }
+            });
+
+            // stdin stays open while progress is streamed, it carries the stop command
+            pythonProcess.stdin.on('error', () => {
+            });
+            pythonProcess.stdin.write(encodeFrame(this.toOptimizerInput(data, format === 'pack'), format));
+            if (options.onProgress) {
+                options.onStart?.(() => pythonProcess.stdin.write('stop\n'));
+            } else {
+                pythonProcess.stdin.end();
             }
         });
     }
 
-    // backend/src/services/cp-sat-bridge.service.js
+    /**
+     * Run cp_sat_optimizer.py --batch over many problems, sent as one frame on stdin.
+     * onResult(id, result, error) is called for every problem as soon as it finishes.
+     */
+    runPythonBatch(problems, onResult) {
+        const pythonScriptPath = path.join(__dirname, 'cp_sat_optimizer.py');
+        const args = [pythonScriptPath, '--batch', '-'];
+        if (CONSTRAINTS.SOLVER_SETTINGS.BATCH_WORKERS) {
+            args.push('--workers', String(CONSTRAINTS.SOLVER_SETTINGS.BATCH_WORKERS));
+        }
+
+        return new Promise((resolve, reject) => {
+            const pythonProcess = spawn('python', args);
+            const pending = new Set(problems.map(problem => problem.id));
+
+            const lines = readline.createInterface({input: pythonProcess.stdout});
+            lines.on('line', (line) => {
+                let message;
+                try {
+                    message = JSON.parse(line);
+                } catch (error) {
+                    return;
+                }
+                if (!pending.has(message.id)) {
+                    return;
+                }
+
+                pending.delete(message.id);
+                if (message.success) {
+                    onResult(message.id, message.result, null);
+                } else {
+                    onResult(message.id, null, new Error(message.error));
+                }
+            });
+
+            pythonProcess.stderr.on('data', (data) => {
+                console.error('[Python stderr]:', data.toString());
+            });
+
+            pythonProcess.on('error', reject);
+
+            pythonProcess.on('close', (code) => {
+                for (const id of pending) {
+                    onResult(id, null, new Error(`Batch optimizer exited with code ${code}`));
+                }
+                console.log(`[CP-SAT Bridge] Batch of ${problems.length} problems finished with code ${code}`);
+                resolve();
+            });
+
+            pythonProcess.stdin.on('error', () => {
+            });
+            const format = CONSTRAINTS.SOLVER_SETTINGS.IO_FORMAT;
+            const batch = problems.map(problem => ({
+                ...problem,
+                data: this.toOptimizerInput(problem.data, format === 'pack'),
+            }));
+            pythonProcess.stdin.end(encodeFrame({problems: batch}, format));
+        });
+    }
+
+    /**
+     * Save a multi-week optimizer schedule as one schedule per calendar week
+     */
+    async saveHorizonSchedules(siteId, weekStart, horizonWeeks, scheduleData, transaction = null) {
+        const savedSchedules = [];
+
+        for (let week = 0; week < horizonWeeks; week++) {
+            const currentWeekStart = dayjs(weekStart).add(week, 'week').format('YYYY-MM-DD');
+            const currentWeekEnd = dayjs(currentWeekStart).add(6, 'days').format('YYYY-MM-DD');
+            const weekAssignments = scheduleData.filter(assignment =>
+                assignment.date >= currentWeekStart && assignment.date <= currentWeekEnd);
+
+            savedSchedules.push(await this.saveSchedule(siteId, currentWeekStart, weekAssignments, transaction));
+        }
+
+        return savedSchedules;
+    }
 
     /**
      * Save schedule to database
@@ -980,3 +1610,4 @@ class CPSATBridge {
 
 const cpSatBridge = new CPSATBridge(db);
 module.exports = cpSatBridge;
+module.exports.CPSATBridge = CPSATBridge;
@@ -0,0 +1,100 @@
+// backend/src/services/scheduling/cp-sat-bridge.service.test.js
+// Data preparation tests for the CP-SAT bridge with an in-memory model layer (run: node --test)
+const {describe, test} = require('node:test');
+const assert = require('node:assert/strict');
+const {Op} = require('sequelize');
+
+// Keep the bridge off the real database: it only needs the models it is given
+require.cache[require.resolve('../../models')] = {
+    id: require.resolve('../../models'),
+    loaded: true,
+    exports: {Sequelize: {Op}},
+};
+const {CPSATBridge} = require('./cp-sat-bridge.service');
+
+// Field definitions of a model file; column types are not needed here
+const modelFields = (definePath) => {
+    let fields;
+    const DataTypes = new Proxy(() => DataTypes, {get: () => DataTypes});
+    require(definePath)({
+        define: (name, definition) => {
+            fields = definition;
+            return function Model() {};
+        },
+    }, DataTypes);
+    return fields;
+};
+
+// A fetched instance as Sequelize builds it: the selected columns plus the virtual getters
+const instance = (fields, attributes, row) => {
+    const result = {};
+    for (const [name, field] of Object.entries(fields)) {
+        if (typeof field.get === 'function') {
+            Object.defineProperty(result, name, {get: field.get.bind(result), enumerable: true});
+        } else if (attributes.includes(name)) {
+            result[name] = row[name];
+        }
+    }
+    return result;
+};
+
+const positionShiftFields = modelFields('../../models/workplace/position-shift.model');
+
+const fakeDb = (assignments) => ({
+    Schedule: {},
+    PositionShift: {},
+    ScheduleAssignment: {
+        findAll: async ({include}) => {
+            const shiftInclude = include.find(entry => entry.as === 'shift');
+            return assignments.map(assignment => ({
+                ...assignment,
+                shift: instance(positionShiftFields, shiftInclude.attributes, assignment.shift),
+            }));
+        },
+    },
+});
+
+describe('getWorkloadHistory', () => {
+    test('counts the real shift length', async () => {
+        const bridge = new CPSATBridge(fakeDb([
+            {emp_id: 1, work_date: '2026-01-01', shift: {id: 1, start_time: '08:00:00', end_time: '20:00:00'}},
+            {emp_id: 2, work_date: '2026-01-01', shift: {id: 2, start_time: '08:00:00', end_time: '12:00:00'}},
+            {emp_id: 2, work_date: '2026-01-02', shift: {id: 3, start_time: '22:00:00', end_time: '06:00:00'}},
+        ]));
+
+        const history = await bridge.getWorkloadHistory(1, '2026-01-05', 1);
+
+        assert.deepEqual(history, [
+            {emp_id: 1, worked_minutes: 12 * 60},
+            {emp_id: 2, worked_minutes: 4 * 60 + 8 * 60},
+        ]);
+    });
+});
+
+describe('processConstraints', () => {
+    const names = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday'];
+    // Two weeks starting on Sunday 2026-01-04
+    const days = Array.from({length: 14}, (_, index) => ({
+        date: `2026-01-${String(4 + index).padStart(2, '0')}`,
+        weekday: index % 7,
+        day_name: names[index % 7],
+    }));
+
+    test('recurring weekday constraints apply in every week of the horizon', async () => {
+        const bridge = new CPSATBridge(fakeDb([]));
+        const employees = [{
+            emp_id: 1,
+            constraints: [
+                {constraint_type: 'cannot_work', day_of_week: 2, target_date: null, shift_id: null},
+                {constraint_type: 'prefer_work', day_of_week: null, target_date: '2026-01-08', shift_id: null},
+            ],
+            permanentConstraints: [{constraint_type: 'cannot_work', day_of_week: 'friday', shift_id: null}],
+        }];
+
+        const constraints = await bridge.processConstraints(employees, days, [], []);
+
+        assert.deepEqual(constraints.cannot_work.map(entry => entry.day_index), [2, 9]);
+        assert.deepEqual(constraints.prefer_work.map(entry => entry.day_index), [4]);
+        assert.deepEqual(constraints.permanent_cannot_work.map(entry => entry.day_index), [5, 12]);
+    });
+});
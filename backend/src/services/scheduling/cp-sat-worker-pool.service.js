@@ -0,0 +1,224 @@
+// backend/src/services/scheduling/cp-sat-worker-pool.service.js
+const {spawn} = require('child_process');
+const path = require('path');
+const readline = require('readline');
+const {v4: uuidv4} = require('uuid');
+const CONSTRAINTS = require('../../config/scheduling-constraints');
+
+const RESTART_DELAY_MS = 1000;
+const TIMEOUT_GRACE_MS = 30000;
+
+/**
+ * Long-lived cp_sat_optimizer.py server (--serve mode).
+ * Keeps pre-warmed Python workers alive between generations and
+ * multiplexes requests over stdin/stdout with line-delimited JSON.
+ */
+class CPSATWorkerPool {
+    constructor(options = {}) {
+        this.scriptPath = options.scriptPath || path.join(__dirname, 'cp_sat_optimizer.py');
+        this.workers = options.workers || CONSTRAINTS.SOLVER_SETTINGS.WORKER_POOL_SIZE || 1;
+        this.process = null;
+        this.ready = null;
+        this.pending = new Map();
+        // requestId -> stop requested, for requests waiting for the server to start
+        this.starting = new Map();
+        this.stopped = false;
+    }
+
+    /**
+     * Start the Python server if it is not running yet.
+     * Resolves once the server reports it is ready.
+     */
+    start() {
+        if (this.ready) {
+            return this.ready;
+        }
+
+        this.stopped = false;
+        this.ready = new Promise((resolve, reject) => {
+            const pythonProcess = spawn('python', [
+                this.scriptPath,
+                '--serve',
+                '--workers',
+                String(this.workers),
+            ]);
+            this.process = pythonProcess;
+
+            const lines = readline.createInterface({input: pythonProcess.stdout});
+            lines.on('line', (line) => {
+                let message;
+                try {
+                    message = JSON.parse(line);
+                } catch (error) {
+                    console.warn('[CP-SAT Pool] Ignoring non-JSON output:', line);
+                    return;
+                }
+
+                if (message.event === 'ready') {
+                    console.log(`[CP-SAT Pool] Server ready with ${message.workers} workers`);
+                    resolve();
+                    return;
+                }
+
+                this.handleResponse(message);
+            });
+
+            pythonProcess.stderr.on('data', (data) => {
+                console.error('[Python stderr]:', data.toString());
+            });
+
+            pythonProcess.on('error', (error) => {
+                console.error('[CP-SAT Pool] Failed to start Python server:', error);
+                this.ready = null;
+                reject(error);
+            });
+
+            pythonProcess.on('exit', (code) => {
+                console.warn(`[CP-SAT Pool] Python server exited with code ${code}`);
+                this.process = null;
+                this.ready = null;
+                reject(new Error(`Python server exited with code ${code}`));
+
+                this.rejectPending(new Error(`Optimizer server exited with code ${code}`));
+
+                if (!this.stopped) {
+                    setTimeout(() => {
+                        this.start().catch((error) => {
+                            console.error('[CP-SAT Pool] Restart failed:', error.message);
+                        });
+                    }, RESTART_DELAY_MS);
+                }
+            });
+        });
+
+        return this.ready;
+    }
+
+    /**
+     * Solve one problem on the pool.
+     * @param {Object} data - optimizer input (same shape as the CLI JSON file)
+     * @param {Object} options - {timeLimit} in seconds, defaults to settings.max_solve_time;
+     *   {requestId} to stop the request later; {onProgress} to receive every improving solution
+     */
+    async solve(data, options = {}) {
+        const id = options.requestId || uuidv4();
+        let stopRequested;
+        this.starting.set(id, false);
+        try {
+            await this.start();
+        } finally {
+            stopRequested = this.starting.get(id);
+            this.starting.delete(id);
+        }
+
+        const timeLimit = options.timeLimit || data.settings?.max_solve_time || 120;
+
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error(`Optimizer request ${id} timed out after ${timeLimit}s`));
+                // A stuck worker blocks the pool, restart the server
+                this.restart();
+            }, timeLimit * 1000 + TIMEOUT_GRACE_MS);
+
+            this.pending.set(id, {resolve, reject, timer, onProgress: options.onProgress});
+
+            const request = JSON.stringify({
+                id,
+                data,
+                time_limit: timeLimit,
+                progress: Boolean(options.onProgress),
+            });
+            this.process.stdin.write(`${request}\n`);
+            // A stop that arrived while the server was starting
+            if (stopRequested) {
+                this.stopRequest(id);
+            }
+        });
+    }
+
+    /**
+     * Look a problem up in the optimizer result cache (settings.result_cache) without solving
+     */
+    async lookupCache(data) {
+        await this.start();
+
+        const id = uuidv4();
+        return new Promise((resolve, reject) => {
+            const timer = setTimeout(() => {
+                this.pending.delete(id);
+                reject(new Error(`Cache lookup ${id} timed out`));
+            }, TIMEOUT_GRACE_MS);
+
+            this.pending.set(id, {resolve, reject, timer});
+            this.process.stdin.write(`${JSON.stringify({id, command: 'cache_lookup', data})}\n`);
+        });
+    }
+
+    handleResponse(message) {
+        const entry = this.pending.get(message.id);
+        if (!entry) {
+            if (message.error) {
+                console.error('[CP-SAT Pool] Server error:', message.error);
+            }
+            return;
+        }
+
+        if (message.event === 'progress') {
+            if (entry.onProgress) {
+                entry.onProgress(message);
+            }
+            return;
+        }
+
+        this.pending.delete(message.id);
+        clearTimeout(entry.timer);
+
+        if (message.success) {
+            entry.resolve(message.result);
+        } else {
+            entry.reject(new Error(message.error || 'Optimizer request failed'));
+        }
+    }
+
+    /**
+     * Ask the server to stop a running request; it resolves with the best solution so far
+     */
+    stopRequest(requestId) {
+        if (this.starting.has(requestId)) {
+            this.starting.set(requestId, true);
+            return;
+        }
+        if (this.process && this.pending.has(requestId)) {
+            this.process.stdin.write(`${JSON.stringify({id: requestId, command: 'stop'})}\n`);
+        }
+    }
+
+    rejectPending(error) {
+        for (const [id, entry] of this.pending) {
+            clearTimeout(entry.timer);
+            entry.reject(error);
+            this.pending.delete(id);
+        }
+    }
+
+    restart() {
+        if (this.process) {
+            // exit handler restarts the server
+            this.process.kill();
+        }
+    }
+
+    stop() {
+        this.stopped = true;
+        if (this.process) {
+            this.process.stdin.end();
+            this.process = null;
+        }
+        this.ready = null;
+    }
+}
+
+const cpSatWorkerPool = new CPSATWorkerPool();
+module.exports = cpSatWorkerPool;
+module.exports.CPSATWorkerPool = CPSATWorkerPool;
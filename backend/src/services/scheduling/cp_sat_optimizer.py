@@ -1,10 +1,143 @@
 # backend/src/services/cp_sat_optimizer.py
 import argparse
+import contextlib
+from array import array
 import json
+import os
+import socketserver
 import sys
-
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+
+import numpy as np
 from ortools.sat.python import cp_model
 
+from optimizer_cache import DEFAULT_MAX_AGE, DEFAULT_MAX_BYTES, ResultCache, fingerprint
+from optimizer_codec import FRAME_FORMATS, read_message, write_frame
+
+
+# CP-SAT parameter presets selected with settings['search_profile']
+SEARCH_PROFILES = {
+    # Interactive regenerations: good enough within a couple of seconds
+    'fast-feasible': {'max_time_in_seconds': 2.0, 'relative_gap_limit': 0.05, 'linearization_level': 0},
+    # Solver defaults, bounded by max_solve_time
+    'balanced': {},
+    # Nightly runs: spend the budget on closing the gap
+    'prove-optimal': {'relative_gap_limit': 0.0, 'absolute_gap_limit': 0.0, 'linearization_level': 2},
+}
+
+# optimizationMode values of the settings UI mapped onto search profiles
+OPTIMIZATION_MODE_PROFILES = {
+    'fast': 'fast-feasible',
+    'balanced': 'balanced',
+    'thorough': 'prove-optimal',
+}
+
+# settings key -> (CP-SAT parameter, type)
+SOLVER_SETTING_PARAMETERS = {
+    'num_search_workers': ('num_workers', int),
+    'relative_gap_limit': ('relative_gap_limit', float),
+    'absolute_gap_limit': ('absolute_gap_limit', float),
+    'random_seed': ('random_seed', int),
+    'memory_limit_mb': ('max_memory_in_mb', int),
+}
+
+# settings['log_level']: 'off' prints nothing, 'summary' the usual progress lines,
+# 'verbose' adds per-slot details and the CP-SAT search log
+LOG_LEVELS = {'off': 0, 'summary': 1, 'verbose': 2}
+
+# settings['decomposition']: 'auto' splits sites with at least DECOMPOSITION_MIN_EMPLOYEES
+# employees into independent position components, 'always' splits whenever there are
+# several components, 'never' keeps one model
+DECOMPOSITION_MODES = ('auto', 'always', 'never')
+DECOMPOSITION_MIN_EMPLOYEES = 60
+# Share of max_solve_time reserved for the coordination pass of a decomposed solve, which
+# is skipped when less than COORDINATION_MIN_SECONDS per component round is left
+COORDINATION_TIME_SHARE = 0.25
+COORDINATION_MIN_SECONDS = 0.5
+
+# settings['fairness_model']: 'spread' penalizes the spread between the largest and the
+# smallest workload, 'target' every employee's absolute deviation from a target workload
+# (the position's demand shared out, capped by the contract), 'piecewise' the same
+# deviation with convex piecewise-linear penalties (FAIRNESS_PIECEWISE_SEGMENTS)
+FAIRNESS_MODELS = ('spread', 'target', 'piecewise')
+# (width in minutes, penalty per minute) of the 'piecewise' deviation segments, the last one unbounded
+FAIRNESS_PIECEWISE_SEGMENTS = ((240, 1), (240, 2), (None, 4))
+# Share of the workload imbalance of previous weeks (data['workload_history']) that the
+# targets of one horizon even out; settings.fairness_history_share overrides it
+FAIRNESS_HISTORY_SHARE = 0.5
+
+# settings['symmetry_breaking']: 'off', 'workload' orders the workloads of interchangeable
+# employees (see _interchangeable_employees), 'lex' orders their assignment vectors
+# lexicographically, which also separates employees with equal workloads
+SYMMETRY_BREAKING_MODES = ('off', 'workload', 'lex')
+
+# settings['infeasibility_diagnosis']: 'auto' explains an infeasible model by solving it
+# again with every constraint family and every cannot-work entry behind an assumption
+# literal, 'assumptions' builds the model that way from the start, 'off' skips both the
+# diagnosis and the capacity pre-check
+INFEASIBILITY_DIAGNOSIS_MODES = ('auto', 'assumptions', 'off')
+# Budget (seconds) of the diagnosis solve plus the minimization of its conflict;
+# settings.diagnosis_time_limit overrides it
+DIAGNOSIS_TIME_LIMIT = 10.0
+
+# settings['lean_build']: build the model for the smallest memory footprint: anonymous
+# variables, and the lookup indexes only needed while building released before the search.
+# settings['memory_limit_mb']: resident memory ceiling of the optimizer process, checked
+# after every build phase (where /proc/self/statm exists) and handed to CP-SAT as
+# max_memory_in_mb; a build over the ceiling fails with status MEMORY_LIMIT_STATUS.
+# The input (data) is not released: the callers, the cache fingerprint and the
+# infeasibility diagnosis re-solve keep reading it.
+RESIDENT_MEMORY_PATH = '/proc/self/statm'
+MEMORY_LIMIT_STATUS = 'memory_limit'
+
+# settings['coverage_report']: add result['coverage_report'], one row per required slot
+# with its requirement, candidates, assigned staff and shortage
+
+# settings['objective_mode']: 'weighted' maximizes one weighted sum of all objective term
+# groups, 'lexicographic' optimizes them stage by stage in strict priority order
+# (LEXICOGRAPHIC_STAGES): each stage keeps the optimum of the stages before it as a constraint,
+# is hinted with their solution and gets an equal share of the time left
+OBJECTIVE_MODES = ('weighted', 'lexicographic')
+# (stage, objective term groups); stages without terms are skipped (stability is repair only)
+LEXICOGRAPHIC_STAGES = (
+    ('shortage', ('shortage',)),
+    ('stability', ('current_kept', 'change_added')),
+    ('preferences', ('prefer_work', 'position_match')),
+    ('fairness', ('fairness', 'employees_used')),
+)
+
+# data['mode'] 'scenarios': what-if sweep over objective weights. The model is built once
+# and re-solved with the objective of every weight vector (data['scenarios'], each
+# overriding optimization_weights / fairness_weight, or data['fairness_weight_sweep']);
+# settings.scenario_parallel caps the scenarios solved at the same time (default one per core)
+SCENARIO_MODE = 'scenarios'
+
+# Local search budget (seconds) of the greedy scheduler, see GreedyScheduler;
+# settings.heuristic_time_limit overrides it
+HEURISTIC_TIME_LIMIT = 1.0
+
+# Settings that change how a request runs or is reported, not which schedules answer it;
+# left out of the result cache fingerprint
+CACHE_NEUTRAL_SETTINGS = ('log_level', 'max_solve_time', 'search_workers_cap', 'result_cache',
+                          'infeasibility_diagnosis', 'diagnosis_time_limit', 'lean_build', 'memory_limit_mb')
+# Input modes answered without the result cache (their input is more than the canonical problem)
+UNCACHED_MODES = ('incremental', SCENARIO_MODE)
+
+
+def _resident_memory_mb():
+    """Resident memory of this process in MB, None where it cannot be read"""
+    try:
+        with open(RESIDENT_MEMORY_PATH) as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
 
 def _parse_time_to_minutes(time_str):
     """Convert time format HH:MM:SS to total minutes from midnight"""
@@ -31,50 +164,1305 @@ def _calculate_rest_minutes(shift1, shift2, is_next_day=False):
     return rest_minutes
 
 
-class UniversalShiftSchedulerCP:
+def _js_weekday(date_str):
+    """Weekday of a YYYY-MM-DD date using the JS getDay() convention (Sunday = 0)"""
+    return (date.fromisoformat(date_str[:10]).weekday() + 1) % 7
+
+
+# Columnar input (format_version 2). employees, shifts, positions and days are lists
+# whose list index is the entity index used by every integer column:
+#   position_shifts    - per position index, the indexes of its valid shifts
+#   requirements       - dense required-staff array of requirements_shape [days, positions, width],
+#                        index (day * positions + position) * width + slot, where slot indexes
+#                        position_shifts[position] and width is the longest position_shifts entry
+#   constraints.<type> = {"employee": [...], "day": [...], "shift": [...]}, shift -1 = whole day
+# Legacy inputs (no format_version) use position_shifts_map, the "<pos_id>-<shift_id>-<date>"
+# keyed shift_requirements dict and lists of constraint dicts; both are read by the loaders below.
+COLUMNAR_FORMAT_VERSION = 2
+CONSTRAINT_TYPES = ('permanent_cannot_work', 'cannot_work', 'prefer_work')
+
+
+def _is_columnar(data):
+    return data.get('format_version', 1) >= COLUMNAR_FORMAT_VERSION
+
+
+def _load_position_shifts(data):
+    """pos_id -> valid shift dicts of the position"""
+    shifts = data['shifts']
+    if _is_columnar(data):
+        return {data['positions'][pos_idx]['pos_id']: [shifts[shift_idx] for shift_idx in shift_indexes]
+                for pos_idx, shift_indexes in enumerate(data['position_shifts'])}
+
+    position_shifts_map = data.get('position_shifts_map', {})
+    position_shifts = {}
+    for position in data['positions']:
+        valid_shifts = set(position_shifts_map.get(str(position['pos_id']), []))
+        position_shifts[position['pos_id']] = [shift for shift in shifts if shift['shift_id'] in valid_shifts]
+    return position_shifts
+
+
+def _load_requirements(data):
+    """(pos_id, shift_id, day_idx) -> required staff of every slot with a requirement"""
+    requirements = {}
+
+    if _is_columnar(data):
+        arrays = InputArrays(data)
+        day_idxs, pos_idxs, slots = np.nonzero(arrays.requirements > 0)
+        slot_columns = zip(arrays.position_ids[pos_idxs].tolist(),
+                           arrays.shift_ids[arrays.slot_shifts[pos_idxs, slots]].tolist(), day_idxs.tolist())
+        return dict(zip(slot_columns, arrays.requirements[day_idxs, pos_idxs, slots].tolist()))
+
+    date_index = {day['date']: day_idx for day_idx, day in enumerate(data['days'])}
+    for key, requirement in data.get('shift_requirements', {}).items():
+        required = (requirement or {}).get('required_staff', 0)
+        if not required or required <= 0:
+            continue
+        if 'position_id' in requirement and 'shift_id' in requirement and 'date' in requirement:
+            pos_id, shift_id, date_str = requirement['position_id'], requirement['shift_id'], requirement['date']
+        else:
+            pos_id, shift_id, date_str = key.split('-', 2)
+            pos_id, shift_id = int(pos_id), int(shift_id)
+        day_idx = date_index.get(str(date_str)[:10])
+        if day_idx is not None:
+            requirements[(pos_id, shift_id, day_idx)] = required
+    return requirements
+
+
+def _load_constraints(data, constraint_type):
+    """[(emp_id, day_idx, shift_id or None)] of one constraint type"""
+    constraints = data.get('constraints', {})
+
+    if _is_columnar(data):
+        arrays = InputArrays(data)
+        employee, day, shift = arrays.constraints[constraint_type]
+        shift_ids = np.where(shift >= 0, arrays.shift_ids[shift], -1).tolist()
+        return [(emp_id, day_idx, shift_id if shift_id >= 0 else None)
+                for emp_id, day_idx, shift_id in zip(arrays.employee_ids[employee].tolist(), day.tolist(), shift_ids)]
+
+    return [(constraint['emp_id'], constraint['day_index'], constraint.get('shift_id'))
+            for constraint in constraints.get(constraint_type, [])]
+
+
+def _legacy_input(data):
+    """Columnar input converted to the legacy dict format (used by repair deltas)"""
+    if not _is_columnar(data):
+        return data
+
+    days = data['days']
+    position_shifts = _load_position_shifts(data)
+    shift_requirements = {}
+    for (pos_id, shift_id, day_idx), required in _load_requirements(data).items():
+        date_str = days[day_idx]['date']
+        shift_requirements[f"{pos_id}-{shift_id}-{date_str}"] = {
+            'position_id': pos_id,
+            'shift_id': shift_id,
+            'date': date_str,
+            'day_index': day_idx,
+            'required_staff': required
+        }
+
+    constraints = {key: value for key, value in data.get('constraints', {}).items() if key not in CONSTRAINT_TYPES}
+    for constraint_type in CONSTRAINT_TYPES:
+        constraints[constraint_type] = [{'emp_id': emp_id, 'day_index': day_idx, 'shift_id': shift_id}
+                                        for emp_id, day_idx, shift_id in _load_constraints(data, constraint_type)]
+
+    legacy = {key: value for key, value in data.items()
+              if key not in ('format_version', 'position_shifts', 'requirements')}
+    legacy.update({
+        'position_shifts_map': {str(pos_id): [shift['shift_id'] for shift in pos_shifts]
+                                for pos_id, pos_shifts in position_shifts.items()},
+        'shift_requirements': shift_requirements,
+        'constraints': constraints
+    })
+    return legacy
+
+
+class InputArrays:
+    """Index-space arrays of an optimizer input, the same for both input formats.
+
+    Entities are addressed by their list index in data['employees'], data['shifts'] and
+    data['positions'] (employee_ids, shift_ids, position_ids map indexes back to ids).
+    requirements is the required-staff array [days, positions, slots]: the columnar
+    'requirements' reshaped, legacy requirements scattered into it. slot_shifts[position]
+    holds the shift indexes of the position's slots (-1 past its last shift) and
+    constraints[type] the (employee, day, shift) int32 columns, shift -1 = whole day.
+    Legacy constraints of unknown employees or shifts are left out.
+    """
+
+    def __init__(self, data):
+        employees, shifts, positions = data['employees'], data['shifts'], data['positions']
+        self.day_count = len(data['days'])
+        self.employee_ids = np.array([emp['emp_id'] for emp in employees])
+        self.shift_ids = np.array([shift['shift_id'] for shift in shifts])
+        self.position_ids = np.array([position['pos_id'] for position in positions])
+        self.employee_index = {emp_id: emp_idx for emp_idx, emp_id in enumerate(self.employee_ids.tolist())}
+        self.position_index = {pos_id: pos_idx for pos_idx, pos_id in enumerate(self.position_ids.tolist())}
+        shift_index = {shift_id: shift_idx for shift_idx, shift_id in enumerate(self.shift_ids.tolist())}
+        constraints = data.get('constraints', {})
+
+        if _is_columnar(data):
+            position_shifts = data['position_shifts']
+            self.requirements = np.asarray(data['requirements'], dtype=np.int32).reshape(data['requirements_shape'])
+            self.constraints = {}
+            for constraint_type in CONSTRAINT_TYPES:
+                columns = constraints.get(constraint_type) or {}
+                self.constraints[constraint_type] = tuple(np.asarray(columns.get(name, ()), dtype=np.int32)
+                                                          for name in ('employee', 'day', 'shift'))
+        else:
+            position_shifts = [[shift_index[shift['shift_id']] for shift in pos_shifts]
+                               for pos_shifts in _load_position_shifts(data).values()]
+            slot_index = {(positions[pos_idx]['pos_id'], shifts[shift_idx]['shift_id']): (pos_idx, slot)
+                          for pos_idx, shift_indexes in enumerate(position_shifts)
+                          for slot, shift_idx in enumerate(shift_indexes)}
+            width = max(map(len, position_shifts), default=0)
+            self.requirements = np.zeros((self.day_count, len(positions), width), dtype=np.int32)
+            for (pos_id, shift_id, day_idx), required in _load_requirements(data).items():
+                if (pos_id, shift_id) in slot_index:
+                    self.requirements[(day_idx, *slot_index[(pos_id, shift_id)])] = required
+            self.constraints = {}
+            for constraint_type in CONSTRAINT_TYPES:
+                rows = [(self.employee_index[emp_id], day_idx, -1 if shift_id is None else shift_index[shift_id])
+                        for emp_id, day_idx, shift_id in _load_constraints(data, constraint_type)
+                        if emp_id in self.employee_index and (shift_id is None or shift_id in shift_index)]
+                self.constraints[constraint_type] = tuple(np.array(column, dtype=np.int32)
+                                                          for column in (zip(*rows) if rows else ((), (), ())))
+
+        self.slot_shifts = np.full(self.requirements.shape[1:], -1, dtype=np.int32)
+        for pos_idx, shift_indexes in enumerate(position_shifts):
+            self.slot_shifts[pos_idx, :len(shift_indexes)] = shift_indexes
+
+    def blocks(self, constraint_type):
+        """(whole_day [employees, days], blocked [employees, days, shifts]) boolean masks of a
+        cannot-work constraint type; blocked includes the whole-day entries"""
+        employee, day, shift = self.constraints[constraint_type]
+        inside = (day >= 0) & (day < self.day_count)
+        employee, day, shift = employee[inside], day[inside], shift[inside]
+        whole_day = np.zeros((len(self.employee_ids), self.day_count), dtype=bool)
+        blocked = np.zeros((len(self.employee_ids), self.day_count, len(self.shift_ids)), dtype=bool)
+        whole_day[employee[shift < 0], day[shift < 0]] = True
+        blocked[employee[shift >= 0], day[shift >= 0], shift[shift >= 0]] = True
+        blocked |= whole_day[:, :, None]
+        return whole_day, blocked
+
+    def slots(self, position_valid_shifts):
+        """(pos_ids, shift_ids, day_idxs, required) columns of the slots with a requirement among
+        position_valid_shifts, ordered position -> day -> shift"""
+        columns = ([], [], [], [])
+        for pos_id, pos_shifts in position_valid_shifts.items():
+            pos_idx = self.position_index[pos_id]
+            grid = self.requirements[:self.day_count, pos_idx, :len(pos_shifts)]
+            day_idxs, slots = np.nonzero(grid > 0)
+            columns[0].extend([pos_id] * len(day_idxs))
+            columns[1].extend(self.shift_ids[self.slot_shifts[pos_idx, slots]].tolist())
+            columns[2].extend(day_idxs.tolist())
+            columns[3].extend(grid[day_idxs, slots].tolist())
+        return columns
+
+
+def _calendar_weeks(days):
+    """Calendar week index of every day of the horizon (weeks start on the first day)"""
+    return [day.get('week_index', day_idx // 7) for day_idx, day in enumerate(days)]
+
+
+def _load_carry_over(data):
+    """emp_id -> carry-over from the schedule right before the horizon.
+
+    Entries: {"emp_id", "trailing_work_days": worked days in a row up to the horizon start,
+    "last_shift_end": end of the last shift in minutes from the horizon start (negative when
+    it ended before), "last_shift_is_night": bool}
+    """
+    return {entry['emp_id']: entry for entry in data.get('carry_over') or []}
+
+
+def _log_settings(settings, level, message):
+    """Print message if settings['log_level'] is at least level (UniversalShiftSchedulerCP._log
+    for the module-level solve paths)"""
+    if LOG_LEVELS[level] <= LOG_LEVELS.get(settings.get('log_level'), LOG_LEVELS['summary']):
+        print(message)
+
+
+def _schedule_limits(settings):
+    """Hard constraints (law, in minutes) and soft constraints (admin settings) of a request"""
+    hard_constraints = settings.get('hard_constraints', {})
+    soft_constraints = settings.get('soft_constraints', {})
+    return {
+        'max_minutes_per_day': hard_constraints.get('MAX_HOURS_PER_DAY', 12) * 60,
+        'max_minutes_per_week': hard_constraints.get('MAX_HOURS_PER_WEEK', 48) * 60,
+        'min_rest_between_shifts': hard_constraints.get('MIN_REST_BETWEEN_SHIFTS', 11) * 60,
+        'min_rest_after_night': hard_constraints.get('MIN_REST_AFTER_NIGHT_SHIFT', 12) * 60,
+        'min_rest_after_regular': hard_constraints.get('MIN_REST_AFTER_REGULAR_SHIFT', 11) * 60,
+        'max_night_shifts_per_week': hard_constraints.get('MAX_NIGHT_SHIFTS_PER_WEEK', 3),
+        # Soft constraints - READ WITH UPPERCASE KEYS
+        'max_shifts_per_day': soft_constraints.get('MAX_SHIFTS_PER_DAY', 1),
+        'max_consecutive_work_days': soft_constraints.get('MAX_CONSECUTIVE_WORK_DAYS', 6),
+    }
+
+
+def _staffed_position_shifts(data):
+    """{pos_id: [shift dicts]} for every position with employees, in employee order.
+
+    Decomposed solves (see solve_decomposed) restrict this to data['component_positions'].
+    """
+    position_ids = {position['pos_id'] for position in data['positions']}
+    if data.get('component_positions') is not None:
+        position_ids &= set(data['component_positions'])
+    position_shifts = _load_position_shifts(data)
+
+    position_valid_shifts = {}
+    for emp in data['employees']:
+        pos_id = emp.get('default_position_id')
+        if pos_id in position_ids and pos_id not in position_valid_shifts:
+            position_valid_shifts[pos_id] = position_shifts.get(pos_id, [])
+    return position_valid_shifts
+
+
+def _slot_requirements(slot_columns):
+    """{(pos_id, shift_id, day_idx): required} of InputArrays.slots() columns"""
+    pos_ids, shift_ids, day_idxs, required = slot_columns
+    return dict(zip(zip(pos_ids, shift_ids, day_idxs), required))
+
+
+def _fairness_model(settings):
+    fairness_model = settings.get('fairness_model') or 'spread'
+    if fairness_model not in FAIRNESS_MODELS:
+        raise ValueError(f"Unknown fairness_model '{fairness_model}', expected one of {FAIRNESS_MODELS}")
+    return fairness_model
+
+
+def _fairness_targets(data, position_valid_shifts, slot_requirements, employee_ids, max_minutes_per_week):
+    """emp_id -> (target minutes, contract cap in minutes) over the horizon for the target models.
+
+    The target is the demand of the employee's position shared out over its employees. With
+    data['workload_history'] ([{"emp_id", "worked_minutes"}] of previous weeks) it moves by a
+    share of how far the employee worked above or below the position average. The cap is
+    employee['contract_hours_per_week'] when given, else the weekly legal maximum.
+    """
+    settings = data.get('settings', {})
+    horizon_weeks = len(set(_calendar_weeks(data['days']))) or 1
+    history_share = settings.get('fairness_history_share', FAIRNESS_HISTORY_SHARE)
+    worked = {entry['emp_id']: entry.get('worked_minutes', 0) for entry in data.get('workload_history') or []}
+    employees_by_id = {emp['emp_id']: emp for emp in data['employees']}
+
+    durations = {(pos_id, shift['shift_id']): shift['duration_minutes']
+                 for pos_id, pos_shifts in position_valid_shifts.items() for shift in pos_shifts}
+    demand = defaultdict(int)
+    for slot, required in slot_requirements.items():
+        demand[slot[0]] += required * durations[slot[:2]]
+    position_employees = defaultdict(list)
+    for emp_id in employee_ids:
+        position_employees[employees_by_id[emp_id].get('default_position_id')].append(emp_id)
+
+    targets = {}
+    for pos_id, emp_ids in position_employees.items():
+        share = demand[pos_id] / len(emp_ids)
+        average_worked = sum(worked.get(emp_id, 0) for emp_id in emp_ids) / len(emp_ids)
+        for emp_id in emp_ids:
+            contract_hours = employees_by_id[emp_id].get('contract_hours_per_week')
+            cap = max_minutes_per_week * horizon_weeks
+            if contract_hours is not None:
+                cap = min(cap, int(contract_hours * 60) * horizon_weeks)
+            target = share - history_share * (worked.get(emp_id, 0) - average_worked)
+            targets[emp_id] = (min(max(0, round(target)), cap), cap)
+    return targets
+
+
+def _fairness_deviation_penalty(deviation, fairness_model):
+    """Penalty of one employee's deviation (minutes) from the target under a target model"""
+    if fairness_model == 'target':
+        return deviation
+    penalty = 0
+    for width, slope in FAIRNESS_PIECEWISE_SEGMENTS:
+        step = deviation if width is None else min(deviation, width)
+        penalty += step * slope
+        deviation -= step
+    return penalty
+
+
+def _symmetry_breaking_mode(settings):
+    mode = settings.get('symmetry_breaking') or 'off'
+    if mode not in SYMMETRY_BREAKING_MODES:
+        raise ValueError(f"Unknown symmetry_breaking '{mode}', expected one of {SYMMETRY_BREAKING_MODES}")
+    return mode
+
+
+def _interchangeable_employees(data, domains, prefer_work, fairness_model):
+    """Classes of two or more employees that every constraint and objective term treats alike.
+
+    domains maps emp_id -> [(day_idx, shift_id, pos_id)] of the employee's assignment
+    variables. Employees are alike with the same domain (position, cannot-work entries and
+    carry-over rest), the same preferences and trailing work days, and under the target
+    fairness models the same contract and workload history. Classes keep employee order.
+    """
+    preferences = defaultdict(list)
+    for emp_id, day_idx, shift_id in prefer_work:
+        preferences[emp_id].append((day_idx, -1 if shift_id is None else shift_id))
+    carry_over = _load_carry_over(data)
+    worked = {entry['emp_id']: entry.get('worked_minutes', 0) for entry in data.get('workload_history') or []}
+    employees_by_id = {emp['emp_id']: emp for emp in data['employees']}
+
+    classes = defaultdict(list)
+    for emp_id, domain in domains.items():
+        signature = (tuple(domain), tuple(sorted(preferences.get(emp_id, ()))),
+                     carry_over.get(emp_id, {}).get('trailing_work_days', 0))
+        if fairness_model != 'spread':
+            signature += (employees_by_id[emp_id].get('contract_hours_per_week'), worked.get(emp_id, 0))
+        classes[signature].append(emp_id)
+    return [emp_ids for emp_ids in classes.values() if len(emp_ids) > 1]
+
+
+def _infeasibility_diagnosis_mode(settings):
+    mode = settings.get('infeasibility_diagnosis') or 'auto'
+    if mode not in INFEASIBILITY_DIAGNOSIS_MODES:
+        raise ValueError(f"Unknown infeasibility_diagnosis '{mode}', expected one of {INFEASIBILITY_DIAGNOSIS_MODES}")
+    return mode
+
+
+def _capacity_precheck(data, position_valid_shifts, slot_requirements, slot_candidates, week_of_day, limits):
+    """Necessary conditions of the exact coverage, checked before any search.
+
+    Returns (conflicts, understaffed): conflicts are positions whose exactly covered slots
+    need more shifts, minutes or night shifts on a day or in a week than their candidates
+    may work at all, understaffed are slots with fewer candidates than required (they get
+    a shortage instead of exact coverage, see section 2 of optimize_schedule).
+    """
+    days = data['days']
+    names = _conflict_names(data)
+    shifts_by_slot = {(pos_id, shift['shift_id']): shift
+                      for pos_id, pos_shifts in position_valid_shifts.items() for shift in pos_shifts}
+    understaffed = []
+    day_load = defaultdict(lambda: [0, 0, set()])
+    week_load = defaultdict(lambda: [0, 0, set(), set()])
+
+    for (pos_id, shift_id, day_idx), required in slot_requirements.items():
+        candidates = slot_candidates.get((pos_id, shift_id, day_idx), ())
+        if len(candidates) < required:
+            understaffed.append({
+                'rule': 'understaffed', 'position': names['positions'].get(pos_id, pos_id),
+                'shift': names['shifts'].get(shift_id, shift_id), 'date': days[day_idx]['date'],
+                'required': required, 'candidates': len(candidates),
+                'message': f"{names['positions'].get(pos_id, pos_id)} {names['shifts'].get(shift_id, shift_id)} "
+                           f"on {days[day_idx]['date']} needs {required} staff, only {len(candidates)} available"
+            })
+            continue
+
+        shift = shifts_by_slot[(pos_id, shift_id)]
+        day = day_load[(pos_id, day_idx)]
+        day[0] += required
+        day[1] += required * shift['duration_minutes']
+        day[2].update(candidates)
+        week = week_load[(pos_id, week_of_day[day_idx])]
+        week[0] += required * shift['duration_minutes']
+        week[2].update(candidates)
+        if shift.get('is_night_shift', False):
+            week[1] += required
+            week[3].update(candidates)
+
+    conflicts = []
+    for (pos_id, day_idx), (required, minutes, candidates) in day_load.items():
+        capacity = len(candidates) * limits['max_shifts_per_day']
+        if required > capacity:
+            conflicts.append({
+                'rule': 'max_shifts_per_day', 'position': names['positions'].get(pos_id, pos_id),
+                'date': days[day_idx]['date'], 'required': required, 'capacity': capacity,
+                'message': f"{names['positions'].get(pos_id, pos_id)} needs {required} shifts on "
+                           f"{days[day_idx]['date']}, {len(candidates)} employees may work at most {capacity}"
+            })
+        capacity = len(candidates) * limits['max_minutes_per_day']
+        if minutes > capacity:
+            conflicts.append({
+                'rule': 'max_hours_per_day', 'position': names['positions'].get(pos_id, pos_id),
+                'date': days[day_idx]['date'], 'required': minutes / 60, 'capacity': capacity / 60,
+                'message': f"{names['positions'].get(pos_id, pos_id)} needs {minutes / 60:g}h on "
+                           f"{days[day_idx]['date']}, {len(candidates)} employees may work at most {capacity / 60:g}h"
+            })
+    for (pos_id, week_idx), (minutes, nights, candidates, night_candidates) in week_load.items():
+        week_start = days[week_of_day.index(week_idx)]['date']
+        capacity = len(candidates) * limits['max_minutes_per_week']
+        if minutes > capacity:
+            conflicts.append({
+                'rule': 'max_hours_per_week', 'position': names['positions'].get(pos_id, pos_id),
+                'date': week_start, 'required': minutes / 60, 'capacity': capacity / 60,
+                'message': f"{names['positions'].get(pos_id, pos_id)} needs {minutes / 60:g}h in the week of "
+                           f"{week_start}, {len(candidates)} employees may work at most {capacity / 60:g}h"
+            })
+        capacity = len(night_candidates) * limits['max_night_shifts_per_week']
+        if nights > capacity:
+            conflicts.append({
+                'rule': 'max_night_shifts_per_week', 'position': names['positions'].get(pos_id, pos_id),
+                'date': week_start, 'required': nights, 'capacity': capacity,
+                'message': f"{names['positions'].get(pos_id, pos_id)} needs {nights} night shifts in the week of "
+                           f"{week_start}, {len(night_candidates)} employees may work at most {capacity}"
+            })
+    return conflicts, understaffed
+
+
+def _conflict_names(data):
+    """Display names of employees, positions and shifts for diagnosis messages"""
+    return {
+        'employees': {emp['emp_id']: emp.get('name') or f"Employee {emp['emp_id']}" for emp in data['employees']},
+        'positions': {pos['pos_id']: pos.get('pos_name') or f"Position {pos['pos_id']}" for pos in data['positions']},
+        'shifts': {shift['shift_id']: shift.get('shift_name') or f"Shift {shift['shift_id']}" for shift in data['shifts']}
+    }
+
+
+def _describe_conflict(item, data, limits, slot_requirements, names):
+    """Human-readable dict of an assumption item (see UniversalShiftSchedulerCP._guard)"""
+    rule = item[0]
+    days = data['days']
+    if rule == 'coverage':
+        _, pos_id, shift_id, day_idx = item
+        required = slot_requirements[(pos_id, shift_id, day_idx)]
+        position, shift = names['positions'].get(pos_id, pos_id), names['shifts'].get(shift_id, shift_id)
+        date_str = days[day_idx]['date']
+        return {'rule': rule, 'position': position, 'shift': shift, 'date': date_str, 'required': required,
+                'message': f"{position} {shift} on {date_str} needs exactly {required} staff"}
+    if rule in ('permanent_cannot_work', 'cannot_work'):
+        _, emp_id, day_idx, shift_id = item
+        employee, date_str = names['employees'].get(emp_id, emp_id), days[day_idx]['date']
+        shift = names['shifts'].get(shift_id, shift_id) if shift_id is not None else None
+        kind = 'permanently cannot' if rule == 'permanent_cannot_work' else 'cannot'
+        return {'rule': rule, 'employee': employee, 'emp_id': emp_id, 'date': date_str, 'shift': shift,
+                'message': f"{employee} {kind} work {shift or 'any shift'} on {date_str}"}
+    if rule == 'carry_over_rest':
+        _, emp_id = item
+        employee = names['employees'].get(emp_id, emp_id)
+        return {'rule': rule, 'employee': employee, 'emp_id': emp_id,
+                'message': f"{employee} needs rest after their last shift of the previous schedule"}
+
+    messages = {
+        'max_hours_per_day': f"At most {limits['max_minutes_per_day'] / 60:g}h per employee and day",
+        'max_shifts_per_day': f"At most {limits['max_shifts_per_day']} shift(s) per employee and day",
+        'max_hours_per_week': f"At most {limits['max_minutes_per_week'] / 60:g}h per employee and week",
+        'min_rest': f"At least {limits['min_rest_between_shifts'] / 60:g}h rest between shifts "
+                    f"({limits['min_rest_after_night'] / 60:g}h after night shifts)",
+        'max_consecutive_days': f"At most {limits['max_consecutive_work_days']} consecutive work days",
+        'max_night_shifts_per_week': f"At most {limits['max_night_shifts_per_week']} night shifts per employee and week"
+    }
+    return {'rule': rule, 'message': messages[rule]}
+
+
+def _rest_deadlines(carry_over, limits):
+    """emp_id -> minute (relative to the horizon start) before which no shift may start"""
+    rest_deadlines = {}
+    for emp_id, entry in carry_over.items():
+        if entry.get('last_shift_end') is not None:
+            required_rest = (limits['min_rest_after_night'] if entry.get('last_shift_is_night')
+                             else limits['min_rest_after_regular'])
+            rest_deadlines[emp_id] = entry['last_shift_end'] + required_rest
+    return rest_deadlines
+
+
+# Pruning reasons of _assignment_domain by code, later codes are overridden by earlier ones
+DOMAIN_EXCLUSIONS = (None, 'permanent', 'temporary', 'carry_over_rest', 'no_requirement')
+
+
+def _assignment_domain(employees, position_valid_shifts, arrays, permanent_blocks, temporary_blocks,
+                       rest_deadlines):
+    """Yield ((emp_id, day_idx, shift_id, pos_id), shift, excluded_by) for every candidate
+    assignment of an employee to a shift of their position.
+
+    excluded_by is None for assignments that can be 1, otherwise the pruning reason:
+    'permanent', 'temporary', 'carry_over_rest' or 'no_requirement'. The reasons of one
+    employee are worked out as a [days, shifts] array from the requirement array and the
+    InputArrays.blocks() masks.
+    """
+    day_starts = np.arange(arrays.day_count) * 24 * 60
+    shift_starts = {pos_id: np.array([_parse_time_to_minutes(shift['start_time']) for shift in pos_shifts])
+                    for pos_id, pos_shifts in position_valid_shifts.items()}
+
+    for emp in employees:
+        emp_id = emp['emp_id']
+        pos_id = emp.get('default_position_id')
+
+        # Assignments ONLY for the employee position
+        if pos_id not in position_valid_shifts:
+            continue
+
+        pos_shifts = position_valid_shifts[pos_id]
+        pos_idx = arrays.position_index[pos_id]
+        emp_idx = arrays.employee_index[emp_id]
+        shift_indexes = arrays.slot_shifts[pos_idx, :len(pos_shifts)]
+        reasons = np.where(arrays.requirements[:arrays.day_count, pos_idx, :len(pos_shifts)] > 0, 0, 4)
+        deadline = rest_deadlines.get(emp_id)
+        if deadline is not None:
+            reasons[(day_starts[:, None] < deadline)
+                    & (day_starts[:, None] + shift_starts[pos_id][None, :] < deadline)] = 3
+        reasons[temporary_blocks[1][emp_idx][:, shift_indexes]] = 2
+        reasons[permanent_blocks[1][emp_idx][:, shift_indexes]] = 1
+
+        for day_idx, day_reasons in enumerate(reasons.tolist()):
+            for shift, reason in zip(pos_shifts, day_reasons):
+                yield (emp_id, day_idx, shift['shift_id'], pos_id), shift, DOMAIN_EXCLUSIONS[reason]
+
+
+def _clique_cover(nodes, adjacency, edges):
+    """Greedily cover conflict edges with maximal cliques of the conflict graph"""
+    covered = set()
+    cliques = []
+    for a, b in edges:
+        if (a, b) in covered:
+            continue
+        clique = [a, b]
+        for node in nodes:
+            if node not in clique and all(node in adjacency[member] for member in clique):
+                clique.append(node)
+        for x in clique:
+            for y in clique:
+                covered.add((x, y))
+        cliques.append(clique)
+    return cliques
+
+
+def _build_rest_conflicts(shifts, min_rest_between_shifts, min_rest_after_night, min_rest_after_regular):
+    """Rest-conflict table for a set of shifts, computed once per request.
+
+    Returns (same_day, next_day):
+      same_day - cliques of shift ids of which at most one can be worked on a day
+      next_day - cliques of (day_offset, shift_id) spanning a day (0) and the next one (1)
+    """
+    nodes = [(offset, shift['shift_id']) for offset in (0, 1) for shift in shifts]
+    adjacency = defaultdict(set)
+    same_day_edges = []
+    next_day_edges = []
+
+    def connect(a, b):
+        adjacency[a].add(b)
+        adjacency[b].add(a)
+
+    for i, shift1 in enumerate(shifts):
+        for shift2 in shifts[i + 1:]:
+            if _calculate_rest_minutes(shift1, shift2, False) < min_rest_between_shifts:
+                for offset in (0, 1):
+                    connect((offset, shift1['shift_id']), (offset, shift2['shift_id']))
+                same_day_edges.append(((0, shift1['shift_id']), (0, shift2['shift_id'])))
+
+    for shift1 in shifts:
+        # Use appropriate rest requirement based on shift type
+        required_rest = min_rest_after_night if shift1.get('is_night_shift', False) else min_rest_after_regular
+        for shift2 in shifts:
+            if _calculate_rest_minutes(shift1, shift2, True) < required_rest:
+                edge = ((0, shift1['shift_id']), (1, shift2['shift_id']))
+                connect(*edge)
+                next_day_edges.append(edge)
+
+    same_day_nodes = [node for node in nodes if node[0] == 0]
+    same_day = [[shift_id for _, shift_id in clique]
+                for clique in _clique_cover(same_day_nodes, adjacency, same_day_edges)]
+    next_day = _clique_cover(nodes, adjacency, next_day_edges)
+    return same_day, next_day
+
+
+def _objective_coefficients(optimization_weights, fairness_weight):
+    """Coefficient of every objective term group (maximized) for one weight vector"""
+    shortage_penalty = optimization_weights.get('SHORTAGE_PENALTY', 1000)
+    change_penalty = optimization_weights.get('CHANGE_PENALTY', shortage_penalty // 2)
+    return {
+        'shortage': -shortage_penalty,
+        'prefer_work': optimization_weights.get('PREFER_WORK_BONUS', 10),
+        'position_match': optimization_weights.get('POSITION_MATCH_BONUS', 20),
+        # Efficiency: penalty for using more employees, stronger when fairness_weight is low (scale 0-5)
+        'employees_used': -max(0, 100 - fairness_weight) / 20,
+        # Workload fairness, stronger when fairness_weight is high
+        'fairness': -int(fairness_weight / 10),
+        # Schedule stability of an incremental repair: a kept current assignment scores
+        # change_penalty * (var - 1), so only removing it costs; a new one costs change_penalty
+        'current_kept': change_penalty,
+        'change_added': -change_penalty
+    }
+
+
+def _objective_expression(objective_groups, coefficients):
+    """(expression, terms) of the objective: every group of variables times its coefficient"""
+    variables = []
+    weights = []
+    for group, group_vars in objective_groups.items():
+        if coefficients[group]:
+            variables.extend(group_vars)
+            weights.extend([coefficients[group]] * len(group_vars))
+    offset = -coefficients['current_kept'] * len(objective_groups.get('current_kept', ()))
+    return cp_model.LinearExpr.WeightedSum(variables, weights) + offset, len(variables)
+
+
+def _objective_mode(settings):
+    objective_mode = settings.get('objective_mode') or 'weighted'
+    if objective_mode not in OBJECTIVE_MODES:
+        raise ValueError(f"Unknown objective_mode '{objective_mode}', expected one of {OBJECTIVE_MODES}")
+    return objective_mode
+
+
+def _objective_value(objective_groups, coefficients, solution):
+    """Value of the weighted objective (_objective_expression) in solution, the value array of every variable"""
+    value = -coefficients['current_kept'] * len(objective_groups.get('current_kept', ()))
+    for group, group_vars in objective_groups.items():
+        if coefficients[group] and group_vars:
+            value += coefficients[group] * int(solution[[var.Index() for var in group_vars]].sum())
+    return value
+
+
+def _scenarios(data):
+    """Weight vectors of a scenario sweep, [] outside the 'scenarios' mode:
+    [{name, optimization_weights, fairness_weight}] with the request's weights as defaults"""
+    if data.get('mode') != SCENARIO_MODE:
+        return []
+    settings = data.get('settings', {})
+    entries = list(data.get('scenarios') or [])
+    entries += [{'name': f'fairness_weight={weight}', 'fairness_weight': weight}
+                for weight in data.get('fairness_weight_sweep') or []]
+    if not entries:
+        raise ValueError(f"Mode '{SCENARIO_MODE}' needs data.scenarios or data.fairness_weight_sweep")
+
+    base_weights = settings.get('optimization_weights', {})
+    return [{
+        'name': entry.get('name') or f'scenario_{index + 1}',
+        'optimization_weights': {**base_weights, **(entry.get('optimization_weights') or {})},
+        'fairness_weight': entry.get('fairness_weight', settings.get('fairness_weight', 50))
+    } for index, entry in enumerate(entries)]
+
+
+def _scenario_comparison(results):
+    """One row of unweighted schedule measures per scenario result"""
+    rows = []
+    for result in results:
+        stats = result.get('stats') or {}
+        workload = stats.get('workload_range') or {}
+        rows.append({
+            'scenario': result['name'],
+            'status': result['status'],
+            'objective': stats.get('objective_value'),
+            'bound': result.get('bound'),
+            'shortage': stats.get('total_shortage'),
+            'assignments': stats.get('total_assignments'),
+            'prefer_work_satisfied': stats.get('prefer_work_satisfied'),
+            'position_matches': stats.get('position_matches'),
+            'employees_used': len(stats['hours_per_employee']) if stats else None,
+            'workload_min': workload.get('min'),
+            'workload_max': workload.get('max'),
+            'fairness_penalty': stats.get('fairness_penalty'),
+            'solve_time': result.get('solve_time')
+        })
+    return rows
+
+
+def _min_rest_minutes(employee_codes, starts, ends):
+    """Shortest rest (minutes) between two consecutive shifts of one employee over
+    parallel arrays of assignments, None when nobody works twice"""
+    order = np.lexsort((starts, employee_codes))
+    employee_codes, starts, ends = employee_codes[order], starts[order], ends[order]
+    same_employee = employee_codes[1:] == employee_codes[:-1]
+    if not same_employee.any():
+        return None
+    return int((starts[1:] - ends[:-1])[same_employee].min())
+
+
+def _coverage_report(slot_requirements, candidate_counts, assigned_counts, days):
+    """One row per required slot: requirement, candidates, assigned staff and shortage"""
+    report = []
+    for slot, required in slot_requirements.items():
+        pos_id, shift_id, day_idx = slot
+        assigned = assigned_counts.get(slot, 0)
+        report.append({
+            'position_id': pos_id,
+            'shift_id': shift_id,
+            'date': days[day_idx]['date'],
+            'required': required,
+            'candidates': candidate_counts.get(slot, 0),
+            'assigned': assigned,
+            'shortage': max(0, required - assigned)
+        })
+    return report
+
+
+class AssignmentColumns:
+    """Assignment variables as flat int columns: proto index, employee, day, shift, position.
+
+    Filled while the variables are created (emp_vars order). After the search one bulk copy
+    of the solution vector gives every assignment value, and the schedule statistics are
+    array reductions over the chosen rows instead of one solver call per variable.
+    Employees, shifts and positions are stored as codes in first-seen order.
+    """
+
     def __init__(self):
+        self.var = array('i')
+        self.emp = array('i')
+        self.day = array('i')
+        self.shift = array('i')
+        self.pos = array('i')
+        self.employees = {}     # emp_id -> code
+        self.positions = {}     # pos_id -> code
+        self.shifts = {}        # shift_id -> code
+        self.shift_table = []   # code -> shift
+
+    def add(self, var, emp_id, day_idx, shift, pos_id):
+        shift_code = self.shifts.get(shift['shift_id'])
+        if shift_code is None:
+            shift_code = self.shifts[shift['shift_id']] = len(self.shift_table)
+            self.shift_table.append(shift)
+        self.var.append(var.Index())
+        self.emp.append(self.employees.setdefault(emp_id, len(self.employees)))
+        self.day.append(day_idx)
+        self.shift.append(shift_code)
+        self.pos.append(self.positions.setdefault(pos_id, len(self.positions)))
+
+    def chosen(self, solution):
+        """(emp, day, shift, pos) code arrays of the assignments set to 1 in solution,
+        the value array of every model variable"""
+        rows = np.flatnonzero(solution[np.frombuffer(self.var, dtype=np.intc)])
+        return tuple(np.frombuffer(column, dtype=np.intc)[rows]
+                     for column in (self.emp, self.day, self.shift, self.pos))
+
+
+class SolutionProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Reports every improving solution (objective, bound, gap, elapsed time, shortage)"""
+
+    def __init__(self, shortage_vars, on_progress):
+        super().__init__()
+        self._shortage_vars = shortage_vars
+        self._on_progress = on_progress
+        self.solutions = 0
+
+    def on_solution_callback(self):
+        self.solutions += 1
+        objective = self.ObjectiveValue()
+        bound = self.BestObjectiveBound()
+        self._on_progress({
+            'event': 'progress',
+            'solution': self.solutions,
+            'objective': objective,
+            'bound': bound,
+            'gap': abs(bound - objective) / max(1.0, abs(objective)),
+            'elapsed': self.WallTime(),
+            'shortage': sum(self.Value(var) for var in self._shortage_vars)
+        })
+
+
+class MemoryLimitExceeded(MemoryError):
+    """Raised by UniversalShiftSchedulerCP._lap when the build goes over settings.memory_limit_mb"""
+
+
+class UniversalShiftSchedulerCP:
+    def __init__(self, on_progress=None, stop_event=None):
+        """
+        on_progress - optional callable receiving a dict for every improving solution
+        stop_event  - optional Event-like object; once set, the search stops and the best
+                      solution found so far is returned
+        """
         self.model = cp_model.CpModel()
         self.solver = cp_model.CpSolver()
+        self.on_progress = on_progress
+        self.stop_event = stop_event
+        self.stopped_early = False
+        self.log_level = LOG_LEVELS['summary']
+        # Phase timings (ms) and constraints added per constraint family, see _lap()
+        self.profile = {'timings': {}, 'constraints': {}}
+        self._lap_started = time.perf_counter()
+        self._lap_constraints = 0
+        self._search_started = None
+        # (mode, classes, domains, shift minutes) of the symmetry breaking, used to order hints
+        self._symmetry = None
+        # Diagnosis mode: assumption literal of every guarded item (see _guard), else None
+        self._assumptions = None
+        # settings['lean_build'] drops variable names, see _new_bool_var
+        self._var_names = True
+        self._memory_limit = None
+
+    def _log(self, level, message):
+        """Print message if settings['log_level'] is at least level"""
+        if LOG_LEVELS[level] <= self.log_level:
+            print(message)
+
+    def _lap(self, family):
+        """Charge the time and constraints since the previous lap to a model-building phase"""
+        now = time.perf_counter()
+        constraint_count = len(self.model.Proto().constraints)
+        timings = self.profile['timings']
+        constraints = self.profile['constraints']
+        timings[family] = round(timings.get(family, 0.0) + (now - self._lap_started) * 1000, 3)
+        constraints[family] = constraints.get(family, 0) + constraint_count - self._lap_constraints
+        self._lap_started = now
+        self._lap_constraints = constraint_count
+
+        if self._memory_limit:
+            resident = _resident_memory_mb()
+            if resident is not None and resident > self._memory_limit:
+                raise MemoryLimitExceeded(f"Optimizer uses {resident:.0f} MB after building {family}, "
+                                          f"over memory_limit_mb ({self._memory_limit} MB)")
+
+    def _new_bool_var(self, *name):
+        """NewBoolVar named after the '_'-joined name parts, anonymous in a lean build"""
+        return self.model.NewBoolVar('_'.join(map(str, name)) if self._var_names else '')
+
+    def _new_int_var(self, lower, upper, *name):
+        """NewIntVar named after the '_'-joined name parts, anonymous in a lean build"""
+        return self.model.NewIntVar(lower, upper, '_'.join(map(str, name)) if self._var_names else '')
+
+    def _on_solver_log(self, line):
+        """CP-SAT log callback: marks the end of presolve, echoes the log in verbose mode"""
+        if self._search_started is None and line.startswith('Starting search at'):
+            self._search_started = float(line.split()[3].rstrip('s'))
+        self._log('verbose', line)
+
+    def _solver_profile(self, status):
+        """Search statistics and presolve/search split of the last Solve() call"""
+        wall_time = self.solver.WallTime()
+        presolve_time = wall_time if self._search_started is None else min(self._search_started, wall_time)
+        self.profile['timings']['presolve'] = round(presolve_time * 1000, 3)
+        self.profile['timings']['search'] = round((wall_time - presolve_time) * 1000, 3)
+
+        solver = {
+            'status': self.solver.StatusName(status),
+            'wall_time': wall_time,
+            'user_time': self.solver.UserTime(),
+            'deterministic_time': self.solver.ResponseProto().deterministic_time,
+            'conflicts': self.solver.NumConflicts(),
+            'branches': self.solver.NumBranches()
+        }
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            objective = self.solver.ObjectiveValue()
+            bound = self.solver.BestObjectiveBound()
+            solver.update({
+                'objective': objective,
+                'bound': bound,
+                'gap': abs(bound - objective) / max(1.0, abs(objective))
+            })
+        return solver
+
+    @contextlib.contextmanager
+    def _watch_stop_event(self, solver=None):
+        """Forward stop_event to the running solver (default self.solver) from a background thread"""
+        solver = solver or self.solver
+        if self.stop_event is None:
+            yield
+            return
+
+        solving = threading.Event()
+
+        def watch():
+            while not solving.wait(0.1):
+                if self.stop_event.is_set():
+                    self.stopped_early = True
+                    solver.StopSearch()
+
+        watcher = threading.Thread(target=watch, daemon=True)
+        watcher.start()
+        try:
+            yield
+        finally:
+            solving.set()
+            watcher.join()
+
+    def _solve_lexicographic(self, objective_groups, coefficients, shortage_vars, settings):
+        """Optimize the objective term groups stage by stage (LEXICOGRAPHIC_STAGES).
+
+        Every stage maximizes its own groups with their usual coefficients, so its objective
+        is smaller and proves optimal much sooner than the weighted sum. Its optimum (or best
+        solution, when the time ran out) is then fixed as a constraint and the next stage
+        is hinted with its solution. A stage without a solution ends the sequence.
+        Returns (solver of the last solved stage, its status, stage reports).
+        """
+        deadline = time.perf_counter() + float(settings.get('max_solve_time', 120.0))
+        stages = []
+        for name, groups in LEXICOGRAPHIC_STAGES:
+            stage_coefficients = {group: coefficient if group in groups else 0
+                                  for group, coefficient in coefficients.items()}
+            objective, objective_terms = _objective_expression(objective_groups, stage_coefficients)
+            if objective_terms:
+                stages.append((name, objective))
+
+        solved = None
+        reports = []
+        for position, (name, objective) in enumerate(stages):
+            if solved is not None and self.stop_event is not None and self.stop_event.is_set():
+                break
+            self.model.ClearObjective()
+            self.model.Maximize(objective)
+
+            solver = cp_model.CpSolver()
+            time_limit = max(0.1, (deadline - time.perf_counter()) / (len(stages) - position))
+            self._configure_solver({**settings, 'max_solve_time': time_limit}, solver)
+            solver.parameters.log_search_progress = True
+            solver.parameters.log_to_stdout = False
+            solver.log_callback = self._on_solver_log
+            self._search_started = None
+            callback = None
+            if self.on_progress:
+                def stage_progress(progress, stage=name):
+                    self.on_progress({**progress, 'stage': stage})
+                callback = SolutionProgressCallback(shortage_vars, stage_progress)
+            with self._watch_stop_event(solver):
+                status = solver.Solve(self.model, callback)
+
+            report = {'stage': name, 'status': solver.StatusName(status).lower(), 'time_limit': time_limit,
+                      'solve_time': solver.WallTime() * 1000, 'proven': status == cp_model.OPTIMAL}
+            reports.append(report)
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                self._log('summary', f"[Universal CP-SAT] Lexicographic stage {name}: no solution ({report['status']})")
+                if solved is None:
+                    return solver, status, reports
+                break
+
+            report.update({'objective': solver.ObjectiveValue(), 'bound': solver.BestObjectiveBound()})
+            self._log('summary', f"[Universal CP-SAT] Lexicographic stage {name}: {report}")
+            solved = (solver, status)
+            if position < len(stages) - 1:
+                self.model.Add(objective >= round(solver.ObjectiveValue()))
+                solution = list(solver.ResponseProto().solution)
+                self.model.ClearHints()
+                self.model.Proto().solution_hint.vars.extend(range(len(solution)))
+                self.model.Proto().solution_hint.values.extend(solution)
+        self._lap('lexicographic')
+
+        solver, status = solved
+        return solver, status, reports
+
+    def _solve_scenarios(self, scenarios, objective_groups, solution_result, shortage_vars, settings,
+                         warm_start, search_profile):
+        """Re-solve the built model for every weight vector of a scenario sweep.
+
+        Each scenario solves its own copy of the model with only the objective swapped.
+        Scenarios run in `parallel` lanes (threads, CP-SAT releases the GIL while searching);
+        within a lane every scenario is hinted with the solution of the one before it, so
+        neighbouring weight vectors warm-start each other, and gets its share of the time
+        left. The first scenario of a lane keeps the hints of the build (prior or greedy schedule).
+        """
+        started = time.perf_counter()
+        cores = settings.get('search_workers_cap') or os.cpu_count() or 1
+        parallel = max(1, min(len(scenarios), int(settings.get('scenario_parallel') or cores)))
+        scenario_settings = {**settings, 'search_workers_cap': max(1, cores // parallel)}
+        deadline = started + float(settings.get('max_solve_time', 120.0))
+        results = [None] * len(scenarios)
+        self._log('summary', f"[Universal CP-SAT] Scenario sweep: {len(scenarios)} weight vectors, {parallel} in "
+                             f"parallel with {scenario_settings['search_workers_cap']} search workers each")
+
+        def solve_lane(lane):
+            hint = None
+            hinted_by = None
+            lane_indexes = range(lane, len(scenarios), parallel)
+            for position, index in enumerate(lane_indexes):
+                scenario = scenarios[index]
+                result = {**scenario, 'hinted_by': hinted_by}
+                results[index] = result
+                if self.stop_event is not None and self.stop_event.is_set():
+                    result.update({'success': False, 'status': 'stopped', 'error': 'Stopped before solving'})
+                    continue
+
+                coefficients = _objective_coefficients(scenario['optimization_weights'], scenario['fairness_weight'])
+                objective, objective_terms = _objective_expression(objective_groups, coefficients)
+                model = self.model.Clone()
+                model.ClearObjective()
+                if objective_terms:
+                    model.Maximize(objective)
+                if hint is not None:
+                    model.ClearHints()
+                    model.Proto().solution_hint.vars.extend(range(len(hint)))
+                    model.Proto().solution_hint.values.extend(hint)
+
+                solver = cp_model.CpSolver()
+                time_limit = max(0.1, (deadline - time.perf_counter()) / (len(lane_indexes) - position))
+                self._configure_solver({**scenario_settings, 'max_solve_time': time_limit}, solver)
+                callback = None
+                if self.on_progress:
+                    def scenario_progress(progress, name=scenario['name']):
+                        self.on_progress({**progress, 'scenario': name})
+                    callback = SolutionProgressCallback(shortage_vars, scenario_progress)
+                with self._watch_stop_event(solver):
+                    status = solver.Solve(model, callback)
+
+                if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                    result.update(solution_result(solver, status, coefficients))
+                    result['bound'] = solver.BestObjectiveBound()
+                    hint = list(solver.ResponseProto().solution)
+                    hinted_by = scenario['name']
+                else:
+                    result.update({'success': False, 'status': solver.StatusName(status).lower(),
+                                   'error': f'No solution found. Status: {solver.StatusName(status)}',
+                                   'solve_time': solver.WallTime() * 1000})
+
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            list(executor.map(solve_lane, range(parallel)))
+        self._lap('scenarios')
+
+        comparison = _scenario_comparison(results)
+        for row in comparison:
+            self._log('summary', f"[Universal CP-SAT] Scenario {row['scenario']}: "
+                                 + ', '.join(f'{key} {value}' for key, value in row.items() if key != 'scenario'))
+
+        solved = [result for result in results if result['success']]
+        sweep = {
+            'success': bool(solved),
+            'mode': SCENARIO_MODE,
+            'status': ('optimal' if all(result['status'] == 'optimal' for result in results) else 'feasible')
+                      if solved else results[0]['status'],
+            'scenarios': results,
+            'comparison': comparison,
+            'solve_time': (time.perf_counter() - started) * 1000,
+            'warm_start': warm_start,
+            'search_profile': search_profile,
+            'stopped_early': self.stopped_early,
+            'profile': self.profile
+        }
+        if not solved:
+            sweep['error'] = 'No solution found for any scenario'
+        return sweep
+
+    def _add_lex_greater_equal(self, xs, ys, name):
+        """Literal vector xs >= ys lexicographically (equal-length vectors)"""
+        prefix_equal = None
+        for index, (x, y) in enumerate(zip(xs, ys)):
+            guard = [] if prefix_equal is None else [prefix_equal.Not()]
+            # Equal so far -> x >= y at this position
+            self.model.AddBoolOr(guard + [x, y.Not()])
+            if index == len(xs) - 1:
+                break
+            # equal <=> equal so far and x == y (x > y is the only other case left)
+            equal = self._new_bool_var('lex', name, index)
+            if prefix_equal is not None:
+                self.model.AddImplication(equal, prefix_equal)
+            self.model.AddBoolOr([equal.Not(), x.Not(), y])
+            self.model.AddBoolOr(guard + [x, equal])
+            self.model.AddBoolOr(guard + [y.Not(), equal])
+            prefix_equal = equal
+
+    def _order_symmetric_hint(self, hinted):
+        """Hinted assignment keys with the schedules of interchangeable employees handed out
+        in the symmetry breaking order, so the hint stays feasible"""
+        mode, classes, domains, shift_minutes = self._symmetry
+        by_employee = defaultdict(set)
+        for key in hinted:
+            by_employee[key[0]].add(key[1:])
+
+        def workload(row):
+            return sum(shift_minutes[shift_id] for _, shift_id, _ in row)
+
+        classified = {emp_id for emp_ids in classes for emp_id in emp_ids}
+        ordered = {key for key in hinted if key[0] not in classified}
+        for emp_ids in classes:
+            # Members share one domain, its order is the order of the lex vectors
+            domain = domains[emp_ids[0]]
+            rows = [by_employee.get(emp_id, set()) for emp_id in emp_ids]
+            rows.sort(key=workload if mode == 'workload' else (lambda row: [entry in row for entry in domain]),
+                      reverse=True)
+            for emp_id, row in zip(emp_ids, rows):
+                ordered.update((emp_id, *entry) for entry in row)
+        return ordered
+
+    def _add_at_most_one(self, literals, item):
+        """Pairs keep the plain a + b <= 1 form, larger cliques become AddAtMostOne
+        (a guarded sum in diagnosis mode, AddAtMostOne cannot be enforced by a literal)"""
+        if len(literals) == 2:
+            self._guard(self.model.Add(literals[0] + literals[1] <= 1), item)
+        elif self._assumptions is not None:
+            self._guard(self.model.Add(cp_model.LinearExpr.Sum(literals) <= 1), item)
+        else:
+            self.model.AddAtMostOne(literals)
+
+    def _guard(self, constraint, item):
+        """In diagnosis mode, enforce constraint only under the assumption literal of item.
+
+        Items are ('coverage', pos_id, shift_id, day_idx), a constraint family such as
+        ('min_rest',), a cannot-work entry (rule, emp_id, day_idx, shift_id or None) or
+        ('carry_over_rest', emp_id); see _describe_conflict.
+        """
+        if self._assumptions is not None:
+            literal = self._assumptions.get(item)
+            if literal is None:
+                literal = self._assumptions[item] = self._new_bool_var('assume', len(self._assumptions))
+            constraint.OnlyEnforceIf(literal)
+        return constraint
+
+    def _explain_infeasibility(self, data, limits, slot_requirements, time_limit):
+        """Diagnosis of an infeasible diagnosis-mode solve: the assumptions CP-SAT found
+        sufficient for infeasibility, shrunk by a deletion filter while time_limit lasts"""
+        started = time.perf_counter()
+        items = {literal.Index(): item for item, literal in self._assumptions.items()}
+        core = [items[index] for index in self.solver.SufficientAssumptionsForInfeasibility() if index in items]
+        found = len(core)
+
+        # Deletion filter: leave one item out at a time and drop it for good when the rest
+        # is still infeasible; the conflict is minimal once every item has been tried
+        minimal = bool(core)
+        for item in list(core):
+            if item not in core:
+                continue
+            remaining = time_limit - (time.perf_counter() - started)
+            if remaining <= 0:
+                minimal = False
+                break
+            trial = [other for other in core if other != item]
+            self.model.ClearAssumptions()
+            self.model.AddAssumptions([self._assumptions[other] for other in trial])
+            solver = cp_model.CpSolver()
+            solver.parameters.max_time_in_seconds = remaining
+            solver.parameters.num_workers = self.solver.parameters.num_workers
+            solver.parameters.stop_after_first_solution = True
+            status = solver.Solve(self.model)
+            if status == cp_model.INFEASIBLE:
+                # The core of the trial can be smaller than the trial itself
+                needed = {items[index] for index in solver.SufficientAssumptionsForInfeasibility() if index in items}
+                core = [other for other in trial if other in needed] if needed else trial
+            elif status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                minimal = False
+
+        elapsed = time.perf_counter() - started
+        self._log('summary', f"[Universal CP-SAT] Infeasibility core: {len(core)} of {found} assumptions "
+                             f"({'minimal' if minimal else 'not minimized'}, {elapsed:.2f}s)")
+        names = _conflict_names(data)
+        return {
+            'source': 'assumptions',
+            'conflicts': [_describe_conflict(item, data, limits, slot_requirements, names) for item in core],
+            'minimal': minimal,
+            'solve_time': (self.solver.WallTime() + elapsed) * 1000
+        }
 
-    def optimize_schedule(self, data):
-        """Universal schedule optimization with all constraints support"""
-        print(f"[Universal CP-SAT] Starting optimization...")
+    def _configure_solver(self, settings, solver=None):
+        """Apply max_solve_time, the search profile and explicit solver settings to solver
+        (default self.solver).
+
+        Returns the profile name and the parameters that were applied, echoed in the result.
+        """
+        solver = solver or self.solver
+        profile_name = settings.get('search_profile') or OPTIMIZATION_MODE_PROFILES.get(
+            settings.get('optimizationMode') or settings.get('optimization_mode'), 'balanced')
+        if profile_name not in SEARCH_PROFILES:
+            self._log('summary', f"[Universal CP-SAT] Unknown search profile '{profile_name}', using 'balanced'")
+            profile_name = 'balanced'
+
+        parameters = dict(SEARCH_PROFILES[profile_name])
+        max_solve_time = float(settings.get('max_solve_time', 120.0))
+        parameters['max_time_in_seconds'] = min(max_solve_time,
+                                                parameters.get('max_time_in_seconds', max_solve_time))
+
+        for setting_key, (parameter, cast) in SOLVER_SETTING_PARAMETERS.items():
+            if settings.get(setting_key) is not None:
+                parameters[parameter] = cast(settings[setting_key])
+
+        # Pool/batch workers share the machine, each solve gets its slice of the cores
+        workers_cap = settings.get('search_workers_cap')
+        if workers_cap:
+            parameters['num_workers'] = min(parameters.get('num_workers') or workers_cap, workers_cap)
+
+        for parameter, value in parameters.items():
+            setattr(solver.parameters, parameter, value)
+
+        self._log('summary', f"[Universal CP-SAT] Search profile '{profile_name}': {parameters}")
+        return {'name': profile_name, 'parameters': parameters}
+
+    def _add_schedule_hints(self, prior_schedule, days, assignments):
+        """Hint CP-SAT with a prior schedule (previous week or a partially edited draft).
+
+        Entries are matched by date when it falls inside the requested days, otherwise
+        by weekday so last week's schedule maps onto the same days of every week of the horizon.
+        Returns the number of prior assignments kept as hints.
+        """
+        if not prior_schedule:
+            return 0
+
+        date_index = {day['date']: day_idx for day_idx, day in enumerate(days)}
+        weekday_index = defaultdict(list)
+        for day_idx, day in enumerate(days):
+            weekday_index[day.get('weekday', _js_weekday(day['date']))].append(day_idx)
+
+        hinted = set()
+        kept = 0
+        for entry in prior_schedule:
+            date_str = str(entry.get('date', ''))[:10]
+            day_indexes = [date_index[date_str]] if date_str in date_index else None
+            if day_indexes is None:
+                try:
+                    day_indexes = weekday_index.get(_js_weekday(date_str), [])
+                except ValueError:
+                    continue
+
+            keys = [(entry.get('emp_id'), day_idx, entry.get('shift_id'), entry.get('position_id'))
+                    for day_idx in day_indexes]
+            matched = [key for key in keys if key in assignments]
+            if matched:
+                hinted.update(matched)
+                kept += 1
+
+        if not hinted:
+            return 0
+        if self._symmetry is not None:
+            hinted = self._order_symmetric_hint(hinted)
+
+        # Complete hint over the assignment variables: prior shifts on, everything else off
+        for key, var in assignments.items():
+            self.model.AddHint(var, 1 if key in hinted else 0)
+
+        return kept
+
+    def optimize_schedule(self, data, current_schedule=None, neighborhood=None):
+        """Universal schedule optimization with all constraints support.
+
+        current_schedule / neighborhood are used by repair_schedule(): assignments
+        outside the neighborhood (emp_ids, day_indexes) are fixed to their value in
+        current_schedule (a set of assignment keys) and changes inside it are penalized.
+
+        Every result carries a 'profile' section: per-phase timings in ms, constraints
+        added per constraint family, model size and CP-SAT search statistics. A build
+        over settings.memory_limit_mb fails with status MEMORY_LIMIT_STATUS.
+        """
+        try:
+            return self._optimize_schedule(data, current_schedule, neighborhood)
+        except MemoryLimitExceeded as e:
+            self._log('summary', f"[Universal CP-SAT] {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'status': MEMORY_LIMIT_STATUS,
+                'profile': self.profile
+            }
+
+    def _optimize_schedule(self, data, current_schedule, neighborhood):
+        settings = data.get('settings', {})
+        self.log_level = LOG_LEVELS.get(settings.get('log_level'), LOG_LEVELS['summary'])
+        self._lap_started = time.perf_counter()
+        self._log('summary', f"[Universal CP-SAT] Starting optimization...")
+
+        lean_build = bool(settings.get('lean_build'))
+        self._var_names = not lean_build
+        self._memory_limit = settings.get('memory_limit_mb')
+
+        diagnosis_mode = _infeasibility_diagnosis_mode(settings)
+        if diagnosis_mode == 'assumptions':
+            self._assumptions = {}
+        objective_mode = _objective_mode(settings)
 
         # Extract data
         employees = data['employees']
         shifts = data['shifts']
         positions = data['positions']
         days = data['days']
-        constraints = data['constraints']
-        settings = data.get('settings', {})
-        position_shifts_map = data.get('position_shifts_map', {})
 
-        hard_constraints = settings.get('hard_constraints', {})
-        soft_constraints = settings.get('soft_constraints', {})
         optimization_weights = settings.get('optimization_weights', {})
-
-        permanent_cannot_work = constraints.get('permanent_cannot_work', [])
-        temporary_cannot_work = constraints.get('cannot_work', [])
-        prefer_work = constraints.get('prefer_work', [])
-
-        print(f"[Universal CP-SAT] Constraints loaded:")
-        print(f"  - Permanent cannot work: {len(permanent_cannot_work)}")
-        print(f"  - Temporary cannot work: {len(temporary_cannot_work)}")
-        print(f"  - Prefer work: {len(prefer_work)}")
-
-        # Hard constraints (law) - in MINUTES
-        max_minutes_per_day = hard_constraints.get('MAX_HOURS_PER_DAY', 12) * 60
-        max_minutes_per_week = hard_constraints.get('MAX_HOURS_PER_WEEK', 48) * 60
-        min_rest_minutes_between_shifts = hard_constraints.get('MIN_REST_BETWEEN_SHIFTS', 11) * 60
-        min_rest_minutes_after_night = hard_constraints.get('MIN_REST_AFTER_NIGHT_SHIFT', 12) * 60
-        min_rest_minutes_after_regular = hard_constraints.get('MIN_REST_AFTER_REGULAR_SHIFT', 11) * 60
-        max_night_shifts_per_week = hard_constraints.get('MAX_NIGHT_SHIFTS_PER_WEEK', 3)
-
-        # Soft constraints (admin settings) - READ WITH UPPERCASE KEYS
-        max_shifts_per_day = soft_constraints.get('MAX_SHIFTS_PER_DAY', 1)
-        max_consecutive_work_days = soft_constraints.get('MAX_CONSECUTIVE_WORK_DAYS', 6)
-        max_cannot_work_days = soft_constraints.get('MAX_CANNOT_WORK_DAYS_PER_WEEK', 2)
-        max_prefer_work_days = soft_constraints.get('MAX_PREFER_WORK_DAYS_PER_WEEK', 5)
+        fairness_weight = settings.get('fairness_weight', 50)  # 0-100, where 0=efficiency, 100=fairness
+        coefficients = _objective_coefficients(optimization_weights, fairness_weight)
+        # A scenario sweep re-weights one model, which holds the terms of all its weight vectors
+        scenarios = _scenarios(data)
+        objective_vectors = [_objective_coefficients(scenario['optimization_weights'], scenario['fairness_weight'])
+                             for scenario in scenarios] or [coefficients]
+
+        # Requirement array and constraint columns, from either input format; prefer-work
+        # entries as [(emp_id, day_idx, shift_id or None)] for the objective and statistics
+        arrays = InputArrays(data)
+        permanent_count = len(arrays.constraints['permanent_cannot_work'][0])
+        temporary_count = len(arrays.constraints['cannot_work'][0])
+        prefer_work = _load_constraints(data, 'prefer_work')
+
+        self._log('summary', f"[Universal CP-SAT] Constraints loaded:")
+        self._log('summary', f"  - Permanent cannot work: {permanent_count}")
+        self._log('summary', f"  - Temporary cannot work: {temporary_count}")
+        self._log('summary', f"  - Prefer work: {len(prefer_work)}")
+
+        # Hard constraints (law) in MINUTES and soft constraints (admin settings)
+        limits = _schedule_limits(settings)
+        max_minutes_per_day = limits['max_minutes_per_day']
+        max_minutes_per_week = limits['max_minutes_per_week']
+        min_rest_minutes_between_shifts = limits['min_rest_between_shifts']
+        min_rest_minutes_after_night = limits['min_rest_after_night']
+        min_rest_minutes_after_regular = limits['min_rest_after_regular']
+        max_night_shifts_per_week = limits['max_night_shifts_per_week']
+        max_shifts_per_day = limits['max_shifts_per_day']
+        max_consecutive_work_days = limits['max_consecutive_work_days']
 
         # Optimization weights - READ WITH UPPERCASE KEYS
         shortage_penalty = optimization_weights.get('SHORTAGE_PENALTY', 1000)
@@ -84,535 +1472,1969 @@ class UniversalShiftSchedulerCP:
         site_match_bonus = optimization_weights.get('SITE_MATCH_BONUS', 10)
         excess_assignment_penalty = optimization_weights.get('EXCESS_ASSIGNMENT_PENALTY', 100)
 
-        print(f"[Universal CP-SAT] Configuration from constants:")
-        print(f"  - Max {max_minutes_per_day / 60}h/day, min {min_rest_minutes_between_shifts / 60}h rest")
-        print(f"  - Max {max_shifts_per_day} shifts/day, {max_consecutive_work_days} consecutive days")
-        print(f"  - Shortage penalty: {shortage_penalty}, Prefer work bonus: {prefer_work_bonus}")
-
-        # Initialize objective terms list EARLY
-        objective_terms = []
-
-        # Create decision variables
+        self._log('summary', f"[Universal CP-SAT] Configuration from constants:")
+        self._log('summary', f"  - Max {max_minutes_per_day / 60}h/day, min {min_rest_minutes_between_shifts / 60}h rest")
+        self._log('summary', f"  - Max {max_shifts_per_day} shifts/day, {max_consecutive_work_days} consecutive days")
+        self._log('summary', f"  - Shortage penalty: {shortage_penalty}, Prefer work bonus: {prefer_work_bonus}")
+
+        # Horizon of one or more calendar weeks; weekly limits apply per week
+        week_of_day = _calendar_weeks(days)
+        horizon_weeks = max(week_of_day, default=0) + 1
+        max_minutes_per_horizon = max_minutes_per_week * horizon_weeks
+        self._log('summary', f"[Universal CP-SAT] Horizon: {len(days)} days, {horizon_weeks} week(s)")
+
+        # Objective terms by weight group (see _objective_coefficients), weighted at the end
+        objective_groups = defaultdict(list)
+
+        employees_by_id = {emp['emp_id']: emp for emp in employees}
+
+        # Valid shifts for every staffed position
+        position_valid_shifts = _staffed_position_shifts(data)
+
+        # 1. FEASIBLE DOMAIN PRE-PASS
+        # Work out which (employee, day, shift) assignments can ever be 1 before creating
+        # any variable: permanent and temporary cannot-work entries and slots without a
+        # requirement are excluded here instead of being fixed to zero in the model.
+
+        # 1.1 Slots with a requirement (NO REQUIREMENT = no assignments for this day/shift/position)
+        slot_columns = arrays.slots(position_valid_shifts)
+        slot_requirements = _slot_requirements(slot_columns)
+        self._lap('requirements')
+
+        # 1.2 PERMANENT CONSTRAINTS (the highest priority - absolutely cannot be violated)
+        # 1.3 TEMPORARY CANNOT WORK CONSTRAINTS (second priority)
+        # (whole_day, blocked) masks over [employee, day(, shift)] indexes
+        permanent_blocks = arrays.blocks('permanent_cannot_work')
+        temporary_blocks = arrays.blocks('cannot_work')
+
+        # 1.4 REST AFTER THE PREVIOUS SCHEDULE: shifts starting too soon after the last
+        # shift worked before the horizon are excluded like cannot-work entries
+        carry_over = _load_carry_over(data)
+        rest_deadlines = _rest_deadlines(carry_over, limits)
+        self._lap('cannot_work')
+
+        # Create decision variables (feasible domain only).
+        # Every variable is also recorded in lookup indexes so the constraint
+        # sections below only visit variables that actually exist:
+        #   emp_vars[emp_id]                     -> [(day_idx, shift, pos_id, var)]
+        #   emp_day_vars[(emp_id, day_idx)]      -> [(shift, pos_id, var)]
+        #   slot_vars[(pos_id, shift_id, day)]   -> [(emp_id, var)]
+        #   columns                              -> AssignmentColumns read after the search
+        # Diagnosis mode also creates the variables of blocked assignments (not listed in
+        # assignments), fixed to 0 under the assumption of the first blocking reason
         assignments = {}
-        for emp in employees:
-            emp_id = emp['emp_id']
-            emp_position = emp.get('default_position_id')
-
-            for day_idx, day in enumerate(days):
-                for position in positions:
-                    pos_id = position['pos_id']
-
-                    # Create variables ONLY for the employee position.
-                    if emp_position != pos_id:
-                        continue
-
-                    pos_str = str(pos_id)
-                    # Get valid shifts for this position
-                    valid_shifts = position_shifts_map.get(pos_str, [])
-
-                    for shift in shifts:
-                        # Only create variable if this shift belongs to this position
-                        if shift['shift_id'] in valid_shifts:
-                            var_name = f"assign_{emp_id}_{day_idx}_{shift['shift_id']}_{pos_id}"
-                            assignments[(emp_id, day_idx, shift['shift_id'], pos_id)] = \
-                                self.model.NewBoolVar(var_name)
-
-        print(f"[CP-SAT] Created {len(assignments)} assignment variables")
+        emp_vars = defaultdict(list)
+        emp_day_vars = defaultdict(list)
+        slot_vars = defaultdict(list)
+        slot_candidates = defaultdict(list)  # (pos_id, shift_id, day) -> emp_ids that can be assigned
+        columns = AssignmentColumns()
+        pruned = {'permanent': 0, 'temporary': 0, 'carry_over_rest': 0, 'no_requirement': 0}
+
+        domain = _assignment_domain(employees, position_valid_shifts, arrays, permanent_blocks, temporary_blocks,
+                                    rest_deadlines)
+        for key, shift, excluded_by in domain:
+            emp_id, day_idx, shift_id, pos_id = key
+            if excluded_by is not None:
+                pruned[excluded_by] += 1
+                if self._assumptions is None or (pos_id, shift_id, day_idx) not in slot_requirements:
+                    continue
+
+            var = self._new_bool_var('assign', emp_id, day_idx, shift_id, pos_id)
+            if excluded_by is None:
+                assignments[key] = var
+                slot_candidates[(pos_id, shift_id, day_idx)].append(emp_id)
+            elif excluded_by == 'carry_over_rest':
+                self._guard(self.model.Add(var == 0), ('carry_over_rest', emp_id))
+            else:
+                whole_day, _ = permanent_blocks if excluded_by == 'permanent' else temporary_blocks
+                rule = 'permanent_cannot_work' if excluded_by == 'permanent' else 'cannot_work'
+                blocked_shift = None if whole_day[arrays.employee_index[emp_id], day_idx] else shift_id
+                self._guard(self.model.Add(var == 0), (rule, emp_id, day_idx, blocked_shift))
+            emp_vars[emp_id].append((day_idx, shift, pos_id, var))
+            emp_day_vars[(emp_id, day_idx)].append((shift, pos_id, var))
+            slot_vars[(pos_id, shift_id, day_idx)].append((emp_id, var))
+            columns.add(var, emp_id, day_idx, shift, pos_id)
+        self._lap('variables')
+
+        assignment_count = len(assignments)
+        self._log('summary', f"[CP-SAT] Created {assignment_count} assignment variables")
+        self._log('summary', f"[Universal CP-SAT] Pruned {pruned['permanent']} by permanent constraints, "
+                             f"{pruned['temporary']} by temporary constraints, "
+                             f"{pruned['carry_over_rest']} by rest after the previous schedule, "
+                             f"{pruned['no_requirement']} without requirement")
+        self._log('summary', f"[Universal CP-SAT] Total blocked assignments: {pruned['permanent']}")
+
+        # 1.5 CAPACITY PRE-CHECK: exact coverage that no search can meet (more shifts,
+        # hours or nights than the candidates may work) fails right away
+        understaffed = []
+        if diagnosis_mode != 'off':
+            conflicts, understaffed = _capacity_precheck(data, position_valid_shifts, slot_requirements,
+                                                         slot_candidates, week_of_day, limits)
+            self._lap('precheck')
+            if understaffed:
+                self._log('summary', f"[Universal CP-SAT] {len(understaffed)} slots have fewer candidates than required")
+            if conflicts:
+                for conflict in conflicts:
+                    self._log('summary', f"[Universal CP-SAT] Infeasible: {conflict['message']}")
+                return {
+                    'success': False,
+                    'error': f"Infeasible before search: {conflicts[0]['message']}",
+                    'status': str(cp_model.INFEASIBLE),
+                    'profile': self.profile,
+                    'diagnosis': {'source': 'precheck', 'conflicts': conflicts, 'understaffed': understaffed},
+                    'details': {
+                        'variables': len(assignments),
+                        'pruned_assignments': pruned
+                    }
+                }
 
-        # 1. APPLY ALL CONSTRAINTS IN ORDER OF PRIORITY
+        # 2. POSITION COVERAGE CONSTRAINTS (with EXACT requirements)
+        shortage_vars = []
+        candidate_counts = {}  # slot -> candidates, for the coverage report
 
-        # 1.1 PERMANENT CONSTRAINTS (the highest priority - absolutely cannot be violated)
-        applied_permanent = 0
-        blocked_assignments = set()  # Track what we've blocked
+        for pos_id, shift_id, day_idx, required_employees in zip(*slot_columns):
+            date_str = days[day_idx]['date']
 
-        for perm_constraint in permanent_cannot_work:
-            emp_id = perm_constraint['emp_id']
-            day_idx = perm_constraint['day_index']
-            shift_id = perm_constraint.get('shift_id')
+            self._log('verbose', f"[CP-SAT] Position {pos_id} shift {shift_id} on {date_str}: needs {required_employees} staff")
 
-            print(f"[CP-SAT] Applying permanent constraint: emp={emp_id}, day={day_idx}, shift={shift_id}")
+            # Only employees with matching position that are not blocked can work
+            assignment_vars = [var for _, var in slot_vars.get((pos_id, shift_id, day_idx), [])]
+            candidates = len(slot_candidates.get((pos_id, shift_id, day_idx), ()))
+            candidate_counts[(pos_id, shift_id, day_idx)] = candidates
 
-            # Find an employee's position
-            emp = next((e for e in employees if e['emp_id'] == emp_id), None)
-            if not emp:
-                continue
+            # Create a variable for actual assignments
+            actual_assigned = self._new_int_var(0, len(assignment_vars), 'actual', day_idx, shift_id, pos_id)
+            self.model.Add(actual_assigned == cp_model.LinearExpr.Sum(assignment_vars))
 
-            emp_position_id = emp.get('default_position_id')
-
-            if shift_id is not None:
-                # Specific shift constraint - block only this shift
-                key = (emp_id, day_idx, shift_id, emp_position_id)
-                if key in assignments:
-                    self.model.Add(assignments[key] == 0)
-                    blocked_assignments.add(key)
-                    applied_permanent += 1
-                    print(f"[CP-SAT] Blocked: emp {emp_id} on day {day_idx} shift {shift_id}")
-            else:
-                # All shifts on this day - block ALL shift for this employee
-                blocked_count = 0
-                for shift in shifts:
-                    key = (emp_id, day_idx, shift['shift_id'], emp_position_id)
-                    if key in assignments:
-                        self.model.Add(assignments[key] == 0)
-                        blocked_assignments.add(key)
-                        applied_permanent += 1
-                        blocked_count += 1
-                print(f"[CP-SAT] Blocked ALL {blocked_count} shifts for emp {emp_id} on day {day_idx}")
-
-        print(f"[Universal CP-SAT] Applied {applied_permanent} permanent constraint variables")
-        print(f"[Universal CP-SAT] Total blocked assignments: {len(blocked_assignments)}")
-
-        # 1.2 TEMPORARY CANNOT WORK CONSTRAINTS (second priority)
-        applied_temporary = 0
-        for constraint in temporary_cannot_work:
-            emp_id = constraint['emp_id']
-            day_idx = constraint['day_index']
-            shift_id = constraint.get('shift_id')
-
-            if shift_id is not None:
-                # Specific shift constraint
-                for position in positions:
-                    key = (emp_id, day_idx, shift_id, position['pos_id'])
-                    if key in assignments:
-                        self.model.Add(assignments[key] == 0)
-                        applied_temporary += 1
+            # HARD CONSTRAINT: Must assign EXACTLY the required number
+            if candidates >= required_employees:
+                # We have enough employees - enforce exact requirement
+                self._guard(self.model.Add(actual_assigned == required_employees),
+                            ('coverage', pos_id, shift_id, day_idx))
+                self._log('verbose',
+                    f"[CP-SAT] Constraint: {candidates} candidates, EXACTLY {required_employees} required")
             else:
-                # All shifts on this day
-                for shift in shifts:
-                    for position in positions:
-                        key = (emp_id, day_idx, shift['shift_id'], position['pos_id'])
-                        if key in assignments:
-                            self.model.Add(assignments[key] == 0)
-                            applied_temporary += 1
-
-        print(f"[Universal CP-SAT] Applied {applied_temporary} temporary constraint variables")
+                # Not enough employees - do the best we can
+                self.model.Add(actual_assigned <= required_employees)
+                shortage_var = self._new_int_var(0, required_employees, 'shortage', day_idx, shift_id, pos_id)
+                self.model.Add(shortage_var == required_employees - actual_assigned)
+                shortage_vars.append(shortage_var)
+                self._log('verbose',
+                    f"[CP-SAT] Warning: Only {candidates} candidates for {required_employees} required")
 
-        # 2. POSITION COVERAGE CONSTRAINTS (with EXACT requirements)
-        shortage_vars = []
-        shift_requirements = data.get('shift_requirements', {})
-
-        # Create limitations ONLY for existing requirements.
-        for day_idx, day in enumerate(days):
-            date_str = day['date']
-
-            for position in positions:
-                pos_id = position['pos_id']
-                pos_str = str(pos_id)
-
-                # Get valid shifts for this position
-                valid_shifts = position_shifts_map.get(pos_str, [])
-
-                for shift_id in valid_shifts:
-                    # Find requirement
-                    requirement_key = f"{pos_id}-{shift_id}-{date_str}"
-                    requirement = shift_requirements.get(requirement_key)
-
-                    # Process ONLY if there is a requirement.
-                    if requirement and requirement.get('required_staff', 0) > 0:
-                        required_employees = requirement.get('required_staff')
-
-                        print(
-                            f"[CP-SAT] Position {pos_id} shift {shift_id} on {date_str}: needs {required_employees} staff")
-
-                        assignment_vars = []
-
-                        # Only employees with matching position can work
-                        for emp in employees:
-                            if emp.get('default_position_id') == pos_id:
-                                key = (emp['emp_id'], day_idx, shift_id, pos_id)
-                                if key in assignments:
-                                    assignment_vars.append(assignments[key])
-
-                        if assignment_vars:
-                            # Create a variable for actual assignments
-                            actual_assigned = self.model.NewIntVar(
-                                0, len(assignment_vars),
-                                f"actual_{day_idx}_{shift_id}_{pos_id}"
-                            )
-                            self.model.Add(actual_assigned == sum(assignment_vars))
-
-                            # HARD CONSTRAINT: Must assign EXACTLY the required number
-                            if len(assignment_vars) >= required_employees:
-                                # We have enough employees - enforce exact requirement
-                                self.model.Add(actual_assigned == required_employees)
-                                print(
-                                    f"[CP-SAT] Constraint: {len(assignment_vars)} candidates, EXACTLY {required_employees} required")
-                            else:
-                                # Not enough employees - do the best we can
-                                self.model.Add(actual_assigned <= required_employees)
-                                shortage_var = self.model.NewIntVar(
-                                    0, required_employees,
-                                    f"shortage_{day_idx}_{shift_id}_{pos_id}"
-                                )
-                                self.model.Add(shortage_var == required_employees - actual_assigned)
-                                shortage_vars.append(shortage_var)
-                                print(
-                                    f"[CP-SAT] Warning: Only {len(assignment_vars)} candidates for {required_employees} required")
-                    else:
-                        # NO REQUIREMENT = we prohibit assignments for this day/shift/position
-                        for emp in employees:
-                            if emp.get('default_position_id') == pos_id:
-                                key = (emp['emp_id'], day_idx, shift_id, pos_id)
-                                if key in assignments:
-                                    # Assignment is prohibited if there is no requirement.
-                                    self.model.Add(assignments[key] == 0)
-
-        print(f"[CP-SAT] Total shortage variables: {len(shortage_vars)}")
+        self._log('summary', f"[CP-SAT] Total shortage variables: {len(shortage_vars)}")
+        self._lap('coverage')
 
         # 3. HARD CONSTRAINTS (LEGAL REQUIREMENTS)
 
-        # 3.1 Maximum hours per day
-        for emp in employees:
-            emp_id = emp['emp_id']
-            for day_idx in range(len(days)):
-                day_minutes = []
-                day_assignments = []
-                for shift in shifts:
-                    for position in positions:
-                        key = (emp_id, day_idx, shift['shift_id'], position['pos_id'])
-                        if key in assignments:
-                            assignment_var = assignments[key]
-                            day_assignments.append(assignment_var)
-                            ## FIXED ## - Use duration_minutes for calculations
-                            day_minutes.append(assignment_var * shift['duration_minutes'])
-
-                if day_minutes:
-                    self.model.Add(sum(day_minutes) <= max_minutes_per_day)
-                if day_assignments:
-                    self.model.Add(sum(day_assignments) <= max_shifts_per_day)
-
-        # 3.2 Maximum hours per week
-        for emp in employees:
-            emp_id = emp['emp_id']
-            week_minutes = []
-            for day_idx in range(len(days)):
-                for shift in shifts:
-                    for position in positions:
-                        key = (emp_id, day_idx, shift['shift_id'], position['pos_id'])
-                        if key in assignments:
-                            assignment_var = assignments[key]
-                            ## FIXED ## - Use duration_minutes for calculations
-                            week_minutes.append(assignment_var * shift['duration_minutes'])
-            if week_minutes:
-                self.model.Add(sum(week_minutes) <= max_minutes_per_week)
-
-        # 3.3 Minimum rest between shifts on same day
-        for emp in employees:
-            emp_id = emp['emp_id']
-            for day_idx in range(len(days)):
-                for i, shift1 in enumerate(shifts):
-                    for j, shift2 in enumerate(shifts):
-                        if i < j:
-                            ## FIXED ## - Use helper function for minutes
-                            rest_minutes = _calculate_rest_minutes(shift1, shift2, False)
-                            if rest_minutes < min_rest_minutes_between_shifts:
-                                for position in positions:
-                                    key1 = (emp_id, day_idx, shift1['shift_id'], position['pos_id'])
-                                    key2 = (emp_id, day_idx, shift2['shift_id'], position['pos_id'])
-                                    if key1 in assignments and key2 in assignments:
-                                        self.model.Add(assignments[key1] + assignments[key2] <= 1)
-
-        # 3.4 Minimum rest between shifts on consecutive days
-        for emp in employees:
-            emp_id = emp['emp_id']
-            for day_idx in range(len(days) - 1):
-                for shift1 in shifts:
-                    for shift2 in shifts:
-                        rest_minutes = _calculate_rest_minutes(shift1, shift2, True)
-
-                        # Use appropriate rest requirement based on shift type
-                        required_rest = min_rest_minutes_after_night \
-                            if shift1.get('is_night_shift', False) \
-                            else min_rest_minutes_after_regular
-
-                        if rest_minutes < required_rest:
-                            for position in positions:
-                                key1 = (emp_id, day_idx, shift1['shift_id'], position['pos_id'])
-                                key2 = (emp_id, day_idx + 1, shift2['shift_id'], position['pos_id'])
-                                if key1 in assignments and key2 in assignments:
-                                    self.model.Add(assignments[key1] + assignments[key2] <= 1)
+        # 3.1 Maximum hours and shifts per day.
+        # day_worked[(emp_id, day_idx)] is the one "works that day" literal shared by the
+        # shifts per day limit, the consecutive days windows (4.1) and the employee used
+        # penalty (5.4): the shift variable itself for a single candidate shift, the sum of
+        # the shift variables when at most one shift a day is allowed, else their maximum
+        day_worked = {}
+        for (emp_id, day_idx), day_entries in emp_day_vars.items():
+            ## FIXED ## - Use duration_minutes for calculations
+            shift_vars = [var for _, _, var in day_entries]
+            day_minutes = cp_model.LinearExpr.WeightedSum(
+                shift_vars, [shift['duration_minutes'] for shift, _, _ in day_entries])
+            self._guard(self.model.Add(day_minutes <= max_minutes_per_day), ('max_hours_per_day',))
+
+            # The sum form enforces the limit itself, which diagnosis mode must keep guarded
+            single_shift = max_shifts_per_day == 1 and self._assumptions is None
+            if len(shift_vars) == 1:
+                worked = shift_vars[0]
+            else:
+                worked = self._new_bool_var('worked', emp_id, day_idx)
+                if single_shift:
+                    self.model.Add(cp_model.LinearExpr.Sum(shift_vars) == worked)
+                else:
+                    self.model.AddMaxEquality(worked, shift_vars)
+            if max_shifts_per_day < len(shift_vars) and not single_shift:
+                self._guard(self.model.Add(cp_model.LinearExpr.Sum(shift_vars) <= max_shifts_per_day * worked),
+                            ('max_shifts_per_day',))
+            day_worked[(emp_id, day_idx)] = worked
+        self._lap('daily_limits')
+
+        # 3.2 Maximum hours per week (per calendar week of the horizon)
+        for entries in emp_vars.values():
+            ## FIXED ## - Use duration_minutes for calculations
+            week_vars = defaultdict(list)
+            week_minutes = defaultdict(list)
+            for day_idx, shift, _, var in entries:
+                week_vars[week_of_day[day_idx]].append(var)
+                week_minutes[week_of_day[day_idx]].append(shift['duration_minutes'])
+            for week, minutes in week_minutes.items():
+                self._guard(self.model.Add(cp_model.LinearExpr.WeightedSum(week_vars[week], minutes)
+                                           <= max_minutes_per_week), ('max_hours_per_week',))
+        self._lap('weekly_limits')
+
+        # 3.3 / 3.4 Minimum rest between shifts (same day and consecutive days).
+        # Conflicts are computed once per position and emitted as at-most-one cliques.
+        rest_tables = {
+            pos_id: _build_rest_conflicts(pos_shifts, min_rest_minutes_between_shifts,
+                                          min_rest_minutes_after_night, min_rest_minutes_after_regular)
+            for pos_id, pos_shifts in position_valid_shifts.items()
+        }
+        rest_constraints = 0
+
+        for (emp_id, day_idx), day_entries in emp_day_vars.items():
+            next_day_entries = emp_day_vars.get((emp_id, day_idx + 1), [])
+            for pos_id, (same_day_cliques, next_day_cliques) in rest_tables.items():
+                day_vars = {shift['shift_id']: var for shift, p, var in day_entries if p == pos_id}
+                if not day_vars:
+                    continue
+                next_day_vars = {shift['shift_id']: var for shift, p, var in next_day_entries if p == pos_id}
+
+                for clique in same_day_cliques:
+                    literals = [day_vars[shift_id] for shift_id in clique if shift_id in day_vars]
+                    if len(literals) >= 2:
+                        self._add_at_most_one(literals, ('min_rest',))
+                        rest_constraints += 1
+
+                if not next_day_vars:
+                    continue
+                for clique in next_day_cliques:
+                    today = [day_vars[shift_id] for offset, shift_id in clique
+                             if offset == 0 and shift_id in day_vars]
+                    tomorrow = [next_day_vars[shift_id] for offset, shift_id in clique
+                                if offset == 1 and shift_id in next_day_vars]
+                    if today and tomorrow:
+                        self._add_at_most_one(today + tomorrow, ('min_rest',))
+                        rest_constraints += 1
+
+        self._log('summary', f"[Universal CP-SAT] Rest constraints: {rest_constraints}")
+        self._lap('rest')
 
         # 4. SOFT CONSTRAINTS
 
         # 4.1 Maximum consecutive work days
-        for emp in employees:
-            emp_id = emp['emp_id']
-            for start_day in range(len(days) - max_consecutive_work_days):
-                consecutive_vars = []
-                for day_offset in range(max_consecutive_work_days + 1):
-                    day_idx = start_day + day_offset
-                    day_worked = self.model.NewBoolVar(f"worked_{emp_id}_{day_idx}")
-
-                    # Day is worked if any shift is assigned
-                    shift_vars = []
-                    for shift in shifts:
-                        for position in positions:
-                            if (emp_id, day_idx, shift['shift_id'], position['pos_id']) in assignments:
-                                shift_vars.append(assignments[(emp_id, day_idx, shift['shift_id'], position['pos_id'])])
-
-                    if shift_vars:
-                        self.model.AddMaxEquality(day_worked, shift_vars)
-                        consecutive_vars.append(day_worked)
-
-                # Limit consecutive days
-                if consecutive_vars:
-                    self.model.Add(sum(consecutive_vars) <= max_consecutive_work_days)
-
-        # 4.2 Maximum night shifts per week
-        for emp in employees:
-            emp_id = emp['emp_id']
-            night_shift_vars = []
-
-            for day_idx in range(len(days)):
-                for shift in shifts:
-                    if shift.get('is_night_shift', False):
-                        for position in positions:
-                            if (emp_id, day_idx, shift['shift_id'], position['pos_id']) in assignments:
-                                night_shift_vars.append(
-                                    assignments[(emp_id, day_idx, shift['shift_id'], position['pos_id'])]
-                                )
-
-            if night_shift_vars:
-                self.model.Add(sum(night_shift_vars) <= max_night_shifts_per_week)
-
-        # 5. OPTIMIZATION OBJECTIVE (using pre-initialized objective_terms)
+        # Sliding windows of max+1 days over day_worked; windows starting before the horizon
+        # count the trailing worked days of the previous schedule, leaving less room inside
+        # the horizon. Windows with no more workable days than their limit are left out.
+        for emp_id in emp_vars:
+            trailing_days = carry_over.get(emp_id, {}).get('trailing_work_days', 0)
+            windows = [(start_day, max_consecutive_work_days)
+                       for start_day in range(len(days) - max_consecutive_work_days)]
+            windows += [(start_day, max_consecutive_work_days + start_day)
+                        for start_day in range(-min(trailing_days, max_consecutive_work_days), 0)]
+
+            for start_day, limit in windows:
+                consecutive_vars = [day_worked[(emp_id, day_idx)]
+                                    for day_idx in range(max(start_day, 0), start_day + max_consecutive_work_days + 1)
+                                    if (emp_id, day_idx) in day_worked]
+                if len(consecutive_vars) > limit:
+                    self._guard(self.model.Add(cp_model.LinearExpr.Sum(consecutive_vars) <= limit),
+                                ('max_consecutive_days',))
+        self._lap('consecutive_days')
+
+        # 4.2 Maximum night shifts per week (per calendar week of the horizon)
+        for entries in emp_vars.values():
+            night_shift_vars = defaultdict(list)
+            for day_idx, shift, _, var in entries:
+                if shift.get('is_night_shift', False):
+                    night_shift_vars[week_of_day[day_idx]].append(var)
+
+            for week_vars in night_shift_vars.values():
+                self._guard(self.model.Add(cp_model.LinearExpr.Sum(week_vars) <= max_night_shifts_per_week),
+                            ('max_night_shifts_per_week',))
+        self._lap('night_shifts')
+
+        # 5. OPTIMIZATION OBJECTIVE (objective_groups)
 
         # 5.1 Minimize shortage (the highest priority - but should be 0 if we have enough employees)
-        for shortage_var in shortage_vars:
-            objective_terms.append(shortage_var * -shortage_penalty)
+        objective_groups['shortage'].extend(shortage_vars)
 
         # 5.2 Prefer work constraints (positive incentive)
-        for constraint in prefer_work:
-            emp_id = constraint['emp_id']
-            day_idx = constraint['day_index']
-            shift_id = constraint.get('shift_id')
-
-            if shift_id is not None:
-                # Specific shift preference
-                for position in positions:
-                    if (emp_id, day_idx, shift_id, position['pos_id']) in assignments:
-                        objective_terms.append(
-                            assignments[(emp_id, day_idx, shift_id, position['pos_id'])] * prefer_work_bonus
-                        )
-            else:
-                # Any shift on this day preference
-                for shift in shifts:
-                    for position in positions:
-                        if (emp_id, day_idx, shift['shift_id'], position['pos_id']) in assignments:
-                            objective_terms.append(
-                                assignments[
-                                    (emp_id, day_idx, shift['shift_id'], position['pos_id'])] * prefer_work_bonus
-                            )
+        for emp_id, day_idx, shift_id in prefer_work:
+            for shift, _, var in emp_day_vars.get((emp_id, day_idx), []):
+                # Specific shift preference, or any shift on this day
+                if shift_id is None or shift['shift_id'] == shift_id:
+                    objective_groups['prefer_work'].append(var)
 
         # 5.3 Position matching bonus (reduced importance)
-        for emp in employees:
-            emp_id = emp['emp_id']
-            default_pos = emp.get('default_position_id')
+        for emp_id, entries in emp_vars.items():
+            default_pos = employees_by_id[emp_id].get('default_position_id')
 
             if default_pos:
-                for day_idx in range(len(days)):
-                    for shift in shifts:
-                        if (emp_id, day_idx, shift['shift_id'], default_pos) in assignments:
-                            objective_terms.append(
-                                assignments[(emp_id, day_idx, shift['shift_id'], default_pos)] * position_match_bonus
-                            )
-
-        # 5.4 Fairness vs Efficiency balancing
-        fairness_weight = settings.get('fairness_weight', 50)  # 0-100, where 0=efficiency, 100=fairness
+                for _, _, pos_id, var in entries:
+                    if pos_id == default_pos:
+                        objective_groups['position_match'].append(var)
 
+        # 5.4 Fairness vs Efficiency balancing (fairness_weight)
         # Calculate workload for each employee
         employee_workload = {}
         unique_employees_working = []
 
-        for emp in employees:
-            emp_id = emp['emp_id']
-            emp_works = self.model.NewBoolVar(f'emp_works_{emp_id}')
-
-            # Employee works if they have any assignment
-            emp_assignments = []
-            total_minutes_terms = []
-
-            for day_idx in range(len(days)):
-                for shift in shifts:
-                    for position in positions:
-                        if (emp_id, day_idx, shift['shift_id'], position['pos_id']) in assignments:
-                            assignment_var = assignments[(emp_id, day_idx, shift['shift_id'], position['pos_id'])]
-                            emp_assignments.append(assignment_var)
-                            total_minutes_terms.append(assignment_var * shift['duration_minutes'])
-
-            if emp_assignments:
-                self.model.AddMaxEquality(emp_works, emp_assignments)
-                unique_employees_working.append(emp_works)
-
-                # Calculate total hours for this employee
-                total_minutes = self.model.NewIntVar(0, max_minutes_per_week, f'total_minutes_{emp_id}')
-                if total_minutes_terms:
-                    self.model.Add(total_minutes == sum(total_minutes_terms))
-                    employee_workload[emp_id] = total_minutes
-
-                # Efficiency component: penalty for using more employees (stronger when fairness_weight is low)
-                efficiency_penalty = (100 - fairness_weight) / 20  # Scale 0-5
-                if efficiency_penalty > 0:
-                    objective_terms.append(emp_works * -efficiency_penalty)
+        candidate_employees = {key[0] for key in assignments}
+        emp_days_worked = defaultdict(list)
+        for (emp_id, _), worked in day_worked.items():
+            emp_days_worked[emp_id].append(worked)
+
+        for emp_id, entries in emp_vars.items():
+            # Employees that diagnosis mode only lists for their blocked assignments never work
+            if emp_id not in candidate_employees:
+                continue
+
+            # Employee works if they work any day
+            if len(emp_days_worked[emp_id]) == 1:
+                emp_works = emp_days_worked[emp_id][0]
+            else:
+                emp_works = self._new_bool_var('emp_works', emp_id)
+                self.model.AddMaxEquality(emp_works, emp_days_worked[emp_id])
+            unique_employees_working.append(emp_works)
+
+            # Calculate total hours for this employee
+            total_minutes = self._new_int_var(0, max_minutes_per_horizon, 'total_minutes', emp_id)
+            self.model.Add(total_minutes == cp_model.LinearExpr.WeightedSum(
+                [var for _, _, _, var in entries], [shift['duration_minutes'] for _, shift, _, _ in entries]))
+            employee_workload[emp_id] = total_minutes
+
+            # Efficiency component: penalty for using more employees (stronger when fairness_weight is low)
+            objective_groups['employees_used'].append(emp_works)
 
         # 5.5 Fairness component: minimize workload variance (stronger when fairness_weight is high)
-        if len(employee_workload) > 1 and fairness_weight > 0:
+        # workload_band holds the fixed workload extremes of the other components in a
+        # decomposed solve, so the spread is measured against the whole site
+        workload_band = data.get('workload_band')
+        workload_variance = None
+        fairness_penalties = []
+        fairness_used = any(vector['fairness'] for vector in objective_vectors)
+        fairness_model = _fairness_model(settings)
+        if fairness_model != 'spread':
+            # Per-employee deviation from a target: every term has tight bounds, unlike the
+            # max - min spread whose bound stays weak until the whole schedule is fixed
+            if employee_workload and fairness_used:
+                targets = _fairness_targets(data, position_valid_shifts, slot_requirements, employee_workload,
+                                            max_minutes_per_week)
+                for emp_id, minutes in employee_workload.items():
+                    target, cap = targets[emp_id]
+                    max_deviation = max(target, cap - target)
+                    deviation = self._new_int_var(0, max_deviation, 'workload_deviation', emp_id)
+                    self.model.Add(deviation >= minutes - target)
+                    self.model.Add(deviation >= target - minutes)
+                    if fairness_model == 'piecewise':
+                        # Epigraph of the convex penalty: the largest of the segment lines
+                        penalty = self._new_int_var(0, _fairness_deviation_penalty(max_deviation, fairness_model),
+                                                    'workload_penalty', emp_id)
+                        segment_start = 0
+                        for width, slope in FAIRNESS_PIECEWISE_SEGMENTS:
+                            offset = _fairness_deviation_penalty(segment_start, fairness_model) - slope * segment_start
+                            self.model.Add(penalty >= slope * deviation + offset)
+                            if width is None:
+                                break
+                            segment_start += width
+                    else:
+                        penalty = deviation
+                    fairness_penalties.append(penalty)
+                objective_groups['fairness'].extend(fairness_penalties)
+        elif employee_workload and (len(employee_workload) > 1 or workload_band) and fairness_used:
             # Create variables for workload differences between employees
-            max_workload = self.model.NewIntVar(0, max_minutes_per_week, 'max_workload')
-            min_workload = self.model.NewIntVar(0, max_minutes_per_week, 'min_workload')
+            max_workload = self._new_int_var(0, max_minutes_per_horizon, 'max_workload')
+            min_workload = self._new_int_var(0, max_minutes_per_horizon, 'min_workload')
 
             # Set bounds for max and min workload
             for emp_id, minutes in employee_workload.items():
                 self.model.Add(minutes <= max_workload)
                 self.model.Add(minutes >= min_workload)
+            if workload_band:
+                self.model.Add(max_workload >= min(workload_band['max'], max_minutes_per_horizon))
+                self.model.Add(min_workload <= workload_band['min'])
 
             # Minimize the difference between max and min workload (fairness objective)
-            workload_variance = self.model.NewIntVar(0, max_minutes_per_week, 'workload_variance')
+            workload_variance = self._new_int_var(0, max_minutes_per_horizon, 'workload_variance')
             self.model.Add(workload_variance == max_workload - min_workload)
 
             # Add fairness objective (stronger when fairness_weight is high)
-            fairness_importance = fairness_weight / 10
-            if fairness_importance > 0:
-                objective_terms.append(workload_variance * -int(fairness_importance))
+            objective_groups['fairness'].append(workload_variance)
+
+        # 5.6 Schedule stability (incremental repair only)
+        if current_schedule is not None:
+            fixed_count = 0
+
+            for key, var in assignments.items():
+                current_value = 1 if key in current_schedule else 0
+                if neighborhood and (key[0] not in neighborhood[0] or key[1] not in neighborhood[1]):
+                    self.model.Add(var == current_value)
+                    fixed_count += 1
+                elif current_value:
+                    objective_groups['current_kept'].append(var)
+                else:
+                    objective_groups['change_added'].append(var)
+
+            self._log('summary', f"[Universal CP-SAT] Repair mode: {fixed_count} assignments fixed, "
+                                 f"{len(assignments) - fixed_count} free")
 
         # Set objective function
+        objective, objective_terms = _objective_expression(objective_groups, coefficients)
         if objective_terms:
-            self.model.Maximize(sum(objective_terms))
+            self.model.Maximize(objective)
+        self._lap('objective')
+
+        # 5.7 Symmetry breaking: interchangeable employees get a fixed order, so the search
+        # does not revisit every permutation of the same schedule among them
+        symmetry_mode = _symmetry_breaking_mode(settings)
+        if symmetry_mode != 'off' and current_schedule is None and self._assumptions is None:
+            domains = {emp_id: [(day_idx, shift['shift_id'], pos_id) for day_idx, shift, pos_id, _ in entries]
+                       for emp_id, entries in emp_vars.items()}
+            classes = _interchangeable_employees(data, domains, prefer_work, fairness_model)
+            for emp_ids in classes:
+                for first, second in zip(emp_ids, emp_ids[1:]):
+                    if symmetry_mode == 'workload':
+                        self.model.Add(employee_workload[first] >= employee_workload[second])
+                    else:
+                        self._add_lex_greater_equal([entry[3] for entry in emp_vars[first]],
+                                                    [entry[3] for entry in emp_vars[second]], f'{first}_{second}')
+            self._symmetry = (symmetry_mode, classes, domains,
+                              {shift['shift_id']: shift['duration_minutes'] for shift in shifts})
+            self.profile['symmetry'] = {'mode': symmetry_mode, 'classes': len(classes),
+                                        'employees': sum(len(emp_ids) for emp_ids in classes)}
+            self._log('summary', f"[Universal CP-SAT] Symmetry breaking ({symmetry_mode}): "
+                                 f"{self.profile['symmetry']['employees']} employees in {len(classes)} classes")
+            self._lap('symmetry')
 
         # 6. SOLVE
-        self.solver.parameters.max_time_in_seconds = settings.get('max_solve_time', 120.0)
-        print(f"[Universal CP-SAT] Starting solver with {len(objective_terms)} objective terms...")
-        print(f"[Universal CP-SAT] Variables: {len(assignments)}, Constraints: {len(self.model.Proto().constraints)}")
-
-        status = self.solver.Solve(self.model)
-
-        print(f"[Universal CP-SAT] Solver finished with status: {status}")
-        print(f"[Universal CP-SAT] Status names: OPTIMAL={cp_model.OPTIMAL}, FEASIBLE={cp_model.FEASIBLE}")
-
-        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            # Extract results
-            schedule = []
+        prior_schedule = data.get('prior_schedule') or []
+        warm_start = {
+            'provided': len(prior_schedule),
+            'hints_kept': self._add_schedule_hints(prior_schedule, days, assignments)
+        }
+        self._log('summary', f"[Universal CP-SAT] Warm start: kept {warm_start['hints_kept']}/{warm_start['provided']} prior assignments")
+        # Without a usable prior schedule, hint the greedy schedule instead. Not when repairing:
+        # the greedy scheduler ignores the fixed assignments and the stability terms
+        greedy = None
+        if not warm_start['hints_kept'] and settings.get('heuristic_hints') and current_schedule is None:
+            greedy = GreedyScheduler(data).solve(
+                min(HEURISTIC_TIME_LIMIT, float(settings.get('max_solve_time', 120.0)) / 10))
+            warm_start['heuristic'] = {
+                'assignments': greedy['stats']['total_assignments'],
+                'shortage': greedy['shortage_count'],
+                'objective': greedy['stats']['objective_value'],
+                'time': greedy['solve_time'],
+                'hints_kept': self._add_schedule_hints(greedy['schedule'], days, assignments)
+            }
+            self._log('summary', f"[Universal CP-SAT] Greedy hints: {warm_start['heuristic']}")
+        self._lap('hints')
+
+        if lean_build:
+            # The model holds everything the search needs; extraction only reads the assignment
+            # columns and the objective parts, so the build indexes go now
+            for index in (assignments, emp_vars, emp_day_vars, slot_vars, slot_candidates, day_worked,
+                          emp_days_worked, candidate_employees, rest_tables):
+                index.clear()
+            arrays = permanent_blocks = temporary_blocks = None
+            if not scenarios and objective_mode == 'weighted':
+                objective_groups.clear()
+            self._lap('release')
+
+        def solution_result(solver, status, coefficients):
+            """Schedule and stats of a solve with the given objective coefficients: one copy of
+            the solution vector, then array reductions over the chosen assignment rows"""
+            solution = np.array(solver.ResponseProto().solution, dtype=np.int64)
+            emp_codes, day_codes, shift_codes, pos_codes = columns.chosen(solution)
+            emp_ids = list(columns.employees)
+            pos_ids = list(columns.positions)
+            shift_table = columns.shift_table
+            shift_minutes = np.array([shift['duration_minutes'] for shift in shift_table], dtype=np.int64)
+            shift_starts = np.array([_parse_time_to_minutes(shift['start_time']) for shift in shift_table],
+                                    dtype=np.int64)
+            default_positions = np.array([columns.positions.get(employees_by_id[emp_id].get('default_position_id'), -1)
+                                          for emp_id in emp_ids], dtype=np.intc)
+
+            minutes = shift_minutes[shift_codes]
+            emp_shifts = np.bincount(emp_codes, minlength=len(emp_ids))
+            emp_minutes = np.bincount(emp_codes, weights=minutes, minlength=len(emp_ids))
+            working = np.flatnonzero(emp_shifts)
+            starts = day_codes.astype(np.int64) * 24 * 60 + shift_starts[shift_codes]
+            min_rest = _min_rest_minutes(emp_codes, starts, starts + minutes)
+
+            def values(variables):
+                return solution[[variable.Index() for variable in variables]]
+
+            fairness_terms = [workload_variance] if workload_variance is not None else fairness_penalties
             stats = {
-                'total_assignments': 0,
-                'total_shortage': 0,
-                'position_matches': 0,
-                'hours_per_employee': {},
-                'shifts_per_employee': {},
-                'permanent_constraints_respected': len(permanent_cannot_work),
-                'temporary_constraints_respected': len(temporary_cannot_work),
+                'total_assignments': len(emp_codes),
+                'total_shortage': int(values(shortage_vars).sum()),
+                'position_matches': int(np.count_nonzero(default_positions[emp_codes] == pos_codes)),
+                'hours_per_employee': {emp_ids[code]: float(emp_minutes[code]) / 60.0 for code in working},
+                'shifts_per_employee': {emp_ids[code]: int(emp_shifts[code]) for code in working},
+                'permanent_constraints_respected': permanent_count,
+                'blocked_assignments': pruned['permanent'],
+                'pruned_assignments': pruned,
+                'temporary_constraints_respected': temporary_count,
                 'prefer_work_satisfied': 0,
-                'objective_value': self.solver.ObjectiveValue()
+                'objective_value': (solver.ObjectiveValue() if objective_mode == 'weighted'
+                                    else _objective_value(objective_groups, coefficients, solution)),
+                'shortage_slots': len(shortage_vars),
+                'fairness_penalty': int(values(fairness_terms).sum()) * -coefficients['fairness'],
+                'fairness_model': fairness_model,
+                'min_rest_hours': min_rest / 60.0 if min_rest is not None else None
             }
+            if employee_workload:
+                workloads = emp_minutes[[columns.employees[emp_id] for emp_id in employee_workload]]
+                stats['workload_range'] = {'min': int(workloads.min()), 'max': int(workloads.max())}
 
-            # Check prefers work satisfaction
-            for constraint in prefer_work:
-                emp_id = constraint['emp_id']
-                day_idx = constraint['day_index']
-                shift_id = constraint.get('shift_id')
-
-                satisfied = False
-                if shift_id is not None:
-                    for position in positions:
-                        key = (emp_id, day_idx, shift_id, position['pos_id'])
-                        if key in assignments and self.solver.Value(assignments[key]) == 1:
-                            satisfied = True
-                            break
-                else:
-                    for shift in shifts:
-                        for position in positions:
-                            key = (emp_id, day_idx, shift['shift_id'], position['pos_id'])
-                            if key in assignments and self.solver.Value(assignments[key]) == 1:
-                                satisfied = True
-                                break
-                        if satisfied:
-                            break
+            schedule = []
+            chosen = zip(emp_codes.tolist(), day_codes.tolist(), shift_codes.tolist(), pos_codes.tolist())
+            worked = set()
+            for assignment_index, (emp_code, day_idx, shift_code, pos_code) in enumerate(chosen):
+                schedule.append({
+                    'emp_id': emp_ids[emp_code],
+                    'date': days[day_idx]['date'],
+                    'shift_id': shift_table[shift_code]['shift_id'],
+                    'position_id': pos_ids[pos_code],
+                    'assignment_index': assignment_index
+                })
+                worked.add((emp_code, day_idx, None))
+                worked.add((emp_code, day_idx, shift_code))
 
-                if satisfied:
+            # Check prefers work satisfaction
+            for emp_id, day_idx, shift_id in prefer_work:
+                shift_code = None if shift_id is None else columns.shifts.get(shift_id, -1)
+                if (columns.employees.get(emp_id), day_idx, shift_code) in worked:
                     stats['prefer_work_satisfied'] += 1
 
-            assignment_index = 0
-            for emp in employees:
-                emp_id = emp['emp_id']
-                emp_total_minutes = 0
-                emp_shifts = 0
-
-                for day_idx, day in enumerate(days):
-                    for shift in shifts:
-                        for position in positions:
-                            key = (emp_id, day_idx, shift['shift_id'], position['pos_id'])
-                            if key in assignments and self.solver.Value(assignments[key]) == 1:
-                                schedule.append({
-                                    'emp_id': emp_id,
-                                    'date': day['date'],
-                                    'shift_id': shift['shift_id'],
-                                    'position_id': position['pos_id'],
-                                    'assignment_index': assignment_index
-                                })
-                                assignment_index += 1
-                                stats['total_assignments'] += 1
-                                emp_total_minutes += shift['duration_minutes']
-                                emp_shifts += 1
-
-                                if emp.get('default_position_id') == position['pos_id']:
-                                    stats['position_matches'] += 1
-
-                if emp_shifts > 0:
-                    stats['hours_per_employee'][emp_id] = emp_total_minutes / 60.0
-                    stats['shifts_per_employee'][emp_id] = emp_shifts
-
-            # Calculate shortage
-            for shortage_var in shortage_vars:
-                stats['total_shortage'] += self.solver.Value(shortage_var)
-
-            print(f"[Universal CP-SAT] Solution found:")
-            print(f"  - Assignments: {stats['total_assignments']}")
-            print(f"  - Shortage: {stats['total_shortage']}")
-            print(f"  - Position matches: {stats['position_matches']}")
-            print(f"  - Prefer work satisfied: {stats['prefer_work_satisfied']}/{len(prefer_work)}")
-
-            return {
+            result = {
                 'success': True,
                 'schedule': schedule,
                 'stats': stats,
                 'status': 'optimal' if status == cp_model.OPTIMAL else 'feasible',
-                'solve_time': self.solver.WallTime() * 1000,
+                'solve_time': solver.WallTime() * 1000,
                 'coverage_rate': (1 - stats['total_shortage'] / max(1, len(shortage_vars))) * 100,
                 'shortage_count': stats['total_shortage']
             }
+            if settings.get('coverage_report'):
+                assigned_counts = Counter(
+                    (pos_ids[pos_code], shift_table[shift_code]['shift_id'], day_idx)
+                    for pos_code, shift_code, day_idx in zip(pos_codes.tolist(), shift_codes.tolist(),
+                                                             day_codes.tolist()))
+                result['coverage_report'] = _coverage_report(slot_requirements, candidate_counts, assigned_counts, days)
+            return result
+
+        search_profile = self._configure_solver(settings)
+        model_proto = self.model.Proto()
+        self.profile['model'] = {
+            'variables': len(model_proto.variables),
+            'assignment_variables': assignment_count,
+            'constraints': len(model_proto.constraints),
+            'objective_terms': objective_terms
+        }
+        resident = _resident_memory_mb()
+        if resident is not None:
+            self.profile['model']['resident_mb'] = round(resident, 1)
+        self._log('summary', f"[Universal CP-SAT] Starting solver with {objective_terms} objective terms...")
+        self._log('summary', f"[Universal CP-SAT] Variables: {assignment_count}, Constraints: {len(model_proto.constraints)}")
+
+        # The search log is only captured to time presolve (and echoed in verbose mode)
+        self.solver.parameters.log_search_progress = True
+        self.solver.parameters.log_to_stdout = False
+        self.solver.log_callback = self._on_solver_log
+
+        if self._assumptions is not None:
+            self.model.AddAssumptions(list(self._assumptions.values()))
+            self._log('summary', f"[Universal CP-SAT] Diagnosis mode: {len(self._assumptions)} assumptions")
+
+        if scenarios:
+            return self._solve_scenarios(scenarios, objective_groups, solution_result, shortage_vars, settings,
+                                         warm_start, search_profile)
+
+        stages = None
+        if objective_mode == 'lexicographic':
+            # Later code reads the solver of the last solved stage
+            self.solver, status, stages = self._solve_lexicographic(objective_groups, coefficients, shortage_vars,
+                                                                     settings)
         else:
+            callback = SolutionProgressCallback(shortage_vars, self.on_progress) if self.on_progress else None
+            with self._watch_stop_event():
+                status = self.solver.Solve(self.model, callback)
+        self.profile['solver'] = self._solver_profile(status)
+        self._lap_started = time.perf_counter()
+
+        self._log('summary', f"[Universal CP-SAT] Solver finished with status: {status}")
+        self._log('verbose', f"[Universal CP-SAT] Status names: OPTIMAL={cp_model.OPTIMAL}, FEASIBLE={cp_model.FEASIBLE}")
+
+        # The greedy schedule is a valid answer on its own, keep it when CP-SAT ran out of time
+        # without a solution or found a worse one (stage objectives of the lexicographic mode are
+        # not comparable with its weighted one). A proven infeasibility is reported and diagnosed
+        # instead: the greedy schedule only gets there by leaving slots short.
+        if greedy is not None and (status == cp_model.UNKNOWN
+                                   or (status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+                                       and objective_mode == 'weighted'
+                                       and greedy['stats']['objective_value'] > self.solver.ObjectiveValue())):
+            self._log('summary', f"[Universal CP-SAT] Keeping the greedy schedule (CP-SAT status {status})")
+            self._lap('extraction')
             return {
+                **greedy,
+                'solve_time': self.solver.WallTime() * 1000,
+                'warm_start': warm_start,
+                'search_profile': search_profile,
+                'stopped_early': self.stopped_early,
+                'profile': {**self.profile, 'heuristic': greedy['profile']['heuristic']}
+            }
+
+        if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+            result = solution_result(self.solver, status, coefficients)
+            if stages is not None:
+                result['status'] = 'optimal' if all(stage['proven'] for stage in stages) else 'feasible'
+                result['solve_time'] = sum(stage['solve_time'] for stage in stages)
+                result['stages'] = stages
+            stats = result['stats']
+            self._log('summary', f"[Universal CP-SAT] Solution found:")
+            self._log('summary', f"  - Assignments: {stats['total_assignments']}")
+            self._log('summary', f"  - Shortage: {stats['total_shortage']}")
+            self._log('summary', f"  - Position matches: {stats['position_matches']}")
+            self._log('summary', f"  - Prefer work satisfied: {stats['prefer_work_satisfied']}/{len(prefer_work)}")
+            self._lap('extraction')
+
+            return {
+                **result,
+                'warm_start': warm_start,
+                'search_profile': search_profile,
+                'stopped_early': self.stopped_early,
+                'profile': self.profile
+            }
+        else:
+            result = {
                 'success': False,
                 'error': f'No solution found. Status: {status}',
                 'status': str(status),
+                'warm_start': warm_start,
+                'search_profile': search_profile,
+                'profile': self.profile,
                 'details': {
-                    'variables': len(assignments),
+                    'variables': assignment_count,
+                    'pruned_assignments': pruned,
                     'constraints': len(self.model.Proto().constraints),
-                    'objective_terms': len(objective_terms)
+                    'objective_terms': objective_terms
                 }
             }
+            if status == cp_model.INFEASIBLE and diagnosis_mode != 'off':
+                diagnosis_time_limit = float(settings.get('diagnosis_time_limit', DIAGNOSIS_TIME_LIMIT))
+                if self._assumptions is not None:
+                    diagnosis = self._explain_infeasibility(data, limits, slot_requirements, diagnosis_time_limit)
+                else:
+                    self._log('summary', f"[Universal CP-SAT] Infeasible, diagnosing with assumptions...")
+                    diagnosis = _diagnose_infeasibility(data, current_schedule, neighborhood)
+                result['diagnosis'] = {**diagnosis, 'understaffed': understaffed}
+                self._lap('diagnosis')
+            return result
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser()
-    parser.add_argument('data_file', help='Path to JSON data file')
-    args = parser.parse_args()
+class GreedyScheduler:
+    """Greedy constructor plus move/swap local search over the CP-SAT feasible domain.
 
-    try:
-        # Load data
-        with open(args.data_file, 'r', encoding='utf-8') as f:
+    Candidates come from the same pre-pass as the model (_assignment_domain) and every
+    assignment is checked incrementally against the same hard limits: minutes per day and
+    per week, shifts per day, the rest-conflict table, consecutive work days (including
+    the previous schedule) and night shifts per week. Slots that cannot be filled are
+    left short. Used for settings.algorithm 'heuristic' and as a CP-SAT hint generator
+    (settings.heuristic_hints).
+    """
+
+    def __init__(self, data):
+        settings = data.get('settings', {})
+        weights = settings.get('optimization_weights', {})
+        self.days = data['days']
+        self.limits = _schedule_limits(settings)
+        self.week_of_day = _calendar_weeks(self.days)
+        self.shortage_penalty = weights.get('SHORTAGE_PENALTY', 1000)
+        self.prefer_work_bonus = weights.get('PREFER_WORK_BONUS', 10)
+        self.position_match_bonus = weights.get('POSITION_MATCH_BONUS', 20)
+        self.fairness_weight = settings.get('fairness_weight', 50)
+        self.coverage_report = bool(settings.get('coverage_report'))
+        self.employees = data['employees']
+
+        position_valid_shifts = _staffed_position_shifts(data)
+        arrays = InputArrays(data)
+        self.slot_requirements = _slot_requirements(arrays.slots(position_valid_shifts))
+        self.shifts = {(pos_id, shift['shift_id']): shift
+                       for pos_id, pos_shifts in position_valid_shifts.items() for shift in pos_shifts}
+        self.rest = {}
+        for pos_id, pos_shifts in position_valid_shifts.items():
+            tables = _build_rest_conflicts(pos_shifts, self.limits['min_rest_between_shifts'],
+                                           self.limits['min_rest_after_night'], self.limits['min_rest_after_regular'])
+            self.rest[pos_id] = self._rest_neighbours(pos_shifts, *tables)
+
+        self.permanent_count = len(arrays.constraints['permanent_cannot_work'][0])
+        self.temporary_count = len(arrays.constraints['cannot_work'][0])
+        self.prefer_work = _load_constraints(data, 'prefer_work')
+        self.preferred = {(emp_id, day_idx, shift_id) for emp_id, day_idx, shift_id in self.prefer_work}
+        carry_over = _load_carry_over(data)
+        self.trailing_days = {emp_id: entry.get('trailing_work_days', 0) for emp_id, entry in carry_over.items()}
+
+        # slot -> [emp_id] in employee order, only assignments that can be 1
+        self.candidates = defaultdict(list)
+        self.pruned = {'permanent': 0, 'temporary': 0, 'carry_over_rest': 0, 'no_requirement': 0}
+        domain = _assignment_domain(self.employees, position_valid_shifts, arrays,
+                                    arrays.blocks('permanent_cannot_work'), arrays.blocks('cannot_work'),
+                                    _rest_deadlines(carry_over, self.limits))
+        for (emp_id, day_idx, shift_id, pos_id), _, excluded_by in domain:
+            if excluded_by is None:
+                self.candidates[(pos_id, shift_id, day_idx)].append(emp_id)
+            else:
+                self.pruned[excluded_by] += 1
+        self.candidate_employees = {emp_id for slot_candidates in self.candidates.values() for emp_id in slot_candidates}
+        self.fairness_model = _fairness_model(settings)
+        self.fairness_targets = (_fairness_targets(data, position_valid_shifts, self.slot_requirements,
+                                                   self.candidate_employees, self.limits['max_minutes_per_week'])
+                                 if self.fairness_model != 'spread' else {})
+
+        # Incremental state
+        self.assigned = defaultdict(list)        # slot -> [emp_id]
+        self.day_shifts = defaultdict(set)       # (emp_id, day_idx) -> {shift_id}
+        self.day_minutes = defaultdict(int)      # (emp_id, day_idx) -> minutes
+        self.week_minutes = defaultdict(int)     # (emp_id, week) -> minutes
+        self.week_nights = defaultdict(int)      # (emp_id, week) -> night shifts
+        self.minutes = defaultdict(int)          # emp_id -> minutes over the horizon
+        self.emp_slots = defaultdict(set)        # emp_id -> {slot}
+        self.moves = {'repairs': 0, 'moves': 0, 'swaps': 0}
+
+    @staticmethod
+    def _rest_neighbours(pos_shifts, same_day_cliques, next_day_cliques):
+        """shift_id -> (same day, previous day, next day) shift ids it conflicts with"""
+        same_day = defaultdict(set)
+        previous_day = defaultdict(set)
+        next_day = defaultdict(set)
+        for clique in same_day_cliques:
+            for a in clique:
+                same_day[a].update(b for b in clique if b != a)
+        for clique in next_day_cliques:
+            for offset_a, a in clique:
+                for offset_b, b in clique:
+                    if (offset_a, a) == (offset_b, b):
+                        continue
+                    if offset_a == offset_b:
+                        same_day[a].add(b)
+                    elif offset_a == 0:
+                        next_day[a].add(b)
+                    else:
+                        previous_day[a].add(b)
+        return {shift['shift_id']: (same_day[shift['shift_id']], previous_day[shift['shift_id']],
+                                    next_day[shift['shift_id']])
+                for shift in pos_shifts}
+
+    def _is_preferred(self, emp_id, slot):
+        return (emp_id, slot[2], slot[1]) in self.preferred or (emp_id, slot[2], None) in self.preferred
+
+    def _worked_run(self, emp_id, day_idx, step):
+        """Consecutive worked days next to day_idx in one direction (previous schedule included)"""
+        run = 0
+        day = day_idx + step
+        while 0 <= day < len(self.days) and self.day_shifts.get((emp_id, day)):
+            run += 1
+            day += step
+        if day < 0:
+            run += self.trailing_days.get(emp_id, 0)
+        return run
+
+    def can_assign(self, emp_id, slot):
+        pos_id, shift_id, day_idx = slot
+        shift = self.shifts[(pos_id, shift_id)]
+        limits = self.limits
+        day_shifts = self.day_shifts.get((emp_id, day_idx), set())
+        if shift_id in day_shifts or len(day_shifts) >= limits['max_shifts_per_day']:
+            return False
+        if self.day_minutes[(emp_id, day_idx)] + shift['duration_minutes'] > limits['max_minutes_per_day']:
+            return False
+        week = (emp_id, self.week_of_day[day_idx])
+        if self.week_minutes[week] + shift['duration_minutes'] > limits['max_minutes_per_week']:
+            return False
+        if shift.get('is_night_shift', False) and self.week_nights[week] >= limits['max_night_shifts_per_week']:
+            return False
+
+        same_day, previous_day, next_day = self.rest[pos_id][shift_id]
+        if (day_shifts & same_day or self.day_shifts.get((emp_id, day_idx - 1), set()) & previous_day
+                or self.day_shifts.get((emp_id, day_idx + 1), set()) & next_day):
+            return False
+
+        if not day_shifts:
+            run = 1 + self._worked_run(emp_id, day_idx, -1) + self._worked_run(emp_id, day_idx, 1)
+            if run > limits['max_consecutive_work_days']:
+                return False
+        return True
+
+    def _update(self, emp_id, slot, sign):
+        pos_id, shift_id, day_idx = slot
+        shift = self.shifts[(pos_id, shift_id)]
+        week = (emp_id, self.week_of_day[day_idx])
+        self.day_minutes[(emp_id, day_idx)] += sign * shift['duration_minutes']
+        self.week_minutes[week] += sign * shift['duration_minutes']
+        self.minutes[emp_id] += sign * shift['duration_minutes']
+        if shift.get('is_night_shift', False):
+            self.week_nights[week] += sign
+
+    def assign(self, emp_id, slot):
+        self.assigned[slot].append(emp_id)
+        self.day_shifts[(emp_id, slot[2])].add(slot[1])
+        self.emp_slots[emp_id].add(slot)
+        self._update(emp_id, slot, 1)
+
+    def unassign(self, emp_id, slot):
+        self.assigned[slot].remove(emp_id)
+        self.day_shifts[(emp_id, slot[2])].discard(slot[1])
+        self.emp_slots[emp_id].discard(slot)
+        self._update(emp_id, slot, -1)
+
+    def _pick(self, slot, exclude=()):
+        """Best feasible candidate for slot: preferred first, then the lightest workload"""
+        best = None
+        for emp_id in self.candidates[slot]:
+            if emp_id in exclude or emp_id in self.assigned[slot] or not self.can_assign(emp_id, slot):
+                continue
+            key = (not self._is_preferred(emp_id, slot), self.minutes[emp_id] if self.fairness_weight > 0 else 0)
+            if best is None or key < best[0]:
+                best = (key, emp_id)
+        return best[1] if best else None
+
+    def construct(self):
+        """Fill slots with the least spare candidates first"""
+        slots = sorted(self.slot_requirements,
+                       key=lambda slot: len(self.candidates[slot]) - self.slot_requirements[slot])
+        for slot in slots:
+            for _ in range(self.slot_requirements[slot]):
+                emp_id = self._pick(slot)
+                if emp_id is None:
+                    break
+                self.assign(emp_id, slot)
+
+    def _short_slots(self):
+        return [slot for slot, required in self.slot_requirements.items() if len(self.assigned[slot]) < required]
+
+    def _repair(self, slot):
+        """Ejection move: free a candidate by handing one of their assignments to someone else"""
+        for emp_id in self.candidates[slot]:
+            if emp_id in self.assigned[slot]:
+                continue
+            for other_slot in sorted(self.emp_slots[emp_id], key=lambda other: abs(other[2] - slot[2])):
+                self.unassign(emp_id, other_slot)
+                if self.can_assign(emp_id, slot):
+                    self.assign(emp_id, slot)
+                    replacement = self._pick(other_slot, exclude=(emp_id,))
+                    if replacement is not None:
+                        self.assign(replacement, other_slot)
+                        return True
+                    self.unassign(emp_id, slot)
+                self.assign(emp_id, other_slot)
+        return False
+
+    def _improve_slot(self, slot):
+        """Move an assignment of slot to a better candidate (preference first, then balance)"""
+        improved = False
+        for emp_from in list(self.assigned[slot]):
+            duration = self.shifts[slot[:2]]['duration_minutes']
+            from_preferred = self._is_preferred(emp_from, slot)
+            for emp_to in self.candidates[slot]:
+                if emp_to in self.assigned[slot] or not self.can_assign(emp_to, slot):
+                    continue
+                preference_gain = self._is_preferred(emp_to, slot) - from_preferred
+                balance_gain = self.fairness_weight > 0 and self.minutes[emp_from] - self.minutes[emp_to] > duration
+                if preference_gain > 0 or (preference_gain == 0 and balance_gain):
+                    self.unassign(emp_from, slot)
+                    self.assign(emp_to, slot)
+                    self.moves['moves'] += 1
+                    improved = True
+                    break
+        return improved
+
+    def _swap_day(self, pos_id, day_idx):
+        """Exchange the shifts of two employees on one day when it satisfies more preferences"""
+        slots = [slot for slot in self.slot_requirements if slot[0] == pos_id and slot[2] == day_idx]
+        improved = False
+        for index, slot_a in enumerate(slots):
+            for slot_b in slots[index + 1:]:
+                for emp_a in list(self.assigned[slot_a]):
+                    for emp_b in list(self.assigned[slot_b]):
+                        if emp_a not in self.assigned[slot_a]:
+                            break
+                        gain = (self._is_preferred(emp_a, slot_b) + self._is_preferred(emp_b, slot_a)
+                                - self._is_preferred(emp_a, slot_a) - self._is_preferred(emp_b, slot_b))
+                        if gain <= 0 or emp_a in self.assigned[slot_b] or emp_b in self.assigned[slot_a]:
+                            continue
+                        if emp_a not in self.candidates[slot_b] or emp_b not in self.candidates[slot_a]:
+                            continue
+                        self.unassign(emp_a, slot_a)
+                        self.unassign(emp_b, slot_b)
+                        if self.can_assign(emp_a, slot_b):
+                            self.assign(emp_a, slot_b)
+                            if self.can_assign(emp_b, slot_a):
+                                self.assign(emp_b, slot_a)
+                                self.moves['swaps'] += 1
+                                improved = True
+                                continue
+                            self.unassign(emp_a, slot_b)
+                        self.assign(emp_a, slot_a)
+                        self.assign(emp_b, slot_b)
+        return improved
+
+    def local_search(self, time_limit):
+        deadline = time.perf_counter() + time_limit
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for slot in self._short_slots():
+                while len(self.assigned[slot]) < self.slot_requirements[slot] and self._repair(slot):
+                    self.moves['repairs'] += 1
+                    improved = True
+                if time.perf_counter() >= deadline:
+                    return
+            for slot in self.slot_requirements:
+                improved |= self._improve_slot(slot)
+                if time.perf_counter() >= deadline:
+                    return
+            for pos_id, day_idx in sorted({(slot[0], slot[2]) for slot in self.slot_requirements}):
+                improved |= self._swap_day(pos_id, day_idx)
+            # Freed capacity may fill short slots directly
+            for slot in self._short_slots():
+                emp_id = self._pick(slot)
+                while emp_id is not None and len(self.assigned[slot]) < self.slot_requirements[slot]:
+                    self.assign(emp_id, slot)
+                    improved = True
+                    emp_id = self._pick(slot)
+
+    def result(self, started, timings):
+        """Schedule and stats in the optimize_schedule() result format"""
+        employees_by_id = {emp['emp_id']: emp for emp in self.employees}
+        schedule = []
+        stats = {
+            'total_assignments': 0,
+            'total_shortage': 0,
+            'position_matches': 0,
+            'hours_per_employee': {},
+            'shifts_per_employee': {},
+            'permanent_constraints_respected': self.permanent_count,
+            'blocked_assignments': self.pruned['permanent'],
+            'pruned_assignments': self.pruned,
+            'temporary_constraints_respected': self.temporary_count,
+            'prefer_work_satisfied': 0,
+            'objective_value': 0,
+            'shortage_slots': 0,
+            'fairness_penalty': 0
+        }
+
+        for emp in self.employees:
+            emp_id = emp['emp_id']
+            for pos_id, shift_id, day_idx in sorted(self.emp_slots.get(emp_id, ()), key=lambda slot: slot[2]):
+                schedule.append({
+                    'emp_id': emp_id,
+                    'date': self.days[day_idx]['date'],
+                    'shift_id': shift_id,
+                    'position_id': pos_id,
+                    'assignment_index': len(schedule)
+                })
+                if emp.get('default_position_id') == pos_id:
+                    stats['position_matches'] += 1
+            if self.minutes.get(emp_id):
+                stats['hours_per_employee'][emp_id] = self.minutes[emp_id] / 60.0
+                stats['shifts_per_employee'][emp_id] = len(self.emp_slots[emp_id])
+        stats['total_assignments'] = len(schedule)
+        stats['min_rest_hours'] = self.min_rest_hours()
+
+        for slot, required in self.slot_requirements.items():
+            missing = required - len(self.assigned[slot])
+            if missing > 0:
+                stats['total_shortage'] += missing
+                stats['shortage_slots'] += 1
+
+        preferred_days = defaultdict(list)
+        for emp_id, slots in self.emp_slots.items():
+            for pos_id, shift_id, day_idx in slots:
+                preferred_days[(emp_id, day_idx)].append(shift_id)
+        preference_hits = 0
+        for emp_id, day_idx, shift_id in self.prefer_work:
+            worked = preferred_days.get((emp_id, day_idx), [])
+            hits = len(worked) if shift_id is None else worked.count(shift_id)
+            preference_hits += hits
+            stats['prefer_work_satisfied'] += hits > 0
+
+        # Same terms as the CP-SAT objective, so both algorithms can be compared
+        working = [emp_id for emp_id in self.candidate_employees if self.minutes.get(emp_id)]
+        objective = (-self.shortage_penalty * stats['total_shortage']
+                     + self.prefer_work_bonus * preference_hits
+                     + self.position_match_bonus * stats['position_matches']
+                     - (100 - self.fairness_weight) / 20 * len(working))
+        if self.candidate_employees:
+            workloads = [self.minutes.get(emp_id, 0) for emp_id in self.candidate_employees]
+            stats['workload_range'] = {'min': min(workloads), 'max': max(workloads)}
+            if self.fairness_model != 'spread':
+                stats['fairness_penalty'] = int(self.fairness_weight / 10) * sum(
+                    _fairness_deviation_penalty(abs(self.minutes.get(emp_id, 0) - target), self.fairness_model)
+                    for emp_id, (target, _) in self.fairness_targets.items())
+            elif len(workloads) > 1 and self.fairness_weight > 0:
+                stats['fairness_penalty'] = int(self.fairness_weight / 10) * (max(workloads) - min(workloads))
+        stats['fairness_model'] = self.fairness_model
+        stats['objective_value'] = objective - stats['fairness_penalty']
+
+        total_required = sum(self.slot_requirements.values())
+        result = {
+            'success': True,
+            'algorithm': 'heuristic',
+            'schedule': schedule,
+            'stats': stats,
+            'status': 'heuristic',
+            'solve_time': (time.perf_counter() - started) * 1000,
+            'coverage_rate': (1 - stats['total_shortage'] / max(1, total_required)) * 100,
+            'shortage_count': stats['total_shortage'],
+            'stopped_early': False,
+            'profile': {'timings': timings, 'heuristic': dict(self.moves)}
+        }
+        if self.coverage_report:
+            result['coverage_report'] = _coverage_report(
+                self.slot_requirements, {slot: len(candidates) for slot, candidates in self.candidates.items()},
+                {slot: len(assigned) for slot, assigned in self.assigned.items()}, self.days)
+        return result
+
+    def min_rest_hours(self):
+        """Shortest rest between two shifts of one employee in the current schedule"""
+        emp_codes, starts, ends = [], [], []
+        for emp_code, slots in enumerate(self.emp_slots.values()):
+            for pos_id, shift_id, day_idx in slots:
+                shift = self.shifts[(pos_id, shift_id)]
+                emp_codes.append(emp_code)
+                starts.append(day_idx * 24 * 60 + _parse_time_to_minutes(shift['start_time']))
+                ends.append(starts[-1] + shift['duration_minutes'])
+        if not emp_codes:
+            return None
+        min_rest = _min_rest_minutes(np.array(emp_codes), np.array(starts), np.array(ends))
+        return min_rest / 60.0 if min_rest is not None else None
+
+    def solve(self, time_limit=HEURISTIC_TIME_LIMIT):
+        started = time.perf_counter()
+        self.construct()
+        constructed = time.perf_counter()
+        self.local_search(time_limit)
+        return self.result(started, {
+            'construction': round((constructed - started) * 1000, 3),
+            'local_search': round((time.perf_counter() - constructed) * 1000, 3)
+        })
+
+
+def _diagnose_infeasibility(data, current_schedule=None, neighborhood=None):
+    """Diagnosis of an infeasible request, from a solve in 'assumptions' mode limited to
+    settings.diagnosis_time_limit (see INFEASIBILITY_DIAGNOSIS_MODES)"""
+    settings = data.get('settings', {})
+    diagnosis_settings = {
+        **settings,
+        'infeasibility_diagnosis': 'assumptions',
+        'max_solve_time': float(settings.get('diagnosis_time_limit', DIAGNOSIS_TIME_LIMIT)),
+        'heuristic_hints': False,
+        'log_level': 'off'
+    }
+    result = UniversalShiftSchedulerCP().optimize_schedule({**data, 'settings': diagnosis_settings},
+                                                           current_schedule, neighborhood)
+    if result.get('diagnosis'):
+        return result['diagnosis']
+    return {'source': 'assumptions', 'conflicts': [], 'minimal': False,
+            'error': f"Diagnosis solve ended with status {result.get('status')}"}
+
+
+def solve_heuristic(data):
+    """algorithm 'heuristic': greedy schedule plus local search, no CP-SAT"""
+    settings = data.get('settings', {})
+    started = time.perf_counter()
+    scheduler = GreedyScheduler(data)
+    setup_time = round((time.perf_counter() - started) * 1000, 3)
+    result = scheduler.solve(float(settings.get('heuristic_time_limit', HEURISTIC_TIME_LIMIT)))
+    result['solve_time'] = (time.perf_counter() - started) * 1000
+    result['profile']['timings'] = {'setup': setup_time, **result['profile']['timings']}
+    result['warm_start'] = {'provided': len(data.get('prior_schedule') or []), 'hints_kept': 0}
+    _log_settings(settings, 'summary',
+                  f"[Greedy] {result['stats']['total_assignments']} assignments, shortage {result['shortage_count']}, "
+                  f"objective {result['stats']['objective_value']} in {result['solve_time']:.1f} ms")
+    return result
+
+
+def _constraint_identity(constraint):
+    return constraint.get('emp_id'), constraint.get('day_index'), constraint.get('shift_id')
+
+
+def _apply_delta(data, delta):
+    """Copy of the optimizer input with a constraint/requirement delta applied.
+
+    delta = {
+        'add':    {'cannot_work': [...], 'prefer_work': [...], 'permanent_cannot_work': [...]},
+        'remove': {same shape, matched on emp_id/day_index/shift_id},
+        'shift_requirements': {'<pos_id>-<shift_id>-<date>': requirement or None}
+    }
+    """
+    constraints = {key: list(value) for key, value in data.get('constraints', {}).items()}
+
+    for kind, removed in delta.get('remove', {}).items():
+        removed_ids = {_constraint_identity(c) for c in removed}
+        constraints[kind] = [c for c in constraints.get(kind, []) if _constraint_identity(c) not in removed_ids]
+
+    for kind, added in delta.get('add', {}).items():
+        existing_ids = {_constraint_identity(c) for c in constraints.get(kind, [])}
+        constraints[kind] = constraints.get(kind, []) + [c for c in added if _constraint_identity(c) not in existing_ids]
+
+    shift_requirements = dict(data.get('shift_requirements', {}))
+    for key, requirement in delta.get('shift_requirements', {}).items():
+        if requirement:
+            shift_requirements[key] = requirement
+        else:
+            shift_requirements.pop(key, None)
+
+    return {**data, 'constraints': constraints, 'shift_requirements': shift_requirements}
+
+
+def _repair_neighborhoods(data, delta):
+    """Widening (emp_ids, day_indexes) neighborhoods around the employees, days and slots touched by delta"""
+    employees = data['employees']
+    all_days = set(range(len(data['days'])))
+    date_index = {day['date']: day_idx for day_idx, day in enumerate(data['days'])}
+    position_of = {emp['emp_id']: emp.get('default_position_id') for emp in employees}
+
+    affected_emps = set()
+    affected_days = set()
+    affected_positions = set()
+
+    for section in ('add', 'remove'):
+        for constraints in delta.get(section, {}).values():
+            for constraint in constraints:
+                affected_emps.add(constraint['emp_id'])
+                affected_days.add(constraint['day_index'])
+                affected_positions.add(position_of.get(constraint['emp_id']))
+
+    for key in delta.get('shift_requirements', {}):
+        # "{pos_id}-{shift_id}-{date}", the date itself contains dashes
+        pos_id, _, date_str = key.split('-', 2)
+        if date_str in date_index:
+            affected_days.add(date_index[date_str])
+        affected_positions.add(int(pos_id))
+
+    position_emps = {emp['emp_id'] for emp in employees if emp.get('default_position_id') in affected_positions}
+    near_days = {d + offset for d in affected_days for offset in (-1, 0, 1)} & all_days
+
+    return [
+        (affected_emps | position_emps, affected_days),
+        (position_emps | affected_emps, near_days),
+        (position_emps | affected_emps, all_days),
+        ({emp['emp_id'] for emp in employees}, all_days),
+    ]
+
+
+def repair_schedule(data, on_progress=None, stop_event=None):
+    """Incremental re-solve: repair data['current_schedule'] after data['delta'].
+
+    Everything outside a neighborhood of the affected employees/days stays fixed; the
+    neighborhood is widened step by step while the repair is infeasible or leaves a shortage.
+    Returns the optimizer result plus a minimal diff against the current schedule.
+    """
+    delta = data.get('delta', {})
+    current_entries = data.get('current_schedule', [])
+    problem = _apply_delta(_legacy_input(data), delta)
+    problem['prior_schedule'] = current_entries
+
+    date_index = {day['date']: day_idx for day_idx, day in enumerate(problem['days'])}
+    # Entries outside the horizon are not part of the repair (and never in its diff)
+    current_keys = {}
+    for entry in current_entries:
+        day_idx = date_index.get(str(entry['date'])[:10])
+        if day_idx is not None:
+            current_keys[(entry['emp_id'], day_idx, entry['shift_id'], entry['position_id'])] = entry
+    settings = problem.get('settings', {})
+
+    time_budget = settings.get('max_solve_time', 120.0)
+    attempts = []
+    best = None
+
+    neighborhoods = _repair_neighborhoods(problem, delta)
+    for level, neighborhood in enumerate(neighborhoods):
+        levels_left = len(neighborhoods) - level
+        level_settings = {**settings, 'max_solve_time': time_budget / levels_left}
+        if levels_left > 1:
+            # Smaller neighborhoods are expected to fail; only the full re-solve is explained
+            level_settings['infeasibility_diagnosis'] = 'off'
+
+        scheduler = UniversalShiftSchedulerCP(on_progress, stop_event)
+        result = scheduler.optimize_schedule({**problem, 'settings': level_settings}, current_keys.keys(),
+                                             neighborhood)
+        time_budget = max(0.1, time_budget - result.get('solve_time', 0) / 1000)
+
+        attempts.append({
+            'level': level,
+            'employees': len(neighborhood[0]),
+            'days': len(neighborhood[1]),
+            'status': result.get('status'),
+            'shortage': result.get('shortage_count'),
+            'solve_time': result.get('solve_time')
+        })
+        _log_settings(settings, 'summary', f"[CP-SAT Repair] Level {level}: {attempts[-1]}")
+
+        if result['success'] and (best is None or result['shortage_count'] < best['shortage_count']):
+            best = result
+        if result['success'] and result['shortage_count'] == 0:
+            break
+
+    if best is None:
+        return {
+            'success': False,
+            'mode': 'incremental',
+            'error': 'No repair found even with the full schedule free',
+            'attempts': attempts,
+            'diagnosis': result.get('diagnosis')
+        }
+
+    new_keys = {}
+    for entry in best['schedule']:
+        new_keys[(entry['emp_id'], date_index[entry['date']], entry['shift_id'], entry['position_id'])] = entry
+
+    best['mode'] = 'incremental'
+    best['attempts'] = attempts
+    best['diff'] = {
+        'added': [entry for key, entry in new_keys.items() if key not in current_keys],
+        'removed': [entry for key, entry in current_keys.items() if key not in new_keys]
+    }
+    _log_settings(settings, 'summary',
+                  f"[CP-SAT Repair] Diff: +{len(best['diff']['added'])} / -{len(best['diff']['removed'])}")
+    return best
+
+
+def _position_components(data):
+    """Groups of staffed positions whose employee sets don't overlap, in input order.
+
+    Employees only get variables for their default position, so no two positions share
+    an employee and every staffed position is its own component. Positions without
+    employees are left out, as in the full model.
+    """
+    staffed = {emp.get('default_position_id') for emp in data['employees']}
+    return [[position['pos_id']] for position in data['positions'] if position['pos_id'] in staffed]
+
+
+def _use_decomposition(data, components):
+    settings = data.get('settings', {})
+    mode = settings.get('decomposition', 'auto')
+    if mode not in DECOMPOSITION_MODES:
+        _log_settings(settings, 'summary', f"[CP-SAT Decompose] Unknown decomposition mode '{mode}', using 'auto'")
+        mode = 'auto'
+    if mode == 'never' or len(components) < 2:
+        return False
+    return mode == 'always' or len(data['employees']) >= DECOMPOSITION_MIN_EMPLOYEES
+
+
+def _solve_components(data, components, settings, time_budget, parallel, on_progress=None, stop_event=None,
+                      prior_schedules=None, workload_bands=None):
+    """Solve every component as its own model, `parallel` at a time.
+
+    Threads are enough here: CP-SAT releases the GIL while searching, and they also work
+    inside the server's worker processes. Each component gets its share of the time left
+    when it starts, so time saved by components that finish early goes to the next ones.
+    """
+    deadline = time.perf_counter() + time_budget
+    lock = threading.Lock()
+    not_started = [len(components)]
+
+    def solve_component(index):
+        with lock:
+            rounds_left = -(-not_started[0] // parallel)
+            not_started[0] -= 1
+        time_limit = max(0.1, (deadline - time.perf_counter()) / rounds_left)
+        component_data = {**data, 'settings': {**settings, 'max_solve_time': time_limit},
+                          'component_positions': components[index]}
+        if prior_schedules is not None:
+            component_data['prior_schedule'] = prior_schedules[index]
+        if workload_bands is not None and workload_bands[index] is not None:
+            component_data['workload_band'] = workload_bands[index]
+
+        component_progress = None
+        if on_progress is not None:
+            def component_progress(progress):
+                on_progress({**progress, 'component': index})
+
+        scheduler = UniversalShiftSchedulerCP(component_progress, stop_event)
+        return scheduler.optimize_schedule(component_data)
+
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        return list(executor.map(solve_component, range(len(components))))
+
+
+def _workload_bands(results):
+    """For every component, the workload extremes (minutes) of all the other components"""
+    ranges = [result['stats'].get('workload_range') for result in results]
+    bands = []
+    for index in range(len(results)):
+        others = [workload for other, workload in enumerate(ranges) if other != index and workload]
+        bands.append({'min': min(workload['min'] for workload in others),
+                      'max': max(workload['max'] for workload in others)} if others else None)
+    return bands
+
+
+def _merge_component_results(results, fairness_importance, fairness_model='spread'):
+    """One schedule and one set of stats from the component results.
+
+    The objective is the sum of the component objectives, with their local workload
+    spread replaced by the spread over the whole site under the 'spread' fairness model.
+    """
+    schedule = []
+    stats = {
+        'total_assignments': 0,
+        'total_shortage': 0,
+        'position_matches': 0,
+        'hours_per_employee': {},
+        'shifts_per_employee': {},
+        'permanent_constraints_respected': results[0]['stats']['permanent_constraints_respected'],
+        'blocked_assignments': 0,
+        'pruned_assignments': defaultdict(int),
+        'temporary_constraints_respected': results[0]['stats']['temporary_constraints_respected'],
+        'prefer_work_satisfied': 0,
+        'objective_value': 0,
+        'shortage_slots': 0,
+        'fairness_penalty': 0,
+        'fairness_model': fairness_model
+    }
+
+    component_penalties = 0
+    for result in results:
+        for entry in result['schedule']:
+            schedule.append({**entry, 'assignment_index': len(schedule)})
+
+        component_stats = result['stats']
+        for key in ('total_assignments', 'total_shortage', 'position_matches', 'blocked_assignments',
+                    'prefer_work_satisfied', 'shortage_slots'):
+            stats[key] += component_stats[key]
+        stats['hours_per_employee'].update(component_stats['hours_per_employee'])
+        stats['shifts_per_employee'].update(component_stats['shifts_per_employee'])
+        for reason, count in component_stats['pruned_assignments'].items():
+            stats['pruned_assignments'][reason] += count
+        stats['objective_value'] += component_stats['objective_value'] + component_stats['fairness_penalty']
+        component_penalties += component_stats['fairness_penalty']
+
+    stats['pruned_assignments'] = dict(stats['pruned_assignments'])
+    rests = [result['stats']['min_rest_hours'] for result in results if result['stats'].get('min_rest_hours') is not None]
+    stats['min_rest_hours'] = min(rests) if rests else None
+    ranges = [result['stats']['workload_range'] for result in results if result['stats'].get('workload_range')]
+    if ranges:
+        stats['workload_range'] = {'min': min(workload['min'] for workload in ranges),
+                                   'max': max(workload['max'] for workload in ranges)}
+    if fairness_model != 'spread':
+        stats['fairness_penalty'] = component_penalties
+    elif ranges:
+        stats['fairness_penalty'] = fairness_importance * (stats['workload_range']['max'] - stats['workload_range']['min'])
+    stats['objective_value'] -= stats['fairness_penalty']
+
+    return schedule, stats
+
+
+def solve_decomposed(data, components, on_progress=None, stop_event=None):
+    """Solve independent position components as separate models in parallel.
+
+    Components share no employee, so every constraint stays inside one component; the
+    only term coupling them is the workload spread of the 'spread' fairness model. After the
+    components are solved on their own, a coordination pass re-solves each of them,
+    hinted with its first schedule, against the fixed workload extremes of the others
+    and is kept when the merged objective improves.
+    """
+    started = time.perf_counter()
+    settings = data.get('settings', {})
+    time_budget = float(settings.get('max_solve_time', 120.0))
+    cores = settings.get('search_workers_cap') or os.cpu_count() or 1
+    parallel = min(len(components), cores)
+    fairness_weight = settings.get('fairness_weight', 50)
+    fairness_importance = int(fairness_weight / 10)
+    fairness_model = _fairness_model(settings)
+    # Only the workload spread couples components, the target models are per employee
+    coordinate = fairness_weight > 0 and fairness_model == 'spread'
+
+    # Component solves stay quiet unless verbose, the summary is printed here
+    component_settings = {
+        **settings,
+        'search_workers_cap': max(1, cores // parallel),
+        'log_level': 'verbose' if settings.get('log_level') == 'verbose' else 'off'
+    }
+    solve_share = 1 - COORDINATION_TIME_SHARE if coordinate else 1
+    _log_settings(settings, 'summary', f"[CP-SAT Decompose] {len(components)} components, {parallel} in parallel "
+                                       f"with {component_settings['search_workers_cap']} search workers each")
+
+    results = _solve_components(data, components, component_settings, time_budget * solve_share,
+                                parallel, on_progress, stop_event)
+    timings = {'components': round((time.perf_counter() - started) * 1000, 3)}
+
+    # Components without any solution yet get the rest of the budget before coordination
+    # (a component over the memory ceiling would only hit it again)
+    failed = [index for index, result in enumerate(results) if not result['success']]
+    if (failed and coordinate and all(results[index]['status'] != MEMORY_LIMIT_STATUS for index in failed)
+            and not (stop_event is not None and stop_event.is_set())):
+        retry_started = time.perf_counter()
+        retry_parallel = min(len(failed), parallel)
+        retried = _solve_components(data, [components[index] for index in failed],
+                                    {**component_settings, 'search_workers_cap': max(1, cores // retry_parallel)},
+                                    max(0.1, time_budget - (retry_started - started)),
+                                    retry_parallel, on_progress, stop_event)
+        for index, result in zip(failed, retried):
+            results[index] = result
+        failed = [index for index in failed if not results[index]['success']]
+        timings['retry'] = round((time.perf_counter() - retry_started) * 1000, 3)
+    if failed:
+        return {
+            'success': False,
+            'error': f"No solution found for positions {[components[index] for index in failed]}",
+            'status': results[failed[0]]['status'],
+            'diagnosis': results[failed[0]].get('diagnosis'),
+            'decomposition': {'components': len(components), 'parallel': parallel, 'failed': failed},
+            'profile': {'timings': timings, 'components': [result.get('profile') for result in results]}
+        }
+
+    schedule, stats = _merge_component_results(results, fairness_importance, fairness_model)
+    workload_bands = _workload_bands(results)
+    coordination = None
+    remaining = time_budget - (time.perf_counter() - started)
+    rounds = -(-len(components) // parallel)
+    if (coordinate and any(workload_bands) and remaining >= COORDINATION_MIN_SECONDS * rounds
+            and not (stop_event is not None and stop_event.is_set())):
+        coordination_started = time.perf_counter()
+        coordinated = _solve_components(
+            data, components, component_settings, remaining, parallel, on_progress, stop_event,
+            prior_schedules=[result['schedule'] for result in results], workload_bands=workload_bands)
+
+        # Components without a coordinated solution keep their first one
+        coordinated = [update if update['success'] else result for update, result in zip(coordinated, results)]
+        coordinated_schedule, coordinated_stats = _merge_component_results(coordinated, fairness_importance, fairness_model)
+        coordination = {
+            'objective_before': stats['objective_value'],
+            'objective_after': coordinated_stats['objective_value'],
+            'accepted': coordinated_stats['objective_value'] > stats['objective_value']
+        }
+        if coordination['accepted']:
+            results, schedule, stats = coordinated, coordinated_schedule, coordinated_stats
+        timings['coordination'] = round((time.perf_counter() - coordination_started) * 1000, 3)
+        _log_settings(settings, 'summary', f"[CP-SAT Decompose] Coordination pass: {coordination}")
+
+    # Optimality of every component only proves the site optimum when nothing couples them
+    proven = all(result['status'] == 'optimal' for result in results) and not (coordinate and any(workload_bands))
+    model_size = defaultdict(int)
+    constraint_families = defaultdict(int)
+    for result in results:
+        for key, value in result['profile'].get('model', {}).items():
+            model_size[key] += value
+        for family, count in result['profile'].get('constraints', {}).items():
+            constraint_families[family] += count
+
+    _log_settings(settings, 'summary', f"[CP-SAT Decompose] Merged {stats['total_assignments']} assignments, "
+                                       f"shortage {stats['total_shortage']}, objective {stats['objective_value']}")
+    merged = {
+        'success': True,
+        'schedule': schedule,
+        'stats': stats,
+        'status': 'optimal' if proven else 'feasible',
+        'solve_time': (time.perf_counter() - started) * 1000,
+        'coverage_rate': (1 - stats['total_shortage'] / max(1, stats['shortage_slots'])) * 100,
+        'shortage_count': stats['total_shortage'],
+        'warm_start': {
+            'provided': len(data.get('prior_schedule') or []),
+            'hints_kept': sum(result['warm_start']['hints_kept'] for result in results)
+        },
+        'search_profile': results[0]['search_profile'],
+        'stopped_early': any(result['stopped_early'] for result in results),
+        'decomposition': {
+            'components': len(components),
+            'parallel': parallel,
+            'search_workers': component_settings['search_workers_cap'],
+            'coordination': coordination
+        },
+        'profile': {
+            'timings': timings,
+            'constraints': dict(constraint_families),
+            'model': dict(model_size),
+            'components': [
+                {'positions': components[index], 'status': result['status'],
+                 'objective': result['stats']['objective_value'], 'solve_time': result['solve_time'],
+                 'model': result['profile'].get('model'), 'solver': result['profile'].get('solver')}
+                for index, result in enumerate(results)
+            ]
+        }
+    }
+    if all('coverage_report' in result for result in results):
+        merged['coverage_report'] = [row for result in results for row in result['coverage_report']]
+    return merged
+
+
+def _canonical_problem(data):
+    """Normalized problem for the result cache fingerprint.
+
+    Identical for the legacy and columnar input formats and independent of list order
+    and of fields the optimizer never reads (names, the prior schedule used as hints).
+    """
+    def constraint_key(constraint):
+        emp_id, day_idx, shift_id = constraint
+        return emp_id, day_idx, -1 if shift_id is None else shift_id
+
+    settings = data.get('settings', {})
+    return {
+        'employees': sorted([emp['emp_id'], emp.get('default_position_id'), emp.get('contract_hours_per_week')]
+                            for emp in data['employees']),
+        'positions': sorted(position['pos_id'] for position in data['positions']),
+        'position_shifts': sorted(
+            [pos_id, sorted([shift['shift_id'], shift['start_time'], shift['duration_minutes'],
+                             bool(shift.get('is_night_shift', False))] for shift in pos_shifts)]
+            for pos_id, pos_shifts in _load_position_shifts(data).items()),
+        'requirements': sorted([*slot, required] for slot, required in _load_requirements(data).items()),
+        'constraints': {constraint_type: sorted(_load_constraints(data, constraint_type), key=constraint_key)
+                        for constraint_type in CONSTRAINT_TYPES},
+        'days': [[day['date'], week] for day, week in zip(data['days'], _calendar_weeks(data['days']))],
+        'carry_over': sorted([emp_id, entry] for emp_id, entry in _load_carry_over(data).items()),
+        'workload_history': sorted([entry['emp_id'], entry.get('worked_minutes', 0)]
+                                   for entry in data.get('workload_history') or []),
+        'settings': {key: value for key, value in settings.items() if key not in CACHE_NEUTRAL_SETTINGS}
+    }
+
+
+def _result_cache(settings):
+    """ResultCache configured by settings.result_cache ({dir, max_bytes, max_age}), or None"""
+    config = settings.get('result_cache')
+    if not config or not config.get('dir'):
+        return None
+    return ResultCache(config['dir'], config.get('max_bytes') or DEFAULT_MAX_BYTES,
+                       config.get('max_age') or DEFAULT_MAX_AGE)
+
+
+def lookup_cached_result(data):
+    """Cached result for data without solving: {hit, fingerprint[, status, age, result]}"""
+    settings = data.get('settings', {})
+    cache = _result_cache(settings)
+    if cache is None or data.get('mode') in UNCACHED_MODES:
+        return {'hit': False, 'fingerprint': None}
+
+    key = fingerprint(_canonical_problem(data))
+    entry = cache.get(key, float(settings.get('max_solve_time', 120.0)))
+    if entry is None:
+        return {'hit': False, 'fingerprint': key}
+    return {'hit': True, 'fingerprint': key, 'status': entry['status'],
+            'age': time.time() - entry['created'], 'result': entry['result']}
+
+
+def solve(data, on_progress=None, stop_event=None):
+    """Solve one optimizer input, reusing a cached result of the same problem when allowed"""
+    settings = data.get('settings', {})
+    cache = _result_cache(settings)
+    if cache is None or data.get('mode') in UNCACHED_MODES:
+        return _dispatch(data, on_progress, stop_event)
+
+    started = time.perf_counter()
+    key = fingerprint(_canonical_problem(data))
+    time_budget = float(settings.get('max_solve_time', 120.0))
+    entry = cache.get(key, time_budget)
+    if entry is not None:
+        _log_settings(settings, 'summary', f"[CP-SAT Cache] Reusing {entry['status']} result {key[:12]}")
+        return {
+            **entry['result'],
+            'solve_time': (time.perf_counter() - started) * 1000,
+            'cache': {'hit': True, 'fingerprint': key, 'age': time.time() - entry['created'],
+                      'solve_time': entry['result'].get('solve_time')}
+        }
+
+    result = _dispatch(data, on_progress, stop_event)
+    result['cache'] = {'hit': False, 'fingerprint': key, 'stored': cache.put(key, result, time_budget)}
+    return result
+
+
+def _dispatch(data, on_progress=None, stop_event=None):
+    """Dispatch one optimizer input on its mode"""
+    if data.get('mode') == 'incremental':
+        return repair_schedule(data, on_progress, stop_event)
+    if data.get('mode') == SCENARIO_MODE:
+        # One model re-weighted per scenario, never decomposed
+        return UniversalShiftSchedulerCP(on_progress, stop_event).optimize_schedule(data)
+    if data.get('settings', {}).get('algorithm') == 'heuristic':
+        return solve_heuristic(data)
+
+    components = _position_components(data)
+    if _use_decomposition(data, components):
+        return solve_decomposed(data, components, on_progress, stop_event)
+
+    scheduler = UniversalShiftSchedulerCP(on_progress, stop_event)
+    return scheduler.optimize_schedule(data)
+
+
+def _add_load_time(result, load_time):
+    """Record how long decoding the request took (ms) in the result profile"""
+    result.setdefault('profile', {}).setdefault('timings', {})['json_load'] = load_time
+    return result
+
+
+def _warm_worker():
+    """Pool initializer: load the native solver once so the first request doesn't pay for it"""
+    with contextlib.redirect_stdout(sys.stderr):
+        model = cp_model.CpModel()
+        model.NewBoolVar('warmup')
+        cp_model.CpSolver().Solve(model)
+
+
+def _solve_request(request, progress_queue=None, stop_event=None):
+    """Solve one server request inside a worker process"""
+    data = request['data']
+    settings = data.setdefault('settings', {})
+    time_limit = request.get('time_limit')
+    if time_limit is not None:
+        settings['max_solve_time'] = float(time_limit)
+    if request.get('search_workers'):
+        settings['search_workers_cap'] = request['search_workers']
+
+    on_progress = None
+    if progress_queue is not None:
+        def on_progress(progress):
+            progress_queue.put({'id': request.get('id'), **progress})
+
+    # stdout is the protocol channel, keep optimizer diagnostics on stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        result = solve(data, on_progress, stop_event)
+
+    if request.get('load_time') is not None:
+        _add_load_time(result, request['load_time'])
+    return result
+
+
+class OptimizerServer:
+    """Pool of pre-warmed optimizer processes fed with line-delimited JSON requests.
+
+    Request:  {"id": "...", "data": {...}, "time_limit": 30, "progress": false}
+              {"id": "...", "command": "stop"}   - stop the search, answer with the best solution so far
+    Response: {"id": "...", "success": true, "result": {...}}
+              {"id": "...", "success": false, "error": "..."}
+              {"id": "...", "event": "progress", "objective": ..., ...}   - only with "progress": true
+    """
+
+    MAX_ATTEMPTS = 2
+
+    def __init__(self, workers=1):
+        self.workers = max(1, int(workers))
+        # CP-SAT search threads per solve, so parallel solves don't oversubscribe the cores
+        self.search_workers = max(1, (os.cpu_count() or 1) // self.workers)
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context('spawn')
+        self._executor = self._create_executor()
+        # Progress/stop channel to the workers, created with the first request
+        self._manager = None
+        self._progress_queue = None
+        self._responders = {}
+        self._stop_events = {}
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_warm_worker
+        )
+
+    def _restart_executor(self, broken_executor):
+        """Replace a pool whose worker died; only the first caller per crash restarts it"""
+        with self._lock:
+            if self._executor is broken_executor:
+                print(f"[CP-SAT Server] Worker crashed, restarting pool", file=sys.stderr)
+                broken_executor.shutdown(wait=False, cancel_futures=False)
+                self._executor = self._create_executor()
+            return self._executor
+
+    def submit(self, request, respond, attempt=1):
+        """Queue a request; respond(message) is called from a pool thread when it finishes"""
+        request_id = request.get('id')
+        if not isinstance(request.get('data'), dict):
+            respond({'id': request_id, 'success': False, 'error': 'Request has no data object'})
+            return
+
+        request.setdefault('search_workers', self.search_workers)
+
+        # Every request can be stopped, only requests with "progress" stream events
+        progress_queue = self._ensure_progress_channel()
+        stop_event = self._stop_events.setdefault(request_id, self._manager.Event())
+        if request.get('progress'):
+            self._responders[request_id] = respond
+        else:
+            progress_queue = None
+
+        with self._lock:
+            executor = self._executor
+        try:
+            future = executor.submit(_solve_request, request, progress_queue, stop_event)
+        except BrokenProcessPool:
+            executor = self._restart_executor(executor)
+            future = executor.submit(_solve_request, request, progress_queue, stop_event)
+
+        def on_done(done_future):
+            try:
+                message = {'id': request_id, 'success': True, 'result': done_future.result()}
+            except BrokenProcessPool:
+                self._restart_executor(executor)
+                if attempt < self.MAX_ATTEMPTS:
+                    self.submit(request, respond, attempt + 1)
+                    return
+                message = {'id': request_id, 'success': False, 'error': 'Optimizer worker crashed'}
+            except Exception as e:
+                message = {'id': request_id, 'success': False, 'error': str(e)}
+
+            self._responders.pop(request_id, None)
+            self._stop_events.pop(request_id, None)
+            respond(message)
+
+        future.add_done_callback(on_done)
+
+    def _ensure_progress_channel(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = self._context.Manager()
+                self._progress_queue = self._manager.Queue()
+                threading.Thread(target=self._forward_progress, daemon=True).start()
+            return self._progress_queue
+
+    def _forward_progress(self):
+        """Relay worker progress events to the connection that sent the request"""
+        while True:
+            message = self._progress_queue.get()
+            if message is None:
+                return
+            respond = self._responders.get(message.get('id'))
+            if respond:
+                respond(message)
+
+    def stop(self, request_id):
+        """Cooperative stop: the worker returns the best solution found so far"""
+        stop_event = self._stop_events.get(request_id)
+        if stop_event is not None:
+            stop_event.set()
+
+    def handle_line(self, line, respond):
+        line = line.strip()
+        if not line:
+            return
+        load_started = time.perf_counter()
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            respond({'id': None, 'success': False, 'error': f'Invalid request: {e}'})
+            return
+        if isinstance(request, dict):
+            request['load_time'] = round((time.perf_counter() - load_started) * 1000, 3)
+
+        if request.get('command') == 'stop':
+            self.stop(request.get('id'))
+            return
+        if request.get('command') == 'cache_lookup':
+            # Only reads one cache file, answered right away instead of queueing on the pool
+            try:
+                respond({'id': request.get('id'), 'success': True, 'result': lookup_cached_result(request['data'])})
+            except Exception as e:
+                respond({'id': request.get('id'), 'success': False, 'error': str(e)})
+            return
+        self.submit(request, respond)
+
+    def shutdown(self):
+        with self._lock:
+            self._executor.shutdown(wait=True)
+            if self._manager is not None:
+                self._progress_queue.put(None)
+                self._manager.shutdown()
+
+
+def _line_writer(stream):
+    """Build a thread-safe responder writing one JSON document per line"""
+    lock = threading.Lock()
+
+    def respond(message):
+        payload = json.dumps(message, separators=(',', ':')) + '\n'
+        with lock:
+            stream.write(payload)
+            stream.flush()
+
+    return respond
+
+
+def serve_stdio(server):
+    """Serve requests from stdin, answering on stdout until stdin closes"""
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    respond = _line_writer(protocol_out)
+    respond({'event': 'ready', 'workers': server.workers})
+
+    for line in sys.stdin:
+        server.handle_line(line, respond)
+
+    server.shutdown()
+
+
+def serve_socket(server, socket_path):
+    """Serve requests on a Unix socket, one response stream per connection"""
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            writer = _line_writer(_SocketTextWriter(self.wfile))
+            for raw_line in self.rfile:
+                server.handle_line(raw_line.decode('utf-8'), writer)
+
+    class _SocketTextWriter:
+        def __init__(self, wfile):
+            self.wfile = wfile
+
+        def write(self, text):
+            self.wfile.write(text.encode('utf-8'))
+
+        def flush(self):
+            self.wfile.flush()
+
+    sys.stdout = sys.stderr
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # stale socket left by a previous server
+
+    with socketserver.ThreadingUnixStreamServer(socket_path, RequestHandler) as unix_server:
+        print(f"[CP-SAT Server] Listening on {socket_path} with {server.workers} workers", file=sys.stderr)
+        try:
+            unix_server.serve_forever()
+        finally:
+            server.shutdown()
+
+
+def run_batch(batch_file, workers=None):
+    """Solve many problems from one batch file in parallel, streaming results as they finish.
+
+    Batch file: {"problems": [{"id": "...", "data": {...}, "time_limit": 60}, ...], "workers": 4}
+    batch_file '-' reads the batch from stdin (one frame or plain JSON).
+    Each finished problem is written to stdout as one line in the server response format.
+    """
+    if batch_file == '-':
+        batch = read_message(sys.stdin.buffer)
+    else:
+        with open(batch_file, 'r', encoding='utf-8') as f:
+            batch = json.load(f)
+
+    problems = batch['problems'] if isinstance(batch, dict) else batch
+    workers = workers or (batch.get('workers') if isinstance(batch, dict) else None) or os.cpu_count() or 1
+    workers = min(workers, max(1, len(problems)))
+
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+    respond = _line_writer(protocol_out)
+    finished = threading.Semaphore(0)
+
+    def respond_and_count(message):
+        respond(message)
+        finished.release()
+
+    print(f"[CP-SAT Batch] Solving {len(problems)} problems with {workers} workers", file=sys.stderr)
+    server = OptimizerServer(workers)
+    for problem in problems:
+        server.submit(problem, respond_and_count)
+
+    for _ in problems:
+        finished.acquire()
+
+    server.shutdown()
+    respond({'event': 'done', 'problems': len(problems)})
+
+
+def _watch_stdin_for_stop(stop_event):
+    """Set stop_event when a 'stop' line arrives on stdin"""
+
+    def watch():
+        for line in sys.stdin:
+            if line.strip() in ('stop', '{"command":"stop"}', '{"command": "stop"}'):
+                stop_event.set()
+                return
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def _frame_writer(stream, fmt):
+    """Build a thread-safe writer sending every message as one frame"""
+    lock = threading.Lock()
+
+    def write(message):
+        with lock:
+            write_frame(stream, message, fmt)
+
+    return write
+
+
+def run_file(data_file, stream_progress=False, output_fd=None, output_format='json', cache_lookup=False):
+    """Solve one problem, or only look it up in the result cache with cache_lookup.
+
+    data_file '-' reads the input from stdin (one frame or plain JSON); the result is then
+    written as a frame to stdout, or to output_fd when given, in output_format.
+    Otherwise the legacy mode writes <name>_result.json next to the input file.
+
+    With stream_progress every improving solution is reported as an
+    {"event": "progress", ...} message and a 'stop' line on stdin ends the search early.
+    """
+    framed = data_file == '-' or output_fd is not None
+    write = None
+    if framed:
+        if output_fd is not None:
+            output = os.fdopen(output_fd, 'wb')
+        else:
+            # stdout is the result channel, keep optimizer diagnostics on stderr
+            output = sys.stdout.buffer
+            sys.stdout = sys.stderr
+        write = _frame_writer(output, output_format)
+
+    # Load data
+    load_started = time.perf_counter()
+    if data_file == '-':
+        data = read_message(sys.stdin.buffer)
+    else:
+        with open(data_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
+    load_time = round((time.perf_counter() - load_started) * 1000, 3)
+
+    on_progress = None
+    stop_event = None
+    if stream_progress:
+        stop_event = threading.Event()
+        _watch_stdin_for_stop(stop_event)
+
+        if write:
+            on_progress = write
+        else:
+            def on_progress(progress):
+                print(json.dumps(progress, separators=(',', ':')), flush=True)
+
+    if cache_lookup:
+        result = lookup_cached_result(data)
+    else:
+        # Optimize (full solve or incremental repair, depending on data['mode'])
+        result = _add_load_time(solve(data, on_progress, stop_event), load_time)
 
-        # Create a scheduler and optimize
-        scheduler = UniversalShiftSchedulerCP()
-        result = scheduler.optimize_schedule(data)
+    if write:
+        write({'event': 'result', 'result': result})
+        return
 
-        # Save result to file
-        result_file = args.data_file.replace('.json', '_result.json')
-        with open(result_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2)
+    # Save result to file
+    result_file = data_file.replace('.json', '_result.json')
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, separators=(',', ':'))
 
-        # Print only success status
-        print(json.dumps({"success": True, "result_file": result_file}))
+    # Print only success status
+    print(json.dumps({"success": True, "result_file": result_file}))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('data_file', nargs='?',
+                        help='Path to JSON data file, or - to read the input from stdin')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a long-lived server reading line-delimited JSON requests')
+    parser.add_argument('--batch', help='Path to a batch JSON file with many problems to solve in parallel')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (server: 1, batch: CPU count)')
+    parser.add_argument('--socket', help='Listen on this Unix socket instead of stdin/stdout')
+    parser.add_argument('--progress', action='store_true',
+                        help='Print every improving solution as JSON and accept "stop" on stdin')
+    parser.add_argument('--output-fd', type=int,
+                        help='Write the result frame to this file descriptor instead of stdout')
+    parser.add_argument('--format', choices=FRAME_FORMATS, default='json',
+                        help='Encoding of result and progress frames')
+    parser.add_argument('--cache-lookup', action='store_true',
+                        help='Only return the cached result for the input (settings.result_cache), never solve')
+    args = parser.parse_args()
+
+    if not args.serve and not args.batch and not args.data_file:
+        parser.error('data_file is required unless --serve or --batch is given')
+
+    try:
+        if args.serve:
+            optimizer_server = OptimizerServer(args.workers or 1)
+            if args.socket:
+                serve_socket(optimizer_server, args.socket)
+            else:
+                serve_stdio(optimizer_server)
+        elif args.batch:
+            run_batch(args.batch, args.workers)
+        else:
+            run_file(args.data_file, args.progress, args.output_fd, args.format, args.cache_lookup)
 
     except Exception as e:
         import traceback
@@ -0,0 +1,383 @@
+// backend/src/services/scheduling/optimizer-codec.js
+/**
+ * Framing and encoding of optimizer input/output on pipes (see optimizer_codec.py),
+ * plus the columnar optimizer input schema.
+ *
+ * Frame: "<format> <length>\n" followed by <length> payload bytes, where format is
+ * 'json' (compact JSON) or 'pack' (MessagePack subset with extension type 1 for
+ * little-endian int32 arrays, written for Int32Array values).
+ */
+
+const FRAME_FORMATS = ['json', 'pack'];
+const INT32_ARRAY_EXT = 1;
+
+class PackWriter {
+    constructor(size = 64 * 1024) {
+        this.buffer = Buffer.allocUnsafe(size);
+        this.offset = 0;
+    }
+
+    reserve(size) {
+        if (this.offset + size <= this.buffer.length) {
+            return;
+        }
+        const grown = Buffer.allocUnsafe(Math.max(this.buffer.length * 2, this.offset + size));
+        this.buffer.copy(grown, 0, 0, this.offset);
+        this.buffer = grown;
+    }
+
+    byte(value) {
+        this.reserve(1);
+        this.buffer[this.offset++] = value;
+    }
+
+    tagged(tag, method, size, value) {
+        this.reserve(1 + size);
+        this.buffer[this.offset] = tag;
+        this.buffer[method](value, this.offset + 1);
+        this.offset += 1 + size;
+    }
+
+    bytes(source) {
+        this.reserve(source.length);
+        source.copy(this.buffer, this.offset);
+        this.offset += source.length;
+    }
+
+    length(length, fixTag, fixLimit, tags) {
+        if (length < fixLimit) {
+            this.byte(fixTag | length);
+        } else if (length <= 0xff && tags[0] !== null) {
+            this.tagged(tags[0], 'writeUInt8', 1, length);
+        } else if (length <= 0xffff) {
+            this.tagged(tags[1], 'writeUInt16BE', 2, length);
+        } else {
+            this.tagged(tags[2], 'writeUInt32BE', 4, length);
+        }
+    }
+
+    integer(value) {
+        if (value >= 0 && value < 0x80) {
+            this.byte(value);
+        } else if (value < 0 && value >= -0x20) {
+            this.byte(value & 0xff);
+        } else if (value >= 0 && value <= 0xffffffff) {
+            if (value <= 0xff) {
+                this.tagged(0xcc, 'writeUInt8', 1, value);
+            } else if (value <= 0xffff) {
+                this.tagged(0xcd, 'writeUInt16BE', 2, value);
+            } else {
+                this.tagged(0xce, 'writeUInt32BE', 4, value);
+            }
+        } else if (value < 0 && value >= -0x80000000) {
+            if (value >= -0x80) {
+                this.tagged(0xd0, 'writeInt8', 1, value);
+            } else if (value >= -0x8000) {
+                this.tagged(0xd1, 'writeInt16BE', 2, value);
+            } else {
+                this.tagged(0xd2, 'writeInt32BE', 4, value);
+            }
+        } else {
+            this.tagged(0xd3, 'writeBigInt64BE', 8, BigInt(value));
+        }
+    }
+
+    value(value) {
+        if (value === null || value === undefined) {
+            this.byte(0xc0);
+        } else if (value === true) {
+            this.byte(0xc3);
+        } else if (value === false) {
+            this.byte(0xc2);
+        } else if (typeof value === 'number') {
+            if (Number.isSafeInteger(value)) {
+                this.integer(value);
+            } else {
+                this.tagged(0xcb, 'writeDoubleBE', 8, value);
+            }
+        } else if (typeof value === 'string') {
+            const data = Buffer.from(value, 'utf8');
+            this.length(data.length, 0xa0, 32, [0xd9, 0xda, 0xdb]);
+            this.bytes(data);
+        } else if (value instanceof Int32Array) {
+            const data = Buffer.alloc(value.length * 4);
+            value.forEach((item, index) => data.writeInt32LE(item, index * 4));
+            this.length(data.length, 0, 0, [0xc7, 0xc8, 0xc9]);
+            this.byte(INT32_ARRAY_EXT);
+            this.bytes(data);
+        } else if (Buffer.isBuffer(value)) {
+            this.length(value.length, 0, 0, [0xc4, 0xc5, 0xc6]);
+            this.bytes(value);
+        } else if (Array.isArray(value)) {
+            this.length(value.length, 0x90, 16, [null, 0xdc, 0xdd]);
+            value.forEach(item => this.value(item));
+        } else if (value instanceof Date) {
+            this.value(value.toJSON());
+        } else if (typeof value === 'object') {
+            if (typeof value.toJSON === 'function') {
+                this.value(value.toJSON());
+                return;
+            }
+            // Same key filtering as JSON.stringify
+            const entries = Object.entries(value).filter(([, item]) => item !== undefined && typeof item !== 'function');
+            this.length(entries.length, 0x80, 16, [null, 0xde, 0xdf]);
+            for (const [key, item] of entries) {
+                this.value(key);
+                this.value(item);
+            }
+        } else {
+            throw new TypeError(`Cannot pack ${typeof value}`);
+        }
+    }
+}
+
+/**
+ * Encode a value in the 'pack' format
+ */
+function pack(value) {
+    const writer = new PackWriter();
+    writer.value(value);
+    return writer.buffer.subarray(0, writer.offset);
+}
+
+const LENGTH_READERS = {
+    0xc4: ['readUInt8', 1], 0xc5: ['readUInt16BE', 2], 0xc6: ['readUInt32BE', 4],
+    0xc7: ['readUInt8', 1], 0xc8: ['readUInt16BE', 2], 0xc9: ['readUInt32BE', 4],
+    0xd9: ['readUInt8', 1], 0xda: ['readUInt16BE', 2], 0xdb: ['readUInt32BE', 4],
+    0xdc: ['readUInt16BE', 2], 0xdd: ['readUInt32BE', 4],
+    0xde: ['readUInt16BE', 2], 0xdf: ['readUInt32BE', 4],
+};
+
+const SCALAR_READERS = {
+    0xca: ['readFloatBE', 4], 0xcb: ['readDoubleBE', 8],
+    0xcc: ['readUInt8', 1], 0xcd: ['readUInt16BE', 2], 0xce: ['readUInt32BE', 4],
+    0xd0: ['readInt8', 1], 0xd1: ['readInt16BE', 2], 0xd2: ['readInt32BE', 4],
+};
+
+/**
+ * Decode a 'pack' payload
+ */
+function unpack(buffer) {
+    let offset = 0;
+
+    const take = (size) => {
+        if (offset + size > buffer.length) {
+            throw new Error('Truncated pack payload');
+        }
+        offset += size;
+        return buffer.subarray(offset - size, offset);
+    };
+
+    const read = ([method, size]) => take(size)[method](0);
+
+    const sequence = (length) => {
+        const result = new Array(length);
+        for (let i = 0; i < length; i++) {
+            result[i] = value();
+        }
+        return result;
+    };
+
+    const mapping = (length) => {
+        const result = {};
+        for (let i = 0; i < length; i++) {
+            const key = value();
+            result[key] = value();
+        }
+        return result;
+    };
+
+    const ext = (length) => {
+        const type = take(1).readInt8(0);
+        const data = take(length);
+        if (type !== INT32_ARRAY_EXT) {
+            throw new Error(`Unknown pack extension type ${type}`);
+        }
+        const result = new Array(length / 4);
+        for (let i = 0; i < result.length; i++) {
+            result[i] = data.readInt32LE(i * 4);
+        }
+        return result;
+    };
+
+    function value() {
+        const tag = take(1)[0];
+
+        if (tag < 0x80) return tag;
+        if (tag >= 0xe0) return tag - 0x100;
+        if (tag < 0x90) return mapping(tag & 0x0f);
+        if (tag < 0xa0) return sequence(tag & 0x0f);
+        if (tag < 0xc0) return take(tag & 0x1f).toString('utf8');
+
+        switch (tag) {
+            case 0xc0:
+                return null;
+            case 0xc2:
+                return false;
+            case 0xc3:
+                return true;
+            case 0xc4:
+            case 0xc5:
+            case 0xc6:
+                return Buffer.from(take(read(LENGTH_READERS[tag])));
+            case 0xc7:
+            case 0xc8:
+            case 0xc9:
+                return ext(read(LENGTH_READERS[tag]));
+            case 0xcf:
+                return Number(take(8).readBigUInt64BE(0));
+            case 0xd3:
+                return Number(take(8).readBigInt64BE(0));
+            case 0xd9:
+            case 0xda:
+            case 0xdb:
+                return take(read(LENGTH_READERS[tag])).toString('utf8');
+            case 0xdc:
+            case 0xdd:
+                return sequence(read(LENGTH_READERS[tag]));
+            case 0xde:
+            case 0xdf:
+                return mapping(read(LENGTH_READERS[tag]));
+            default:
+                if (SCALAR_READERS[tag]) {
+                    return read(SCALAR_READERS[tag]);
+                }
+                throw new Error(`Unsupported pack tag 0x${tag.toString(16)}`);
+        }
+    }
+
+    const result = value();
+    if (offset !== buffer.length) {
+        throw new Error('Trailing bytes after pack payload');
+    }
+    return result;
+}
+
+/**
+ * Encode one message as a frame
+ * @param {*} message
+ * @param {'json'|'pack'} format
+ */
+function encodeFrame(message, format = 'json') {
+    let payload;
+    if (format === 'pack') {
+        payload = pack(message);
+    } else if (format === 'json') {
+        payload = Buffer.from(JSON.stringify(message), 'utf8');
+    } else {
+        throw new Error(`Unknown frame format: ${format}`);
+    }
+    return Buffer.concat([Buffer.from(`${format} ${payload.length}\n`, 'ascii'), payload]);
+}
+
+/**
+ * Incremental frame parser for a byte stream; onMessage(message) is called per frame
+ */
+class FrameReader {
+    constructor(onMessage) {
+        this.onMessage = onMessage;
+        this.buffer = Buffer.alloc(0);
+        this.header = null;
+    }
+
+    push(chunk) {
+        this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+
+        while (true) {
+            if (!this.header) {
+                const newline = this.buffer.indexOf(0x0a);
+                if (newline === -1) {
+                    return;
+                }
+                const [format, length] = this.buffer.subarray(0, newline).toString('ascii').trim().split(' ');
+                if (!FRAME_FORMATS.includes(format) || !/^\d+$/.test(length || '')) {
+                    throw new Error(`Invalid frame header: ${this.buffer.subarray(0, Math.min(newline, 40))}`);
+                }
+                this.header = {format, length: Number(length)};
+                this.buffer = this.buffer.subarray(newline + 1);
+            }
+
+            if (this.buffer.length < this.header.length) {
+                return;
+            }
+
+            const payload = this.buffer.subarray(0, this.header.length);
+            const {format} = this.header;
+            this.buffer = this.buffer.subarray(this.header.length);
+            this.header = null;
+            this.onMessage(format === 'pack' ? unpack(payload) : JSON.parse(payload.toString('utf8')));
+        }
+    }
+}
+
+const COLUMNAR_FORMAT_VERSION = 2;
+const CONSTRAINT_TYPES = ['permanent_cannot_work', 'cannot_work', 'prefer_work'];
+
+/**
+ * Convert prepared optimizer data to the columnar input (format_version 2, see cp_sat_optimizer.py):
+ * requirements become a dense (day, position, shift slot) array and constraints parallel integer columns.
+ * @param {Object} data - prepareScheduleData() output
+ * @param {boolean} typedArrays - Int32Array columns (packed as int32 arrays by the 'pack' format)
+ */
+function toColumnarInput(data, typedArrays = false) {
+    const column = values => (typedArrays ? Int32Array.from(values) : values);
+
+    const positionIndex = new Map(data.positions.map((position, index) => [position.pos_id, index]));
+    const shiftIndex = new Map(data.shifts.map((shift, index) => [shift.shift_id, index]));
+    const employeeIndex = new Map(data.employees.map((employee, index) => [employee.emp_id, index]));
+    const dayIndex = new Map(data.days.map((day, index) => [day.date, index]));
+
+    const positionShifts = data.positions.map(position =>
+        (data.position_shifts_map?.[position.pos_id] || [])
+            .filter(shiftId => shiftIndex.has(shiftId))
+            .map(shiftId => shiftIndex.get(shiftId)));
+
+    // Shift axis = slot in the position's own shift list, so the array stays dense
+    const width = Math.max(0, ...positionShifts.map(shifts => shifts.length));
+    const slotIndex = new Map();
+    positionShifts.forEach((shifts, position) => shifts.forEach((shift, slot) => {
+        slotIndex.set(`${position}:${shift}`, slot);
+    }));
+
+    const requirements = new Array(data.days.length * data.positions.length * width).fill(0);
+    for (const [key, requirement] of Object.entries(data.shift_requirements || {})) {
+        // Keys are "<pos_id>-<shift_id>-<date>"; the entry fields win when present
+        const [keyPosition, keyShift, ...keyDate] = key.split('-');
+        const day = dayIndex.get(requirement.date ?? keyDate.join('-'));
+        const position = positionIndex.get(requirement.position_id ?? Number(keyPosition));
+        const slot = slotIndex.get(`${position}:${shiftIndex.get(requirement.shift_id ?? Number(keyShift))}`);
+        if (day !== undefined && slot !== undefined && requirement.required_staff > 0) {
+            requirements[(day * data.positions.length + position) * width + slot] = requirement.required_staff;
+        }
+    }
+
+    const constraints = {...data.constraints};
+    for (const type of CONSTRAINT_TYPES) {
+        const entries = (data.constraints?.[type] || []).filter(entry =>
+            employeeIndex.has(entry.emp_id) && (entry.shift_id == null || shiftIndex.has(entry.shift_id)));
+        constraints[type] = {
+            employee: column(entries.map(entry => employeeIndex.get(entry.emp_id))),
+            day: column(entries.map(entry => entry.day_index)),
+            shift: column(entries.map(entry => (entry.shift_id == null ? -1 : shiftIndex.get(entry.shift_id)))),
+        };
+    }
+
+    const {position_shifts_map, shift_requirements, ...rest} = data;
+    return {
+        ...rest,
+        format_version: COLUMNAR_FORMAT_VERSION,
+        position_shifts: positionShifts,
+        requirements_shape: [data.days.length, data.positions.length, width],
+        requirements: column(requirements),
+        constraints,
+    };
+}
+
+module.exports = {
+    FRAME_FORMATS,
+    toColumnarInput,
+    pack,
+    unpack,
+    encodeFrame,
+    FrameReader,
+};
@@ -0,0 +1,175 @@
+// backend/src/services/scheduling/optimizer-codec.test.js
+// Round-trip tests for optimizer-codec (run: node --test)
+const {describe, test} = require('node:test');
+const assert = require('node:assert/strict');
+const {FRAME_FORMATS, pack, unpack, encodeFrame, FrameReader} = require('./optimizer-codec');
+
+const hex = value => Buffer.from(value.replace(/ /g, ''), 'hex');
+
+const readFrames = (chunks) => {
+    const messages = [];
+    const reader = new FrameReader(message => messages.push(message));
+    chunks.forEach(chunk => reader.push(chunk));
+    return {messages, reader};
+};
+
+describe('pack integers', () => {
+    const cases = [
+        [0, '00'],
+        [0x7f, '7f'],
+        [0x80, 'cc 80'],
+        [0xff, 'cc ff'],
+        [0x100, 'cd 0100'],
+        [0xffff, 'cd ffff'],
+        [0x10000, 'ce 00010000'],
+        [0xffffffff, 'ce ffffffff'],
+        [0x100000000, 'd3 0000000100000000'],
+        [-1, 'ff'],
+        [-0x20, 'e0'],
+        [-0x21, 'd0 df'],
+        [-0x80, 'd0 80'],
+        [-0x81, 'd1 ff7f'],
+        [-0x8000, 'd1 8000'],
+        [-0x8001, 'd2 ffff7fff'],
+        [-0x80000000, 'd2 80000000'],
+        [-0x80000001, 'd3 ffffffff7fffffff'],
+    ];
+
+    for (const [value, encoded] of cases) {
+        test(`boundary ${value}`, () => {
+            assert.deepEqual(pack(value), hex(encoded));
+            assert.equal(unpack(hex(encoded)), value);
+        });
+    }
+
+    test('uint64 from Python', () => {
+        // The Python writer uses uint64 (0xcf) for positive integers above uint32
+        assert.equal(unpack(hex('cf 0000000100000000')), 0x100000000);
+    });
+
+    test('non-integer numbers as float64', () => {
+        assert.deepEqual(pack(1.5), hex('cb 3ff8000000000000'));
+        assert.equal(unpack(pack(-0.25)), -0.25);
+    });
+});
+
+describe('pack values', () => {
+    test('scalars', () => {
+        for (const value of [null, true, false, '', 'день']) {
+            assert.deepEqual(unpack(pack(value)), value);
+        }
+        assert.deepEqual(unpack(pack(Buffer.from([0, 1]))), Buffer.from([0, 1]));
+    });
+
+    test('int32 array extension', () => {
+        const values = Int32Array.from([0, 1, -1, 0x7fffffff, -0x80000000]);
+        const encoded = pack(values);
+        assert.deepEqual(encoded.subarray(0, 11), hex('c7 14 01 00000000 01000000'));
+        assert.deepEqual(unpack(encoded), Array.from(values));
+    });
+
+    test('int32 array extension lengths', () => {
+        for (const [count, tag] of [[0, 0xc7], [63, 0xc7], [64, 0xc8], [0x4000, 0xc9]]) {
+            const values = Int32Array.from({length: count}, (_, index) => index - Math.floor(count / 2));
+            const encoded = pack(values);
+            assert.equal(encoded[0], tag, `count ${count}`);
+            assert.deepEqual(unpack(encoded), Array.from(values));
+        }
+    });
+
+    test('unknown extension', () => {
+        assert.throws(() => unpack(hex('c7 04 02 00000000')), /Unknown pack extension type 2/);
+    });
+
+    test('strings', () => {
+        for (const [length, tag] of [[31, 0xbf], [32, 0xd9], [0xff, 0xd9], [0x100, 0xda], [0x10000, 0xdb]]) {
+            const value = 'x'.repeat(length);
+            const encoded = pack(value);
+            assert.equal(encoded[0], tag, `length ${length}`);
+            assert.equal(unpack(encoded), value);
+        }
+    });
+
+    test('arrays', () => {
+        for (const [length, tag] of [[15, 0x9f], [16, 0xdc], [0xffff, 0xdc], [0x10000, 0xdd]]) {
+            const value = Array.from({length}, (_, index) => index);
+            const encoded = pack(value);
+            assert.equal(encoded[0], tag, `length ${length}`);
+            assert.deepEqual(unpack(encoded), value);
+        }
+    });
+
+    test('maps', () => {
+        for (const [length, tag] of [[15, 0x8f], [16, 0xde], [0x10000, 0xdf]]) {
+            const value = Object.fromEntries(
+                Array.from({length}, (_, index) => [`k${index}`, [index, {nested: String(index)}]]));
+            const encoded = pack(value);
+            assert.equal(encoded[0], tag, `length ${length}`);
+            assert.deepEqual(unpack(encoded), value);
+        }
+    });
+
+    test('JSON.stringify key filtering and toJSON', () => {
+        const date = new Date('2026-01-05T00:00:00.000Z');
+        const value = {kept: 1, skipped: undefined, method() {}, date, custom: {toJSON: () => 'custom'}};
+        assert.deepEqual(unpack(pack(value)), JSON.parse(JSON.stringify(value)));
+    });
+
+    test('truncated payload', () => {
+        const encoded = pack({values: Int32Array.from([1, 2, 3]), name: 'x'.repeat(40), big: 0x100000000});
+        for (let size = 0; size < encoded.length; size++) {
+            assert.throws(() => unpack(encoded.subarray(0, size)), /Truncated pack payload/, `size ${size}`);
+        }
+    });
+
+    test('trailing bytes', () => {
+        assert.throws(() => unpack(Buffer.concat([pack(1), hex('00')])), /Trailing bytes/);
+    });
+});
+
+describe('frames', () => {
+    const message = {id: 'a', values: [1, -2, 0x100000000], name: 'смена', nested: {ok: true}};
+
+    test('header', () => {
+        assert.deepEqual(encodeFrame({a: 1}), Buffer.from('json 7\n{"a":1}'));
+        assert.throws(() => encodeFrame({a: 1}, 'xml'), /Unknown frame format/);
+    });
+
+    for (const format of FRAME_FORMATS) {
+        test(`${format} round trip`, () => {
+            const {messages} = readFrames([encodeFrame(message, format), encodeFrame([], format)]);
+            assert.deepEqual(messages, [message, []]);
+        });
+
+        test(`${format} frames split across chunks`, () => {
+            const stream = Buffer.concat([encodeFrame(message, format), encodeFrame({id: 'b'}, format)]);
+            for (let size = 1; size <= stream.length; size++) {
+                const chunks = [];
+                for (let offset = 0; offset < stream.length; offset += size) {
+                    chunks.push(stream.subarray(offset, offset + size));
+                }
+                const {messages} = readFrames(chunks);
+                assert.deepEqual(messages, [message, {id: 'b'}], `chunk size ${size}`);
+            }
+        });
+
+        test(`${format} truncated frame waits for more data`, () => {
+            const frame = encodeFrame(message, format);
+            const {messages, reader} = readFrames([frame.subarray(0, frame.length - 1)]);
+            assert.deepEqual(messages, []);
+            reader.push(frame.subarray(frame.length - 1));
+            assert.deepEqual(messages, [message]);
+        });
+    }
+
+    test('invalid header', () => {
+        assert.throws(() => readFrames([Buffer.from('xml 3\nabc')]), /Invalid frame header/);
+        assert.throws(() => readFrames([Buffer.from('{"id": "a"}\n')]), /Invalid frame header/);
+    });
+
+    test('frames written by the Python codec', () => {
+        // optimizer_codec.write_frame(stream, {'values': array('i', [1, -1])}, 'pack')
+        const {messages} = readFrames([Buffer.from('pack 19\n'), hex('81 a6 76616c756573 c7 08 01 01000000 ffffffff')]);
+        assert.deepEqual(messages, [{values: [1, -1]}]);
+    });
+});
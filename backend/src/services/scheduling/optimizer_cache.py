@@ -0,0 +1,117 @@
+# backend/src/services/scheduling/optimizer_cache.py
+"""On-disk cache of optimizer results keyed by a canonical problem fingerprint.
+
+Every entry is one <fingerprint>.json file holding the result, the time budget it was
+solved with and its status. Entries older than max_age seconds are dropped, and the
+least recently used ones are evicted once the directory grows past max_bytes.
+
+A result proven optimal answers any later request for the same problem. A feasible
+(or heuristic) result only answers requests whose time budget is not larger, since a
+longer search could find a better schedule.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+CACHEABLE_STATUSES = ('optimal', 'feasible', 'heuristic')
+
+
+def fingerprint(problem):
+    """SHA-256 of the canonical JSON encoding of a normalized problem"""
+    encoded = json.dumps(problem, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key, time_budget):
+        """Cached entry for key usable with time_budget (seconds), or None"""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry['status'] != 'optimal' and time_budget > entry['time_budget']:
+            return None
+
+        # Reads count as use for the least-recently-used eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, result, time_budget):
+        """Store a successful result; returns whether it was stored"""
+        if not result.get('success') or result.get('stopped_early') or result.get('status') not in CACHEABLE_STATUSES:
+            return False
+
+        entry = {
+            'fingerprint': key,
+            'status': result['status'],
+            'time_budget': time_budget,
+            'created': time.time(),
+            'result': result
+        }
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, separators=(',', ':'))
+            os.replace(temp_path, self._path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+        self.evict()
+        return True
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones above max_bytes"""
+        now = time.time()
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith('.json'):
+                    continue
+                try:
+                    stat = item.stat()
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.max_age:
+                    self._remove(item.path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
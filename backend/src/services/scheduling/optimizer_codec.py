@@ -0,0 +1,260 @@
+# backend/src/services/scheduling/optimizer_codec.py
+"""Framing and encoding of optimizer input/output on pipes.
+
+A frame is a one-line ASCII header followed by the payload bytes:
+
+    <format> <length>\\n<payload>
+
+format is 'json' (compact UTF-8 JSON) or 'pack' (the MessagePack subset below).
+Frames let the bridge hand the optimizer its input on stdin and read results and
+progress events back from stdout without temp files or scanning the output.
+
+'pack' is a local MessagePack implementation (nil, bool, int, float64, str, bin,
+array, map) plus extension type 1 for little-endian int32 arrays, which keeps the
+big integer columns (requirements, constraint lists) compact and fast to decode.
+"""
+import json
+import struct
+import sys
+from array import array
+
+FRAME_FORMATS = ('json', 'pack')
+
+INT32_ARRAY_EXT = 1
+_INT32 = 'i' if array('i').itemsize == 4 else 'l'
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def _pack_int(value, out):
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -0x20 <= value < 0:
+        out.append(value & 0xff)
+    elif 0 <= value <= 0xffffffff:
+        if value <= 0xff:
+            out += struct.pack('>BB', 0xcc, value)
+        elif value <= 0xffff:
+            out += struct.pack('>BH', 0xcd, value)
+        else:
+            out += struct.pack('>BI', 0xce, value)
+    elif -0x80000000 <= value < 0:
+        if value >= -0x80:
+            out += struct.pack('>Bb', 0xd0, value)
+        elif value >= -0x8000:
+            out += struct.pack('>Bh', 0xd1, value)
+        else:
+            out += struct.pack('>Bi', 0xd2, value)
+    elif value > 0:
+        out += struct.pack('>BQ', 0xcf, value)
+    else:
+        out += struct.pack('>Bq', 0xd3, value)
+
+
+def _pack_length(length, fix_tag, fix_limit, tags, out):
+    if length < fix_limit:
+        out.append(fix_tag | length)
+    elif length <= 0xff and tags[0] is not None:
+        out += struct.pack('>BB', tags[0], length)
+    elif length <= 0xffff:
+        out += struct.pack('>BH', tags[1], length)
+    else:
+        out += struct.pack('>BI', tags[2], length)
+
+
+def _pack(value, out):
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        out += struct.pack('>Bd', 0xcb, value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        _pack_length(len(data), 0xa0, 32, (0xd9, 0xda, 0xdb), out)
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        _pack_length(len(value), 0, 0, (0xc4, 0xc5, 0xc6), out)
+        out += value
+    elif isinstance(value, array):
+        data = array(_INT32, value)
+        if _BIG_ENDIAN:
+            data.byteswap()
+        payload = data.tobytes()
+        _pack_length(len(payload), 0, 0, (0xc7, 0xc8, 0xc9), out)
+        out.append(INT32_ARRAY_EXT)
+        out += payload
+    elif isinstance(value, (list, tuple)):
+        _pack_length(len(value), 0x90, 16, (None, 0xdc, 0xdd), out)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _pack_length(len(value), 0x80, 16, (None, 0xde, 0xdf), out)
+        for key, item in value.items():
+            _pack(key if isinstance(key, str) else str(key), out)
+            _pack(item, out)
+    else:
+        raise TypeError(f'Cannot pack {type(value).__name__}')
+
+
+def pack(value):
+    """Encode value in the 'pack' format"""
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+class _Unpacker:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def take(self, size):
+        start = self.pos
+        self.pos += size
+        if self.pos > len(self.data):
+            raise ValueError('Truncated pack payload')
+        return self.data[start:self.pos]
+
+    def unpack_from(self, fmt, size):
+        return struct.unpack(fmt, self.take(size))[0]
+
+    def sequence(self, length):
+        return [self.value() for _ in range(length)]
+
+    def mapping(self, length):
+        result = {}
+        for _ in range(length):
+            key = self.value()
+            result[key] = self.value()
+        return result
+
+    def ext(self, length):
+        ext_type = self.unpack_from('>b', 1)
+        payload = self.take(length)
+        if ext_type != INT32_ARRAY_EXT:
+            raise ValueError(f'Unknown pack extension type {ext_type}')
+        data = array(_INT32)
+        data.frombytes(payload)
+        if _BIG_ENDIAN:
+            data.byteswap()
+        return data.tolist()
+
+    def value(self):
+        tag = self.take(1)[0]
+
+        if tag < 0x80:
+            return tag
+        if tag >= 0xe0:
+            return tag - 0x100
+        if tag < 0x90:
+            return self.mapping(tag & 0x0f)
+        if tag < 0xa0:
+            return self.sequence(tag & 0x0f)
+        if tag < 0xc0:
+            return str(self.take(tag & 0x1f), 'utf-8')
+
+        if tag == 0xc0:
+            return None
+        if tag == 0xc2:
+            return False
+        if tag == 0xc3:
+            return True
+        if tag in (0xc4, 0xc5, 0xc6):
+            return bytes(self.take(self.unpack_from(*_LENGTHS[tag])))
+        if tag in (0xc7, 0xc8, 0xc9):
+            return self.ext(self.unpack_from(*_LENGTHS[tag]))
+        if tag in _SCALARS:
+            return self.unpack_from(*_SCALARS[tag])
+        if tag in (0xd9, 0xda, 0xdb):
+            return str(self.take(self.unpack_from(*_LENGTHS[tag])), 'utf-8')
+        if tag in (0xdc, 0xdd):
+            return self.sequence(self.unpack_from(*_LENGTHS[tag]))
+        if tag in (0xde, 0xdf):
+            return self.mapping(self.unpack_from(*_LENGTHS[tag]))
+        raise ValueError(f'Unsupported pack tag 0x{tag:02x}')
+
+
+_LENGTHS = {
+    0xc4: ('>B', 1), 0xc5: ('>H', 2), 0xc6: ('>I', 4),
+    0xc7: ('>B', 1), 0xc8: ('>H', 2), 0xc9: ('>I', 4),
+    0xd9: ('>B', 1), 0xda: ('>H', 2), 0xdb: ('>I', 4),
+    0xdc: ('>H', 2), 0xdd: ('>I', 4),
+    0xde: ('>H', 2), 0xdf: ('>I', 4),
+}
+
+_SCALARS = {
+    0xca: ('>f', 4), 0xcb: ('>d', 8),
+    0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+    0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+}
+
+
+def unpack(data):
+    """Decode a 'pack' payload"""
+    unpacker = _Unpacker(data)
+    value = unpacker.value()
+    if unpacker.pos != len(unpacker.data):
+        raise ValueError('Trailing bytes after pack payload')
+    return value
+
+
+def encode(message, fmt='json'):
+    if fmt == 'pack':
+        return pack(message)
+    if fmt == 'json':
+        return json.dumps(message, separators=(',', ':')).encode('utf-8')
+    raise ValueError(f'Unknown frame format: {fmt}')
+
+
+def decode(payload, fmt='json'):
+    if fmt == 'pack':
+        return unpack(payload)
+    if fmt == 'json':
+        return json.loads(payload)
+    raise ValueError(f'Unknown frame format: {fmt}')
+
+
+def write_frame(stream, message, fmt='json'):
+    """Write one frame to a binary stream and flush it"""
+    payload = encode(message, fmt)
+    stream.write(f'{fmt} {len(payload)}\n'.encode('ascii') + payload)
+    stream.flush()
+
+
+def parse_header(line):
+    """(format, length) of a frame header line, or None if line is not a header"""
+    parts = line.split()
+    if len(parts) != 2 or parts[0] not in (b'json', b'pack') or not parts[1].isdigit():
+        return None
+    return parts[0].decode('ascii'), int(parts[1])
+
+
+def _read_payload(stream, fmt, length):
+    payload = stream.read(length)
+    if len(payload) != length:
+        raise ValueError(f'Truncated frame: expected {length} bytes, got {len(payload)}')
+    return decode(payload, fmt)
+
+
+def read_frame(stream):
+    """Read one frame from a binary stream; None at end of stream"""
+    header = stream.readline()
+    if not header:
+        return None
+    parsed = parse_header(header)
+    if parsed is None:
+        raise ValueError(f'Invalid frame header: {header[:40]!r}')
+    return _read_payload(stream, *parsed)
+
+
+def read_message(stream):
+    """Read one frame, or a plain JSON document up to the end of the stream"""
+    first_line = stream.readline()
+    parsed = parse_header(first_line)
+    if parsed is None:
+        return json.loads(first_line + stream.read())
+    return _read_payload(stream, *parsed)
@@ -0,0 +1,184 @@
+# backend/src/services/scheduling/test_cp_sat_optimizer.py
+"""Behaviour tests of the optimizer on small seeded problems (run: python -m pytest)"""
+from collections import defaultdict
+
+import pytest
+
+import cp_sat_optimizer as optimizer
+from benchmark.generator import generate_problem
+
+
+def _problem(**kwargs):
+    """Seeded problem solved on one worker, so results do not depend on the machine"""
+    options = {'employees': 12, 'positions': 2, 'shifts_per_position': 3, 'days': 7,
+               'constraint_density': 0.1, 'time_limit': 10, 'workers': 1}
+    return generate_problem(**{**options, **kwargs})
+
+
+def _over_constrained():
+    """One employee for one 4h shift on 7 days: every day is needed, 6 in a row are allowed"""
+    data = _problem(employees=1, positions=1, shifts_per_position=6, constraint_density=0, requirement_density=0)
+    shift = data['shifts'][0]
+    for day in data['days']:
+        data['shift_requirements'][f"1-{shift['shift_id']}-{day['date']}"] = {
+            'position_id': 1, 'shift_id': shift['shift_id'], 'date': day['date'],
+            'day_index': day['day_index'], 'required_staff': 1, 'is_working_day': True
+        }
+    return data
+
+
+def _hard_rule_violations(data, schedule):
+    """Broken hard rules of schedule, as readable strings"""
+    limits = optimizer._schedule_limits(data['settings'])
+    shifts = {shift['shift_id']: shift for shift in data['shifts']}
+    day_of = {day['date']: day['day_index'] for day in data['days']}
+    week_of = {day['day_index']: day['week_index'] for day in data['days']}
+    position_of = {emp['emp_id']: emp['default_position_id'] for emp in data['employees']}
+    blocked = {(c['emp_id'], c['day_index'], c['shift_id'])
+               for kind in ('cannot_work', 'permanent_cannot_work') for c in data['constraints'][kind]}
+
+    violations = []
+    worked = defaultdict(dict)
+    slot_counts = defaultdict(int)
+    for entry in schedule:
+        emp_id, day_idx, shift_id = entry['emp_id'], day_of[entry['date']], entry['shift_id']
+        if day_idx in worked[emp_id]:
+            violations.append(f"employee {emp_id} works twice on day {day_idx}")
+        worked[emp_id][day_idx] = shifts[shift_id]
+        if entry['position_id'] != position_of[emp_id]:
+            violations.append(f"employee {emp_id} works outside position {position_of[emp_id]}")
+        if (emp_id, day_idx, None) in blocked or (emp_id, day_idx, shift_id) in blocked:
+            violations.append(f"employee {emp_id} works a blocked shift {shift_id} on day {day_idx}")
+        slot_counts[f"{entry['position_id']}-{shift_id}-{entry['date']}"] += 1
+
+    for key, count in slot_counts.items():
+        required = data['shift_requirements'].get(key, {}).get('required_staff', 0)
+        if count > required:
+            violations.append(f"slot {key} has {count} staff for {required} required")
+
+    for emp_id, days in worked.items():
+        week_minutes = defaultdict(int)
+        week_nights = defaultdict(int)
+        run = 0
+        for day_idx in range(len(data['days'])):
+            shift = days.get(day_idx)
+            run = run + 1 if shift else 0
+            if run > limits['max_consecutive_work_days']:
+                violations.append(f"employee {emp_id} works {run} days in a row up to day {day_idx}")
+            if not shift:
+                continue
+            week_minutes[week_of[day_idx]] += shift['duration_minutes']
+            week_nights[week_of[day_idx]] += shift['is_night_shift']
+            following = days.get(day_idx + 1)
+            required_rest = limits['min_rest_after_night' if shift['is_night_shift'] else 'min_rest_after_regular']
+            if following and optimizer._calculate_rest_minutes(shift, following, True) < required_rest:
+                violations.append(f"employee {emp_id} rests too little after day {day_idx}")
+        for week_idx, minutes in week_minutes.items():
+            if minutes > limits['max_minutes_per_week']:
+                violations.append(f"employee {emp_id} works {minutes} minutes in week {week_idx}")
+            if week_nights[week_idx] > limits['max_night_shifts_per_week']:
+                violations.append(f"employee {emp_id} works {week_nights[week_idx]} nights in week {week_idx}")
+    return violations
+
+
+def test_greedy_schedule_keeps_hard_rules():
+    data = _problem(constraint_density=0.3, seed=3)
+    data['settings']['algorithm'] = 'heuristic'
+
+    result = optimizer.solve(data)
+
+    assert result['success']
+    assert result['schedule']
+    assert _hard_rule_violations(data, result['schedule']) == []
+
+
+def test_greedy_schedule_never_replaces_proven_infeasibility():
+    data = _over_constrained()
+    data['settings']['heuristic_hints'] = True
+
+    result = optimizer.solve(data)
+
+    assert not result['success']
+    assert result['status'] == str(optimizer.cp_model.INFEASIBLE)
+    assert 'schedule' not in result
+    assert result['warm_start']['heuristic']['shortage'] > 0
+    assert result['diagnosis']['conflicts']
+
+
+def test_repair_never_uses_the_greedy_schedule():
+    data = _problem()
+    data['settings']['heuristic_hints'] = True
+    data.update({'mode': 'incremental', 'current_schedule': [],
+                 'delta': {'add': {'cannot_work': [{'emp_id': 1, 'day_index': 0, 'shift_id': None}]}}})
+
+    result = optimizer.solve(data)
+
+    assert result['success']
+    assert 'heuristic' not in result['warm_start']
+    assert result['diff']['removed'] == []
+    assert _hard_rule_violations(optimizer._apply_delta(data, data['delta']), result['schedule']) == []
+
+
+def test_diagnosis_returns_the_blocking_constraints():
+    data = _over_constrained()
+
+    result = optimizer.solve(data)
+
+    assert not result['success']
+    diagnosis = result['diagnosis']
+    assert diagnosis['source'] == 'assumptions'
+    assert diagnosis['minimal']
+    rules = sorted((conflict['rule'], conflict.get('date')) for conflict in diagnosis['conflicts'])
+    assert rules == sorted([('coverage', day['date']) for day in data['days']] + [('max_consecutive_days', None)])
+
+
+def test_diagnosis_precheck_reports_capacity_conflicts():
+    # 12h shifts every day: 84h in the week for one employee with at most 48h
+    data = _over_constrained()
+    data['shifts'][0].update({'duration': 12, 'duration_minutes': 12 * 60})
+
+    result = optimizer.solve(data)
+
+    assert not result['success']
+    assert result['diagnosis']['source'] == 'precheck'
+    assert [conflict['rule'] for conflict in result['diagnosis']['conflicts']] == ['max_hours_per_week']
+
+
+def test_repair_diff_stays_in_the_neighborhood():
+    data = _problem()
+    schedule = optimizer.solve(data)['schedule']
+    worked = schedule[0]
+    day_idx = next(day['day_index'] for day in data['days'] if day['date'] == worked['date'])
+    delta = {'add': {'cannot_work': [{'emp_id': worked['emp_id'], 'day_index': day_idx, 'shift_id': None}]}}
+
+    result = optimizer.solve({**data, 'mode': 'incremental', 'current_schedule': schedule, 'delta': delta})
+
+    assert result['success']
+    assert result['shortage_count'] == 0
+    level = result['attempts'][-1]['level']
+    assert level == 0
+    emp_ids, day_idxs = optimizer._repair_neighborhoods(data, delta)[level]
+    assert worked in result['diff']['removed']
+    for entry in result['diff']['added'] + result['diff']['removed']:
+        assert entry['emp_id'] in emp_ids
+        assert entry['date'] in {data['days'][day]['date'] for day in day_idxs}
+    assert len(result['diff']['added']) + len(result['diff']['removed']) < len(schedule)
+    assert _hard_rule_violations(optimizer._apply_delta(data, delta), result['schedule']) == []
+
+
+@pytest.mark.parametrize('algorithm', ['cp_sat', 'heuristic'])
+def test_carry_over_trailing_work_days_block_day_zero(algorithm):
+    data = _problem(days=14, time_limit=2)
+    data['settings']['algorithm'] = algorithm
+    first_day = data['days'][0]['date']
+    emp_id = next(entry['emp_id'] for entry in optimizer.solve(data)['schedule'] if entry['date'] == first_day)
+    # Six days in a row up to the horizon, the last one a 07:00-15:00 shift (no rest conflict)
+    data['carry_over'] = [{'emp_id': emp_id, 'trailing_work_days': 6, 'last_shift_end': -9 * 60,
+                           'last_shift_is_night': False}]
+
+    result = optimizer.solve(data)
+
+    assert result['success']
+    assert not [entry for entry in result['schedule'] if entry['emp_id'] == emp_id and entry['date'] == first_day]
+    assert [entry for entry in result['schedule'] if entry['emp_id'] == emp_id]
+    assert _hard_rule_violations(data, result['schedule']) == []
@@ -0,0 +1,159 @@
+# backend/src/services/scheduling/test_optimizer_codec.py
+"""Round-trip tests for optimizer_codec (run: python -m unittest test_optimizer_codec)"""
+import io
+import unittest
+from array import array
+
+import optimizer_codec as codec
+
+
+class PackIntegerTest(unittest.TestCase):
+    CASES = [
+        (0, b'\x00'),
+        (0x7f, b'\x7f'),
+        (0x80, b'\xcc\x80'),
+        (0xff, b'\xcc\xff'),
+        (0x100, b'\xcd\x01\x00'),
+        (0xffff, b'\xcd\xff\xff'),
+        (0x10000, b'\xce\x00\x01\x00\x00'),
+        (0xffffffff, b'\xce\xff\xff\xff\xff'),
+        (0x100000000, b'\xcf\x00\x00\x00\x01\x00\x00\x00\x00'),
+        (-1, b'\xff'),
+        (-0x20, b'\xe0'),
+        (-0x21, b'\xd0\xdf'),
+        (-0x80, b'\xd0\x80'),
+        (-0x81, b'\xd1\xff\x7f'),
+        (-0x8000, b'\xd1\x80\x00'),
+        (-0x8001, b'\xd2\xff\xff\x7f\xff'),
+        (-0x80000000, b'\xd2\x80\x00\x00\x00'),
+        (-0x80000001, b'\xd3\xff\xff\xff\xff\x7f\xff\xff\xff'),
+    ]
+
+    def test_boundaries(self):
+        for value, encoded in self.CASES:
+            with self.subTest(value=value):
+                self.assertEqual(codec.pack(value), encoded)
+                self.assertEqual(codec.unpack(encoded), value)
+
+    def test_int64_from_javascript(self):
+        # The JS writer uses int64 (0xd3) for every integer above uint32
+        self.assertEqual(codec.unpack(b'\xd3\x00\x00\x00\x01\x00\x00\x00\x00'), 0x100000000)
+
+
+class PackValueTest(unittest.TestCase):
+    def round_trip(self, value):
+        return codec.unpack(codec.pack(value))
+
+    def test_scalars(self):
+        for value in (None, True, False, 1.5, -0.25, '', 'день', b'\x00\x01'):
+            with self.subTest(value=value):
+                self.assertEqual(self.round_trip(value), value)
+
+    def test_int32_array_extension(self):
+        values = array('i', [0, 1, -1, 0x7fffffff, -0x80000000])
+        encoded = codec.pack(values)
+        self.assertEqual(encoded[:3], bytes([0xc7, 20, codec.INT32_ARRAY_EXT]))
+        self.assertEqual(encoded[3:7], b'\x00\x00\x00\x00')
+        self.assertEqual(encoded[7:11], b'\x01\x00\x00\x00')
+        self.assertEqual(codec.unpack(encoded), list(values))
+
+    def test_int32_array_extension_lengths(self):
+        for count, tag in ((0, 0xc7), (63, 0xc7), (64, 0xc8), (0x4000, 0xc9)):
+            with self.subTest(count=count):
+                values = array('i', (i - count // 2 for i in range(count)))
+                encoded = codec.pack(values)
+                self.assertEqual(encoded[0], tag)
+                self.assertEqual(codec.unpack(encoded), list(values))
+
+    def test_unknown_extension(self):
+        with self.assertRaises(ValueError):
+            codec.unpack(b'\xc7\x04\x02\x00\x00\x00\x00')
+
+    def test_strings(self):
+        for length, tag in ((31, 0xbf), (32, 0xd9), (0xff, 0xd9), (0x100, 0xda), (0x10000, 0xdb)):
+            with self.subTest(length=length):
+                value = 'x' * length
+                encoded = codec.pack(value)
+                self.assertEqual(encoded[0], tag)
+                self.assertEqual(codec.unpack(encoded), value)
+
+    def test_arrays(self):
+        for length, tag in ((15, 0x9f), (16, 0xdc), (0xffff, 0xdc), (0x10000, 0xdd)):
+            with self.subTest(length=length):
+                value = list(range(length))
+                encoded = codec.pack(value)
+                self.assertEqual(encoded[0], tag)
+                self.assertEqual(codec.unpack(encoded), value)
+
+    def test_maps(self):
+        for length, tag in ((15, 0x8f), (16, 0xde), (0x10000, 0xdf)):
+            with self.subTest(length=length):
+                value = {f'k{i}': [i, {'nested': str(i)}] for i in range(length)}
+                encoded = codec.pack(value)
+                self.assertEqual(encoded[0], tag)
+                self.assertEqual(codec.unpack(encoded), value)
+
+    def test_map_keys_become_strings(self):
+        self.assertEqual(self.round_trip({1: 'a'}), {'1': 'a'})
+
+    def test_truncated_payload(self):
+        encoded = codec.pack({'values': array('i', [1, 2, 3]), 'name': 'x' * 40, 'big': 0x100000000})
+        for size in range(len(encoded)):
+            with self.subTest(size=size):
+                with self.assertRaises(ValueError):
+                    codec.unpack(encoded[:size])
+
+    def test_trailing_bytes(self):
+        with self.assertRaises(ValueError):
+            codec.unpack(codec.pack(1) + b'\x00')
+
+
+class FrameTest(unittest.TestCase):
+    MESSAGE = {'id': 'a', 'values': [1, -2, 0x100000000], 'name': 'смена', 'nested': {'ok': True}}
+
+    def test_round_trip(self):
+        for fmt in codec.FRAME_FORMATS:
+            with self.subTest(fmt=fmt):
+                stream = io.BytesIO()
+                codec.write_frame(stream, self.MESSAGE, fmt)
+                codec.write_frame(stream, [], fmt)
+                stream.seek(0)
+                self.assertEqual(codec.read_frame(stream), self.MESSAGE)
+                self.assertEqual(codec.read_frame(stream), [])
+                self.assertIsNone(codec.read_frame(stream))
+
+    def test_header(self):
+        stream = io.BytesIO()
+        codec.write_frame(stream, {'a': 1}, 'json')
+        self.assertEqual(stream.getvalue(), b'json 7\n{"a":1}')
+        self.assertEqual(codec.parse_header(b'pack 12\n'), ('pack', 12))
+        self.assertIsNone(codec.parse_header(b'{"a": 1}\n'))
+        self.assertIsNone(codec.parse_header(b'pack -1\n'))
+
+    def test_truncated_frame(self):
+        for fmt in codec.FRAME_FORMATS:
+            with self.subTest(fmt=fmt):
+                stream = io.BytesIO()
+                codec.write_frame(stream, self.MESSAGE, fmt)
+                with self.assertRaisesRegex(ValueError, 'Truncated frame'):
+                    codec.read_frame(io.BytesIO(stream.getvalue()[:-1]))
+
+    def test_invalid_header(self):
+        with self.assertRaises(ValueError):
+            codec.read_frame(io.BytesIO(b'xml 3\nabc'))
+
+    def test_read_message_frame(self):
+        stream = io.BytesIO()
+        codec.write_frame(stream, self.MESSAGE, 'pack')
+        stream.seek(0)
+        self.assertEqual(codec.read_message(stream), self.MESSAGE)
+
+    def test_read_message_plain_json(self):
+        for text in ('{"id": "a",\n "values": [1, 2]}\n', '{"id": "a", "values": [1, 2]}', '[1]'):
+            with self.subTest(text=text):
+                expected = {'id': 'a', 'values': [1, 2]} if text != '[1]' else [1]
+                self.assertEqual(codec.read_message(io.BytesIO(text.encode('utf-8'))), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()